@@ -0,0 +1,206 @@
+"""
+Stage benchmarks over synthetic dirty-healthcare data.
+
+    python -m benchmarks.bench_pipeline --sizes 10000 100000 1000000
+    python -m benchmarks.bench_pipeline --sizes 100000 --postgres postgresql://localhost/etl_bench
+
+Every size gets a CSV from src.generate (written once into --workdir and
+reused), which is then read, cleaned and transformed with the
+healthcare_csv source config, and loaded with each --methods through the
+FakeConn/FakeCursor of tests/test_load.py, which count every statement,
+COPY and commit. With --postgres (or BENCH_DB_URL) the data is also loaded
+into that database with on_conflict=replace. Results are printed as a
+table and, with --output, written as JSON.
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+from pathlib import Path
+from unittest import mock
+
+import psycopg2
+
+from src.clean import clean
+from src.config import ROOT_DIR, get_source_config
+from src.generate import DEFAULT_DIRTINESS, write_dirty_csv
+from src.keys import new_key_state
+from src.load import load
+from src.profiling import Profiler, activate, stage
+from src.read import read
+from src.rules import compile_rules
+from src.transform import transform
+from tests.test_load import FakeConn, FakeCursor
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_METHODS = ("copy", "batch")
+
+
+def dataset_path(workdir, rows: int, seed: int, dirtiness: dict | None) -> Path:
+    knobs = json.dumps({**DEFAULT_DIRTINESS, **(dirtiness or {})}, sort_keys=True)
+    digest = hashlib.sha1(knobs.encode("utf-8")).hexdigest()[:10]
+    return Path(workdir) / f"healthcare_{rows}_{seed}_{digest}.csv"
+
+
+def count_round_trips(loaded_data: dict, **load_options) -> dict:
+    """
+    Run load() against fake connections and count what reached "the
+    server": statements and COPY streams per cursor, commits and
+    connections opened.
+    """
+    conns = []
+
+    def fake_connect(dsn):
+        conn = FakeConn(FakeCursor())
+        conns.append(conn)
+        return conn
+
+    with mock.patch.object(psycopg2, "connect", fake_connect):
+        stats = load(loaded_data, "postgresql://bench", **load_options)
+
+    executed = [sql for conn in conns for sql, _ in conn._cursor.executed]
+    return {
+        "round_trips": stats["round_trips"] if stats else None,
+        "statements": sum(not sql.lstrip().startswith("COPY") for sql in executed),
+        "copies": sum(sql.lstrip().startswith("COPY") for sql in executed),
+        "commits": sum(conn.commits for conn in conns),
+        "connections": len(conns),
+    }
+
+
+def run_benchmark(
+    rows: int,
+    workdir,
+    seed: int = 0,
+    dirtiness: dict | None = None,
+    methods=DEFAULT_METHODS,
+    on_conflict: str = "upsert",
+    db_url: str | None = None,
+    memory: bool = True,
+) -> dict:
+    """Benchmark every stage at one scale and return the measurements."""
+    path = dataset_path(workdir, rows, seed, dirtiness)
+    if not path.exists():
+        write_dirty_csv(path, rows, seed=seed, dirtiness=dirtiness)
+
+    source_cfg = copy.deepcopy(get_source_config("healthcare_csv"))
+    source_cfg.update(name=f"bench_{rows}", path=str(path))
+
+    loads = {}
+    profiler = Profiler(memory=memory)
+    with activate(profiler):
+        with stage("read") as rec:
+            raw_df = read(source_cfg)
+            rec["rows_out"] = len(raw_df)
+        with stage("clean", rows_in=len(raw_df)) as rec:
+            cleaned_df = clean(
+                raw_df,
+                categorical=source_cfg.get("categorical", False),
+                rules=compile_rules(source_cfg.get("rules")),
+            )
+            rec["rows_out"] = len(cleaned_df)
+        del raw_df
+        with stage("transform", rows_in=len(cleaned_df)) as rec:
+            loaded_data = transform(cleaned_df, key_state=new_key_state())
+            rec["rows_out"] = len(loaded_data["admissions"])
+        del cleaned_df
+
+        load_rows = sum(len(df) for df in loaded_data.values())
+        for method in methods:
+            with stage(f"load.{method}", rows_in=load_rows):
+                loads[method] = count_round_trips(
+                    loaded_data, method=method, on_conflict=on_conflict, workers=1
+                )
+        if db_url:
+            with stage("load.postgres", rows_in=load_rows):
+                stats = load(loaded_data, db_url, on_conflict="replace")
+            loads["postgres"] = {"round_trips": stats["round_trips"] if stats else None}
+
+    return {
+        "rows": rows,
+        "file_mib": round(path.stat().st_size / 2**20, 1),
+        "stages": profiler.report()["stages"],
+        "loads": loads,
+    }
+
+
+def format_results(results: list[dict]) -> str:
+    lines = [f"{'rows':>10}  {'stage':<16}{'wall s':>9}{'cpu s':>9}{'rows/s':>12}{'peak MiB':>10}  round trips"]
+    for result in results:
+        for record in result["stages"]:
+            method = record["name"].split(".", 1)[1] if record["name"].startswith("load.") else None
+            trips = result["loads"].get(method, {}).get("round_trips", "") if method else ""
+            lines.append(
+                f"{result['rows']:>10}  {record['name']:<16}{record['wall_s']:>9.3f}{record['cpu_s']:>9.3f}"
+                f"{record.get('rows_per_sec', 0):>12.0f}{record.get('peak_mib', float('nan')):>10.1f}  {trips}"
+            )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ETL stages on synthetic data.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help=f"row counts to benchmark (default: {' '.join(map(str, DEFAULT_SIZES))}; "
+        f"full ladder: {' '.join(map(str, SIZES))})",
+    )
+    parser.add_argument("--methods", nargs="+", default=list(DEFAULT_METHODS), choices=["copy", "batch", "row"])
+    parser.add_argument("--on-conflict", default="upsert", choices=["upsert", "replace"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KNOB=VALUE",
+        help=f"override a dirtiness knob (repeatable): {', '.join(DEFAULT_DIRTINESS)}",
+    )
+    parser.add_argument("--workdir", default=".cache/bench", help="where generated CSVs are kept")
+    parser.add_argument(
+        "--postgres",
+        default=os.environ.get("BENCH_DB_URL"),
+        metavar="DSN",
+        help="also load into this PostgreSQL database (default: $BENCH_DB_URL)",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (lower overhead)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    dirtiness = {}
+    for item in args.set:
+        knob, _, value = item.partition("=")
+        dirtiness[knob] = type(DEFAULT_DIRTINESS.get(knob, 0.0))(value)
+
+    workdir = Path(args.workdir)
+    if not workdir.is_absolute():
+        workdir = ROOT_DIR / workdir
+
+    results = [
+        run_benchmark(
+            rows,
+            workdir,
+            seed=args.seed,
+            dirtiness=dirtiness,
+            methods=args.methods,
+            on_conflict=args.on_conflict,
+            db_url=args.postgres,
+            memory=not args.no_memory,
+        )
+        for rows in args.sizes
+    ]
+    print(format_results(results))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+if __name__ == "__main__":
+    main()
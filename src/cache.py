@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import ROOT_DIR
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_DIR = ROOT_DIR / ".cache" / "stages"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+HASH_BLOCK_SIZE = 1024 * 1024
+FINGERPRINTS_FILE = "fingerprints.json"
+LAST_USED_FILE = ".last_used"
+
+
+def _digest(*parts) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def code_version(*modules) -> str:
+    """Hash of the source files of the given modules."""
+    h = hashlib.sha256()
+    for module in modules:
+        h.update(Path(module.__file__).read_bytes())
+    return h.hexdigest()
+
+
+def frames_fingerprint(frames: dict[str, pd.DataFrame], ordered: bool = False) -> str:
+    """
+    Content hash of a dict of DataFrames, computed column-wise by pandas.
+    Row order is ignored unless ordered is True.
+    """
+    parts = []
+    for name in sorted(frames):
+        df = frames[name]
+        row_hashes = pd.util.hash_pandas_object(df, index=False)
+        if ordered:
+            row_hash = hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest()
+        else:
+            row_hash = int(row_hashes.sum()) if len(df) else 0
+        parts.append((name, list(df.columns), len(df), row_hash))
+    return _digest(*parts)
+
+
+class StageCache:
+    """
+    Content-addressed on-disk cache of pipeline stage outputs.
+
+    Each entry is a directory named by the stage key holding one Parquet
+    file per output frame. Keys are derived only from the stage inputs
+    (source file fingerprint, config section, code version, upstream key),
+    so a key can be computed, and a hit detected, without running any
+    earlier stage. Entries are evicted least-recently-used first once the
+    cache grows beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.cache_dir = Path(cache_dir)
+        if not self.cache_dir.is_absolute():
+            self.cache_dir = ROOT_DIR / self.cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+    @classmethod
+    def from_config(cls, cache_cfg: dict | None, enabled: bool = True) -> "StageCache":
+        cache_cfg = cache_cfg or {}
+        return cls(
+            cache_dir=cache_cfg.get("dir", DEFAULT_CACHE_DIR),
+            max_bytes=cache_cfg.get("max_bytes", DEFAULT_MAX_BYTES),
+            enabled=enabled and cache_cfg.get("enabled", True),
+        )
+
+    def key(self, stage: str, *inputs) -> str:
+        return f"{stage}-{_digest(stage, *inputs)[:32]}"
+
+    def file_fingerprint(self, path) -> dict:
+        """
+        (size, mtime, content hash) of a source file. The hash is memoized
+        per (path, size, mtime) so unchanged files are not re-read.
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        memo_key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+        memo_path = self.cache_dir / FINGERPRINTS_FILE
+        memo = {}
+        if self.enabled and memo_path.exists():
+            try:
+                memo = json.loads(memo_path.read_text(encoding="utf-8"))
+            except ValueError:
+                logger.warning("Ignoring unreadable fingerprint memo %s", memo_path)
+
+        content_hash = memo.get(memo_key)
+        if content_hash is None:
+            h = hashlib.sha256()
+            with path.open("rb") as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                    h.update(block)
+            content_hash = h.hexdigest()
+            if self.enabled:
+                memo = {k: v for k, v in memo.items() if not k.startswith(f"{path}|")}
+                memo[memo_key] = content_hash
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # Written atomically: several source workers may share the memo.
+                tmp = memo_path.with_name(f"{FINGERPRINTS_FILE}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(memo), encoding="utf-8")
+                os.replace(tmp, memo_path)
+
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": content_hash}
+
+    def get(self, key: str) -> dict[str, pd.DataFrame] | None:
+        if not self.enabled:
+            return None
+
+        entry = self.cache_dir / key
+        if not entry.is_dir():
+            logger.info("Stage cache miss: %s", key)
+            return None
+
+        try:
+            frames = {
+                file.stem: pd.read_parquet(file)
+                for file in sorted(entry.glob("*.parquet"))
+            }
+        except Exception:
+            logger.exception("Stage cache entry %s is unreadable; discarding it", key)
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        (entry / LAST_USED_FILE).touch()
+        logger.info("Stage cache hit: %s (%d frame(s))", key, len(frames))
+        return frames
+
+    def put(self, key: str, frames: dict[str, pd.DataFrame]) -> None:
+        if not self.enabled:
+            return
+
+        entry = self.cache_dir / key
+        tmp = self.cache_dir / f".{key}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        try:
+            for name, df in frames.items():
+                df.to_parquet(tmp / f"{name}.parquet", index=False)
+        except Exception:
+            logger.warning("Could not cache stage output %s; continuing without it", key, exc_info=True)
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        (tmp / LAST_USED_FILE).touch()
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        logger.info("Stored stage output %s (%d frame(s))", key, len(frames))
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        if not self.cache_dir.is_dir():
+            return
+
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            marker = entry / LAST_USED_FILE
+            last_used = marker.stat().st_mtime if marker.exists() else 0.0
+            entries.append((last_used, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for last_used, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            logger.info(
+                "Evicted stage cache entry %s (%d bytes, last used %s)",
+                entry.name,
+                size,
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_used)),
+            )
@@ -14,6 +14,20 @@ def load_config(path=None):
     with path.open("r", encoding="utf-8") as f:
         config = yaml.safe_load(f)
         
+    # ETL_ENV selects an entry of `environments` whose settings override
+    # the defaults (one level deep, so e.g. bulk_load.enabled can be set
+    # without repeating the rest of bulk_load).
+    env = os.environ.get("ETL_ENV")
+    if env:
+        environments = config.get("environments") or {}
+        if env not in environments:
+            raise KeyError(f"Environment not found in config: {env!r}")
+        for key, value in (environments[env] or {}).items():
+            current = config["defaults"].get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                value = {**current, **value}
+            config["defaults"][key] = value
+
     db_url = config["defaults"].get("db_url")
     if isinstance(db_url, str):
         config["defaults"]["db_url"] = os.path.expandvars(db_url)
@@ -0,0 +1,270 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import ROOT_DIR
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Share of rows (or, for hospitals and doctors, the number of distinct
+# values) affected by each kind of dirt. Every rate is independent.
+DEFAULT_DIRTINESS = {
+    "bad_age_rate": 0.02,  # negative, > 120 or non-numeric ages
+    "comma_number_rate": 0.05,  # billing like "$1,234.56", rooms like "1,024"
+    "invalid_test_result_rate": 0.01,  # results outside the allowed labels
+    "whitespace_rate": 0.05,  # padded text cells
+    "mixed_case_rate": 0.2,  # names, doctors and hospitals in random case
+    "missing_rate": 0.01,  # blank cells in any column
+    "alt_date_rate": 0.0,  # dates written as %m/%d/%Y instead of %Y-%m-%d
+    "duplicate_people_rate": 0.3,  # rows reusing an earlier person
+    "hospitals": 5000,
+    "doctors": 20000,
+}
+
+RAW_COLUMNS = [
+    "Name",
+    "Age",
+    "Gender",
+    "Blood Type",
+    "Medical Condition",
+    "Date of Admission",
+    "Doctor",
+    "Hospital",
+    "Insurance Provider",
+    "Billing Amount",
+    "Room Number",
+    "Admission Type",
+    "Discharge Date",
+    "Medication",
+    "Test Results",
+]
+
+FIRST_NAMES = [
+    "james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda",
+    "william", "elizabeth", "david", "barbara", "richard", "susan", "joseph", "jessica",
+    "thomas", "sarah", "charles", "karen", "christopher", "nancy", "daniel", "lisa",
+    "matthew", "betty", "anthony", "margaret", "mark", "sandra", "donald", "ashley",
+]
+LAST_NAMES = [
+    "smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis",
+    "rodriguez", "martinez", "hernandez", "lopez", "gonzalez", "wilson", "anderson",
+    "thomas", "taylor", "moore", "jackson", "martin", "lee", "perez", "thompson",
+    "white", "harris", "sanchez", "clark", "ramirez", "lewis", "robinson", "walker",
+    "young", "allen", "king", "wright", "scott", "torres", "nguyen", "hill", "flores",
+]
+HOSPITAL_SUFFIXES = ["general", "medical center", "clinic", "and sons", "group", "ltd"]
+GENDERS = ["Male", "Female"]
+BLOOD_TYPES = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+CONDITIONS = ["Cancer", "Obesity", "Diabetes", "Asthma", "Hypertension", "Arthritis"]
+INSURERS = ["Blue Cross", "Medicare", "Aetna", "UnitedHealthcare", "Cigna"]
+ADMISSION_TYPES = ["Urgent", "Emergency", "Elective"]
+MEDICATIONS = ["Paracetamol", "Ibuprofen", "Aspirin", "Penicillin", "Lipitor"]
+TEST_RESULTS = ["Normal", "Abnormal", "Inconclusive"]
+INVALID_TEST_RESULTS = ["Pending", "N/A", "??", "Positive"]
+BAD_AGES = ["-5", "999", "unknown", "4O"]
+
+FIRST_DATE = np.datetime64("2019-01-01")
+DATE_SPAN_DAYS = 5 * 365
+
+
+def _resolve_dirtiness(dirtiness: dict | None) -> dict:
+    unknown = set(dirtiness or {}) - set(DEFAULT_DIRTINESS)
+    if unknown:
+        raise ValueError(f"Unsupported dirtiness option(s): {sorted(unknown)}")
+    return {**DEFAULT_DIRTINESS, **(dirtiness or {})}
+
+
+def _pool(size: int, fmt) -> np.ndarray:
+    """size distinct labels built by fmt(i) for i in 0..size-1."""
+    return np.array([fmt(i) for i in range(size)], dtype=object)
+
+
+def _random_case(rng, values: pd.Series, rate: float) -> pd.Series:
+    mask = rng.random(len(values)) < rate
+    if not mask.any():
+        return values
+    upper = rng.random(int(mask.sum())) < 0.5
+    picked = values[mask]
+    values[mask] = np.where(upper, picked.str.upper(), picked.str.lower())
+    return values
+
+
+def _pad(rng, values: pd.Series, rate: float) -> pd.Series:
+    mask = (rng.random(len(values)) < rate) & values.notna().to_numpy()
+    if mask.any():
+        values[mask] = "  " + values[mask] + " "
+    return values
+
+
+def generate_dirty_healthcare(
+    rows: int,
+    seed: int = 0,
+    dirtiness: dict | None = None,
+    person_offset: int = 0,
+) -> pd.DataFrame:
+    """
+    Synthetic rows shaped like healthcare_dataset_dirty.csv: the same raw
+    columns, value domains and kinds of dirt, scaled to any row count.
+
+    dirtiness overrides entries of DEFAULT_DIRTINESS. Every column is drawn
+    with numpy from small value pools, and the output is deterministic for
+    a given rows, seed and dirtiness.
+    person_offset numbers the people of this frame after those of earlier
+    frames, so frames written one after another (see write_dirty_csv())
+    share duplicate people but never collide on new ones.
+    """
+    knobs = _resolve_dirtiness(dirtiness)
+    rng = np.random.default_rng(seed)
+
+    # People: the first rows are new people, the rest reuse earlier ones.
+    fresh = max(1, int(round(rows * (1 - knobs["duplicate_people_rate"]))))
+    person = np.empty(rows, dtype=np.int64)
+    person[:fresh] = person_offset + np.arange(fresh)
+    person[fresh:] = rng.integers(0, person_offset + fresh, size=rows - fresh)
+    rng.shuffle(person)
+
+    first = np.array(FIRST_NAMES, dtype=object)[person % len(FIRST_NAMES)]
+    last = np.array(LAST_NAMES, dtype=object)[(person // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    names = pd.Series(first + " " + last, dtype=object)
+    # Age, gender and blood type follow the person, so duplicates match.
+    person_rng = (person * 2654435761) % 2**32
+    ages = pd.Series((18 + person_rng % 72).astype(str), dtype=object)
+    genders = np.array(GENDERS, dtype=object)[person_rng % len(GENDERS)]
+    blood_types = np.array(BLOOD_TYPES, dtype=object)[(person_rng // 7) % len(BLOOD_TYPES)]
+
+    hospital_pool = _pool(
+        knobs["hospitals"],
+        lambda i: f"{LAST_NAMES[i % len(LAST_NAMES)]} {HOSPITAL_SUFFIXES[(i // len(LAST_NAMES)) % len(HOSPITAL_SUFFIXES)]} {i}",
+    )
+    doctor_pool = _pool(
+        knobs["doctors"],
+        lambda i: f"dr {FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]} {i}",
+    )
+    doctor = rng.integers(0, len(doctor_pool), size=rows)
+    # Each doctor mostly works at one hospital.
+    hospital = (doctor * 31 + (rng.random(rows) < 0.1) * rng.integers(1, 4, size=rows)) % len(hospital_pool)
+
+    admitted = FIRST_DATE + rng.integers(0, DATE_SPAN_DAYS, size=rows).astype("timedelta64[D]")
+    discharged = admitted + rng.integers(1, 30, size=rows).astype("timedelta64[D]")
+    admitted = pd.Series(pd.to_datetime(admitted).strftime("%Y-%m-%d"), dtype=object)
+    discharged = pd.Series(pd.to_datetime(discharged).strftime("%Y-%m-%d"), dtype=object)
+    alt = rng.random(rows) < knobs["alt_date_rate"]
+    if alt.any():
+        admitted[alt] = pd.to_datetime(admitted[alt]).dt.strftime("%m/%d/%Y")
+        discharged[alt] = pd.to_datetime(discharged[alt]).dt.strftime("%m/%d/%Y")
+
+    billing = pd.Series(np.round(rng.uniform(100, 50000, size=rows), 2).astype(str), dtype=object)
+    rooms = pd.Series(rng.integers(101, 2000, size=rows).astype(str), dtype=object)
+    commas = rng.random(rows) < knobs["comma_number_rate"]
+    if commas.any():
+        amounts = rng.uniform(1000, 50000, size=int(commas.sum()))
+        billing[commas] = [f"${value:,.2f}" for value in amounts]
+        rooms[commas] = [f"{value:,}" for value in rng.integers(1000, 2000, size=int(commas.sum()))]
+
+    bad_age = rng.random(rows) < knobs["bad_age_rate"]
+    ages[bad_age] = np.array(BAD_AGES, dtype=object)[rng.integers(0, len(BAD_AGES), size=int(bad_age.sum()))]
+
+    results = np.array(TEST_RESULTS, dtype=object)[rng.integers(0, len(TEST_RESULTS), size=rows)]
+    invalid = rng.random(rows) < knobs["invalid_test_result_rate"]
+    results[invalid] = np.array(INVALID_TEST_RESULTS, dtype=object)[
+        rng.integers(0, len(INVALID_TEST_RESULTS), size=int(invalid.sum()))
+    ]
+
+    def pick(values):
+        return np.array(values, dtype=object)[rng.integers(0, len(values), size=rows)]
+
+    df = pd.DataFrame(
+        {
+            "Name": _random_case(rng, names, knobs["mixed_case_rate"]),
+            "Age": ages,
+            "Gender": genders,
+            "Blood Type": blood_types,
+            "Medical Condition": pick(CONDITIONS),
+            "Date of Admission": admitted,
+            "Doctor": _random_case(rng, pd.Series(doctor_pool[doctor], dtype=object), knobs["mixed_case_rate"]),
+            "Hospital": _random_case(rng, pd.Series(hospital_pool[hospital], dtype=object), knobs["mixed_case_rate"]),
+            "Insurance Provider": pick(INSURERS),
+            "Billing Amount": billing,
+            "Room Number": rooms,
+            "Admission Type": pick(ADMISSION_TYPES),
+            "Discharge Date": discharged,
+            "Medication": pick(MEDICATIONS),
+            "Test Results": results,
+        },
+        columns=RAW_COLUMNS,
+    ).astype(object)
+
+    for col in ["Name", "Gender", "Medical Condition", "Doctor", "Hospital", "Test Results"]:
+        df[col] = _pad(rng, df[col], knobs["whitespace_rate"])
+
+    if knobs["missing_rate"] > 0:
+        missing = rng.random(df.shape) < knobs["missing_rate"]
+        df = df.mask(missing)
+
+    return df
+
+
+def write_dirty_csv(
+    path,
+    rows: int,
+    seed: int = 0,
+    dirtiness: dict | None = None,
+    chunk_rows: int = 1_000_000,
+) -> Path:
+    """
+    Write generate_dirty_healthcare() output to a CSV file, chunk_rows at a
+    time so memory stays flat at any scale. Relative paths are resolved
+    against the project root.
+    """
+    path = Path(path)
+    if not path.is_absolute():
+        path = ROOT_DIR / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    knobs = _resolve_dirtiness(dirtiness)
+
+    tmp = path.with_name(f"{path.name}.tmp")
+    written = 0
+    people = 0
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        for i, start in enumerate(range(0, rows, chunk_rows)):
+            n = min(chunk_rows, rows - start)
+            chunk = generate_dirty_healthcare(n, seed=seed + i, dirtiness=knobs, person_offset=people)
+            chunk.to_csv(f, index=False, header=i == 0)
+            people += max(1, int(round(n * (1 - knobs["duplicate_people_rate"]))))
+            written += n
+    tmp.replace(path)
+    logger.info("Wrote %d synthetic row(s) to %s", written, path)
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate healthcare_dataset_dirty.csv-shaped synthetic data."
+    )
+    parser.add_argument("--rows", type=int, required=True, help="number of rows to write")
+    parser.add_argument("--out", required=True, help="CSV file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KNOB=VALUE",
+        help=f"override a dirtiness knob (repeatable): {', '.join(DEFAULT_DIRTINESS)}",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    dirtiness = {}
+    for item in args.set:
+        knob, _, value = item.partition("=")
+        dirtiness[knob] = type(DEFAULT_DIRTINESS.get(knob, 0.0))(value)
+    return write_dirty_csv(args.out, args.rows, seed=args.seed, dirtiness=dirtiness)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import ROOT_DIR
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def new_key_state() -> dict:
+    """
+    Empty key state for one run.
+
+    "ids" maps each dimension name to a frame of natural key columns plus
+    the surrogate id column; it is what the registry persists. "emitted"
+    holds, per dimension, the set of ids already handed to load() during
+    this run (for admissions, a dict of id -> content hash, see
+    src.transform.admission_repeats()) and is never persisted, so every
+    run re-emits the dimension rows it touches.
+    """
+    return {"ids": {}, "emitted": {}}
+
+
+def assign_ids(
+    dim_df: pd.DataFrame,
+    id_col: str,
+    key_cols: list[str],
+    key_state: dict | None,
+    name: str,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Attach surrogate ids to a deduplicated dimension frame.
+
+    Without key_state ids are 1..n in order of first appearance. With a
+    key_state (shared across the chunks of a run, and optionally loaded
+    from the on-disk registry), known natural keys keep their id and new
+    keys continue the sequence after the highest id ever assigned. The
+    lookup is a single hash join of the whole frame against the registry.
+
+    Returns (all rows with ids, rows not yet emitted in this run).
+    """
+    if key_state is None:
+        dim_df[id_col] = dim_df.index + 1
+        return dim_df, dim_df
+
+    ids = key_state.setdefault("ids", {})
+    emitted = key_state.setdefault("emitted", {})
+    known = ids.get(name)
+
+    if known is None or known.empty:
+        dim_df[id_col] = dim_df.index + 1
+        ids[name] = dim_df[key_cols + [id_col]].copy()
+    else:
+        dim_df = dim_df.merge(known, on=key_cols, how="left")
+        new_mask = dim_df[id_col].isna()
+        next_id = int(known[id_col].max()) + 1
+        dim_df.loc[new_mask, id_col] = np.arange(next_id, next_id + new_mask.sum())
+        dim_df[id_col] = dim_df[id_col].astype("int64")
+        if new_mask.any():
+            ids[name] = pd.concat(
+                [known, dim_df.loc[new_mask, key_cols + [id_col]]],
+                ignore_index=True,
+            )
+            logger.debug("%s: assigned %d new id(s)", name, new_mask.sum())
+
+    seen = emitted.setdefault(name, set())
+    dim_ids = dim_df[id_col].tolist()
+    emit_mask = np.fromiter((i not in seen for i in dim_ids), dtype=bool, count=len(dim_ids))
+    seen.update(dim_df.loc[emit_mask, id_col].tolist())
+
+    return dim_df, dim_df[emit_mask].reset_index(drop=True)
+
+
+def resolve_registry_path(path) -> Path:
+    path = Path(path)
+    if not path.is_absolute():
+        path = ROOT_DIR / path
+    return path
+
+
+def load_key_registry(path) -> dict:
+    """
+    Build a key state from the registry directory: one Parquet file per
+    dimension. A missing directory yields an empty state.
+    """
+    path = resolve_registry_path(path)
+    key_state = new_key_state()
+
+    if not path.is_dir():
+        logger.info("No key registry at %s; starting with empty key state", path)
+        return key_state
+
+    for file in sorted(path.glob("*.parquet")):
+        key_state["ids"][file.stem] = pd.read_parquet(file)
+
+    logger.info(
+        "Loaded key registry from %s: %s",
+        path,
+        {name: len(df) for name, df in key_state["ids"].items()},
+    )
+    return key_state
+
+
+def save_key_registry(key_state: dict, path) -> None:
+    """Persist the natural key -> id mappings, replacing each file atomically."""
+    path = resolve_registry_path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    for name, known in key_state.get("ids", {}).items():
+        target = path / f"{name}.parquet"
+        tmp = path / f"{name}.parquet.tmp"
+        known.to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+
+    logger.info(
+        "Saved key registry to %s: %s",
+        path,
+        {name: len(df) for name, df in key_state.get("ids", {}).items()},
+    )
@@ -1,12 +1,218 @@
+import io
+import queue
+import uuid
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+import numpy as np
 import pandas as pd
 import psycopg2
+from src.cache import frames_fingerprint
 from src.config import CONFIG, get_source_config
 
 from src.logger import get_logger
+from src.profiling import stage
+from src.schema import (
+    FOREIGN_KEYS,
+    LOAD_STATE_TABLE,
+    PARTITION_INTERVALS,
+    PARTITION_KEY,
+    create_partition_sql,
+    ensure_partitioned,
+    ensure_schema,
+    foreign_key_name,
+    partition_bounds,
+    partition_starts,
+    reject_hash_sql,
+)
 
 logger = get_logger(__name__)
 
-def load(loaded_data, db_url):
+LOAD_METHODS = ("copy", "batch", "row")
+ON_CONFLICT_MODES = ("upsert", "replace")
+LOAD_BACKENDS = ("sync", "async")
+
+COPY_NULL = r"\N"
+COPY_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+COPY_CHUNK_ROWS = 50000
+
+TRUNCATE_SQL = """
+    TRUNCATE rejects,
+             admission_data,
+             doctors,
+             hospitals,
+             conditions,
+             insurance,
+             admission_types,
+             test_results,
+             people
+    RESTART IDENTITY;
+"""
+
+# Referenced tables per table; drives the parallel scheduler.
+TABLE_DEPENDENCIES = {
+    table: tuple(ref for _, ref in fks) for table, fks in FOREIGN_KEYS.items()
+}
+
+# Bulk-load profile (see load()). Any option left out keeps this value.
+BULK_LOAD_DEFAULTS = {
+    "enabled": True,
+    "foreign_keys": "keep",
+    "rebuild_indexes": False,
+    "unlogged_staging": False,
+    "analyze": False,
+    "session": {},
+}
+FK_MODES = ("keep", "defer", "drop")
+
+# Large tables that the parallel loader splits into key-range shards.
+SHARDED_TABLES = ("admission_data", "rejects")
+
+# Primary key used for ON CONFLICT upserts; rejects only ever appends.
+CONFLICT_KEYS = {
+    "people": "person_id",
+    "hospitals": "hospital_id",
+    "doctors": "doctor_id",
+    "conditions": "condition_id",
+    "insurance": "insurance_id",
+    "test_results": "test_result_id",
+    "admission_types": "admission_type_id",
+    "admission_data": "admission_id",
+    "rejects": None,
+}
+
+# Target table -> (loaded_data key, column -> wire type). Ordered so that
+# referenced tables are written before the tables holding the foreign keys.
+TABLE_SPECS = {
+    "people": ("people", {
+        "person_id": "int",
+        "name": "text",
+        "age": "int",
+        "gender": "text",
+        "blood_type": "text",
+    }),
+    "hospitals": ("hospitals", {
+        "hospital_id": "int",
+        "hospital_name": "text",
+    }),
+    "doctors": ("doctors", {
+        "doctor_id": "int",
+        "doctor_name": "text",
+        "hospital_id": "int",
+    }),
+    "conditions": ("conditions", {
+        "condition_id": "int",
+        "condition_name": "text",
+    }),
+    "insurance": ("insurance", {
+        "insurance_id": "int",
+        "provider_name": "text",
+    }),
+    "test_results": ("test_results", {
+        "test_result_id": "int",
+        "result_label": "text",
+    }),
+    "admission_types": ("admission_types", {
+        "admission_type_id": "int",
+        "type_name": "text",
+    }),
+    "admission_data": ("admissions", {
+        "admission_id": "int",
+        "person_id": "int",
+        "doctor_id": "int",
+        "condition_id": "int",
+        "insurance_id": "int",
+        "admission_type_id": "int",
+        "test_result_id": "int",
+        "date_of_admission": "timestamp",
+        "discharge_date": "timestamp",
+        "billing_amount": "numeric",
+        "room_number": "int",
+        "medication": "text",
+    }),
+    "rejects": ("rejects", {
+        "name": "text",
+        "age": "text",
+        "gender": "text",
+        "blood_type": "text",
+        "medical_condition": "text",
+        "date_of_admission": "text",
+        "doctor": "text",
+        "hospital": "text",
+        "insurance_provider": "text",
+        "billing_amount": "text",
+        "room_number": "text",
+        "admission_type": "text",
+        "discharge_date": "text",
+        "medication": "text",
+        "test_results": "text",
+        "missing_columns": "text",
+        "missing_bitmask": "int",
+        "reason": "text",
+    }),
+}
+
+
+def load(
+    loaded_data,
+    db_url,
+    method=None,
+    batch_size=None,
+    on_conflict=None,
+    workers=None,
+    checkpoint_every=None,
+    load_id=None,
+    bulk_load=None,
+    partitioning=None,
+    backend=None,
+):
+    """
+    Write the transformed tables to Postgres in a single transaction.
+
+    method is "copy" (one COPY stream per table), "batch" (multi-row
+    INSERTs of batch_size rows) or "row" (one INSERT per row). on_conflict
+    is "upsert" (merge each table through a staging table, rewriting only
+    changed rows) or "replace" (truncate, then write everything).
+    workers > 1 stages the tables over that many extra connections (see
+    _load_parallel()), filled by the given backend. checkpoint_every
+    commits every N batches so a failed load can resume (see
+    _load_checkpointed()); bulk_load and partitioning are described at
+    _resolve_bulk_load() and _resolve_partitioning(). Options left out are
+    taken from the defaults section of sources.yml.
+
+    Returns a dict with the options used, the number of statements sent
+    (round_trips) and the rows written per table, plus the partitions or
+    checkpoints written where those apply, or None if the load was rolled
+    back.
+    """
+    method, batch_size, on_conflict, workers = _resolve_options(
+        method, batch_size, on_conflict, workers
+    )
+    if checkpoint_every is None:
+        checkpoint_every = CONFIG["defaults"].get("checkpoint_every")
+    if checkpoint_every is not None and checkpoint_every < 1:
+        raise ValueError(f"checkpoint_every must be at least 1, got {checkpoint_every}")
+    if checkpoint_every and method == "row":
+        logger.warning("Row method does not support checkpoints; loading in one transaction.")
+        checkpoint_every = None
+    if checkpoint_every and workers > 1:
+        logger.warning("Checkpointed loads are serial; using 1 worker.")
+        workers = 1
+    bulk = _resolve_bulk_load(bulk_load)
+    interval = _resolve_partitioning(partitioning)
+    if interval and checkpoint_every:
+        logger.warning("Partitioned loads are not checkpointed; loading in one transaction.")
+        checkpoint_every = None
+    if interval and workers > 1:
+        logger.warning("Partitioned loads are serial; using 1 worker.")
+        workers = 1
+    if backend is None:
+        backend = CONFIG["defaults"].get("load_backend", "sync")
+    if backend not in LOAD_BACKENDS:
+        raise ValueError(f"Unsupported load backend: {backend}")
+    if backend == "async" and (method == "row" or checkpoint_every or interval):
+        logger.warning("This load cannot use the async backend; loading synchronously.")
+        backend = "sync"
+
     people_df = loaded_data["people"]
     hospitals_df = loaded_data["hospitals"]
     doctors_df = loaded_data["doctors"]
@@ -17,7 +223,13 @@ def load(loaded_data, db_url):
     admissions_df = loaded_data["admissions"]
     rejects_df = loaded_data["rejects"]
 
-    logger.info("Starting load()")
+    logger.info(
+        "Starting load() with method=%s, on_conflict=%s, workers=%d, backend=%s",
+        method,
+        on_conflict,
+        workers,
+        backend,
+    )
     logger.info(
         "Row counts - people=%d, hospitals=%d, doctors=%d, conditions=%d, "
         "insurance=%d, test_results=%d, admission_types=%d, admissions=%d, rejects=%d",
@@ -35,336 +247,1257 @@ def load(loaded_data, db_url):
     try:
         logger.info("Connecting to database...")
         conn = psycopg2.connect(db_url)
-        cur = conn.cursor()
+        cur = _CountingCursor(conn.cursor())
         logger.info("Database connection established.")
 
-        logger.info("Creating tables if they do not exist...")
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS people (
-                person_id   SERIAL PRIMARY KEY,
-                name        TEXT NOT NULL,
-                age         INT,
-                gender      TEXT NOT NULL,
-                blood_type  TEXT NOT NULL
-            );
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS hospitals (
-                hospital_id   INT PRIMARY KEY,
-                hospital_name TEXT NOT NULL
-            );
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS doctors (
-                doctor_id     INT PRIMARY KEY,
-                doctor_name   TEXT NOT NULL,
-                hospital_id   INT NOT NULL REFERENCES hospitals(hospital_id)
-            );
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS conditions (
-                condition_id   INT PRIMARY KEY,
-                condition_name TEXT NOT NULL
-            );
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS insurance (
-                insurance_id  INT PRIMARY KEY,
-                provider_name TEXT NOT NULL
-            );
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS test_results (
-                test_result_id INT PRIMARY KEY,
-                result_label   TEXT NOT NULL CHECK (result_label IN ('inconclusive', 'normal', 'abnormal'))
-            );
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS admission_types (
-                admission_type_id INT PRIMARY KEY,
-                type_name         TEXT NOT NULL
-            );
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS admission_data (
-                admission_id       INT PRIMARY KEY,
-                person_id          INT NOT NULL REFERENCES people(person_id),
-                doctor_id          INT NOT NULL REFERENCES doctors(doctor_id),
-                condition_id       INT NOT NULL REFERENCES conditions(condition_id),
-                insurance_id       INT NOT NULL REFERENCES insurance(insurance_id),
-                admission_type_id  INT NOT NULL REFERENCES admission_types(admission_type_id),
-                test_result_id     INT NOT NULL REFERENCES test_results(test_result_id),
-                date_of_admission  TIMESTAMP,
-                discharge_date     TIMESTAMP,
-                billing_amount     NUMERIC(12, 2),
-                room_number        INT,
-                medication         TEXT NOT NULL
-            );
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS rejects (
-                reject_id          SERIAL PRIMARY KEY,
-                name               TEXT,
-                age                TEXT,
-                gender             TEXT,
-                blood_type         TEXT,
-                medical_condition  TEXT,
-                date_of_admission  TEXT,
-                doctor             TEXT,
-                hospital           TEXT,
-                insurance_provider TEXT,
-                billing_amount     TEXT,
-                room_number        TEXT,
-                admission_type     TEXT,
-                discharge_date     TEXT,
-                medication         TEXT,
-                test_results       TEXT,
-                missing_columns    TEXT NOT NULL
-            );
-        """)
+        with stage("load.schema"):
+            ensure_schema(conn, cur)
+            if interval:
+                ensure_partitioned(conn, cur, interval)
+        _apply_session_settings(cur, bulk)
+
+        if checkpoint_every:
+            if load_id is None:
+                # Checkpoints are row positions, so the id must change
+                # when the rows are reordered.
+                load_id = f"{on_conflict}:{frames_fingerprint(loaded_data, ordered=True)}"
+            checkpoint = _load_checkpointed(
+                conn, cur, loaded_data, method, batch_size, on_conflict, checkpoint_every, load_id
+            )
+            _analyze_tables(conn, cur, bulk)
+            logger.info(
+                "Checkpointed load completed successfully in %d round trip(s).",
+                cur.round_trips,
+            )
+            return {
+                "method": method,
+                "on_conflict": on_conflict,
+                "workers": 1,
+                "backend": backend,
+                "round_trips": cur.round_trips,
+                "rows": {
+                    table: len(loaded_data[key])
+                    for table, (key, _) in TABLE_SPECS.items()
+                },
+                **checkpoint,
+            }
 
+        staged = workers > 1 or backend == "async"
+        if on_conflict == "replace" and not staged and not interval:
+            logger.info("Truncating tables and resetting identities...")
+            cur.execute(TRUNCATE_SQL)
+            conn.commit()
+            logger.info("Tables truncated.")
+
+        logger.info("Starting insertion.")
+        worker_round_trips = 0
+        partitions = None
+        if backend == "async":
+            # Imported here: src.load_async builds on this module.
+            from src.load_async import stage_tables
+
+            worker_round_trips = _load_parallel(
+                conn, cur, db_url, loaded_data, method, batch_size, on_conflict, workers, bulk,
+                stager=stage_tables,
+            )
+        elif workers > 1:
+            worker_round_trips = _load_parallel(
+                conn, cur, db_url, loaded_data, method, batch_size, on_conflict, workers, bulk
+            )
+        else:
+            indexes = _begin_bulk_load(cur, bulk)
+            if interval:
+                partitions = _write_partitioned(
+                    cur, loaded_data, method, batch_size, on_conflict, interval, set()
+                )
+            else:
+                _write_tables(cur, loaded_data, method, batch_size, on_conflict)
+            _finish_bulk_load(cur, bulk, indexes)
 
         conn.commit()
-        logger.info("Tables created/verified successfully.")
-
-        logger.info("Truncating tables and resetting identities...")
-        cur.execute("""
-            TRUNCATE rejects,
-                     admission_data,
-                     doctors,
-                     hospitals,
-                     conditions,
-                     insurance,
-                     admission_types,
-                     test_results,
-                     people
-            RESTART IDENTITY;
-        """)
+        _analyze_tables(conn, cur, bulk)
+        round_trips = cur.round_trips + worker_round_trips
+        logger.info(
+            "Load completed successfully in %d round trip(s).", round_trips
+        )
+
+        stats = {
+            "method": method,
+            "on_conflict": on_conflict,
+            "workers": workers,
+            "backend": backend,
+            "round_trips": round_trips,
+            "rows": {
+                table: len(loaded_data[key])
+                for table, (key, _) in TABLE_SPECS.items()
+            },
+        }
+        if partitions is not None:
+            stats["partitions"] = partitions
+        return stats
+
+    except psycopg2.Error:
+        logger.exception("Error in load() while working with the database.")
+        if 'conn' in locals():
+            conn.rollback()
+            logger.info("Transaction rolled back due to error.")
+        if checkpoint_every and load_id is not None:
+            logger.info(
+                "Committed checkpoints of load %s are kept; rerun to resume it.", load_id
+            )
+
+    finally:
+        if 'cur' in locals() and cur:
+            cur.close()
+        if 'conn' in locals() and conn:
+            conn.close()
+        logger.info("Database connection closed. End of load().")
+
+
+def load_stream(
+    chunks,
+    db_url,
+    method=None,
+    batch_size=None,
+    on_conflict=None,
+    bulk_load=None,
+    partitioning=None,
+):
+    """
+    Load an iterable of transformed chunks (as produced by transform() with
+    a shared key_state) over one connection and one transaction.
+
+    Tables are created, and truncated in replace mode, once before the first
+    chunk; every chunk is then written with the same serial path as load(),
+    so only one chunk needs to be in memory at a time. Parallel workers are
+    not used for streamed loads.
+
+    bulk_load is applied as in load(), around the whole stream, and so is
+    partitioning: in replace mode a partition is truncated only before the
+    first chunk that touches it, and the summary lists every partition
+    written.
+
+    Returns the same summary dict as load(), with row counts summed over all
+    chunks, or None if the load was rolled back.
+    """
+    method, batch_size, on_conflict, _ = _resolve_options(
+        method, batch_size, on_conflict, 1
+    )
+    bulk = _resolve_bulk_load(bulk_load)
+    interval = _resolve_partitioning(partitioning)
+
+    logger.info(
+        "Starting load_stream() with method=%s, on_conflict=%s",
+        method,
+        on_conflict,
+    )
+
+    rows = {table: 0 for table in TABLE_SPECS}
+    n_chunks = 0
+    written = set()
+
+    try:
+        logger.info("Connecting to database...")
+        conn = psycopg2.connect(db_url)
+        cur = _CountingCursor(conn.cursor())
+        logger.info("Database connection established.")
+
+        ensure_schema(conn, cur)
+        if interval:
+            ensure_partitioned(conn, cur, interval)
+        _apply_session_settings(cur, bulk)
+
+        if on_conflict == "replace" and not interval:
+            logger.info("Truncating tables and resetting identities...")
+            cur.execute(TRUNCATE_SQL)
+            conn.commit()
+            logger.info("Tables truncated.")
+
+        indexes = _begin_bulk_load(cur, bulk)
+        for loaded_data in chunks:
+            if interval:
+                _write_partitioned(
+                    cur, loaded_data, method, batch_size, on_conflict, interval, written
+                )
+            else:
+                _write_tables(cur, loaded_data, method, batch_size, on_conflict)
+            for table, (key, _) in TABLE_SPECS.items():
+                rows[table] += len(loaded_data[key])
+            n_chunks += 1
+            logger.info(
+                "Loaded chunk %d: %d admissions, %d rejects",
+                n_chunks,
+                len(loaded_data["admissions"]),
+                len(loaded_data["rejects"]),
+            )
+
+        _finish_bulk_load(cur, bulk, indexes)
         conn.commit()
-        logger.info("Tables truncated.")
+        _analyze_tables(conn, cur, bulk)
+        logger.info(
+            "Streamed load of %d chunk(s) completed successfully in %d round trip(s).",
+            n_chunks,
+            cur.round_trips,
+        )
 
-        logger.info("Starting insertion.")
-        logger.debug("Inserting into people...")
-        for row in people_df.itertuples(index=False):
-            try:
-                age = row.age
+        stats = {
+            "method": method,
+            "on_conflict": on_conflict,
+            "workers": 1,
+            "round_trips": cur.round_trips,
+            "chunks": n_chunks,
+            "rows": rows,
+        }
+        if interval:
+            stats["partitions"] = sorted(written)
+        return stats
+
+    except psycopg2.Error:
+        logger.exception("Error in load_stream() while working with the database.")
+        if 'conn' in locals():
+            conn.rollback()
+            logger.info("Transaction rolled back due to error.")
+
+    finally:
+        if 'cur' in locals() and cur:
+            cur.close()
+        if 'conn' in locals() and conn:
+            conn.close()
+        logger.info("Database connection closed. End of load_stream().")
+
+
+def _resolve_options(method, batch_size, on_conflict, workers):
+    """Fill unset load options from sources.yml defaults and validate them."""
+    if method is None:
+        method = CONFIG["defaults"].get("load_method", "copy")
+    if batch_size is None:
+        batch_size = CONFIG["defaults"].get("batch_size", 5000)
+    if on_conflict is None:
+        on_conflict = CONFIG["defaults"].get("on_conflict", "upsert")
+    if workers is None:
+        workers = CONFIG["defaults"].get("load_workers", 1)
+    if method not in LOAD_METHODS:
+        logger.error("Unsupported load method in load(): %s", method)
+        raise ValueError(f"Unsupported load method: {method}")
+    if on_conflict not in ON_CONFLICT_MODES:
+        logger.error("Unsupported on_conflict mode in load(): %s", on_conflict)
+        raise ValueError(f"Unsupported on_conflict mode: {on_conflict}")
+    if batch_size <= 0:
+        raise ValueError(f"batch_size must be positive, got {batch_size}")
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    if method == "row" and workers > 1:
+        logger.warning("Row method does not support parallel loading; using 1 worker.")
+        workers = 1
+    return method, batch_size, on_conflict, workers
+
+
+def _resolve_bulk_load(bulk_load):
+    """
+    Merge a bulk-load profile over BULK_LOAD_DEFAULTS and validate it.
+    Returns None when no profile applies (bulk_load False or disabled).
+
+    Each option is independent:
+        session          - {setting: value} applied with set_config() on
+                           every connection, e.g. synchronous_commit: off
+        foreign_keys     - "keep"; "defer" checks the foreign keys once at
+                           commit; "drop" drops them and adds them back
+                           (one validating scan each) before commit
+        rebuild_indexes  - drop the targets' secondary indexes and
+                           recreate them once the rows are in
+        unlogged_staging - create the parallel staging tables UNLOGGED
+        analyze          - ANALYZE the targets after the commit
+    Everything except analyze runs inside the load transaction, so a
+    rollback restores the constraints and indexes. Checkpointed loads
+    commit midway and only use session and analyze.
+    """
+    if bulk_load is None:
+        bulk_load = CONFIG["defaults"].get("bulk_load")
+    if not bulk_load:
+        return None
+    unknown = set(bulk_load) - set(BULK_LOAD_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unsupported bulk_load option(s): {sorted(unknown)}")
+    bulk = {**BULK_LOAD_DEFAULTS, **bulk_load}
+    if not bulk["enabled"]:
+        return None
+    if bulk["foreign_keys"] not in FK_MODES:
+        raise ValueError(f"Unsupported bulk_load foreign_keys mode: {bulk['foreign_keys']}")
+    return bulk
+
+
+def _resolve_partitioning(partitioning):
+    """
+    Validate a partitioning setting ({"enabled": bool, "interval": "month"
+    | "year"}, or False) and return its interval, or None when
+    admission_data is not partitioned.
+
+    A partitioned admission_data (see src.schema.ensure_partitioned) is
+    written partition by partition, see _write_partitioned(). Partitioned
+    loads are serial, never checkpointed and write admission_data in
+    batches under the row method.
+    """
+    if partitioning is None:
+        partitioning = CONFIG["defaults"].get("partitioning")
+    if not partitioning or not partitioning.get("enabled", True):
+        return None
+    unknown = set(partitioning) - {"enabled", "interval"}
+    if unknown:
+        raise ValueError(f"Unsupported partitioning option(s): {sorted(unknown)}")
+    interval = partitioning.get("interval", "month")
+    if interval not in PARTITION_INTERVALS:
+        raise ValueError(f"Unsupported partition interval: {interval}")
+    return interval
 
-                if pd.isna(age):
-                    age = None
-                else:
-                    age = int(age)
-                    if age < 0 or age > 120:
-                        logger.warning(
-                            "Invalid age %s for person %s; setting age to NULL before insert",
-                            age,
-                            row.name,
-                        )
-                        age = None
 
-                person_id = int(row.person_id)
+def _apply_session_settings(cur, bulk):
+    if not bulk or not bulk["session"]:
+        return
+    for name, value in bulk["session"].items():
+        cur.execute("SELECT set_config(%s, %s, false)", (name, str(value)))
+    logger.info("Applied bulk-load session settings: %s", bulk["session"])
 
+
+def _secondary_indexes(cur):
+    """(name, definition) of target table indexes that back no constraint."""
+    cur.execute(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = ANY(%s) "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint)",
+        (list(TABLE_SPECS),),
+    )
+    return cur.fetchall()
+
+
+def _begin_bulk_load(cur, bulk):
+    """
+    Relax foreign keys and drop secondary indexes inside the load
+    transaction. Returns the dropped indexes for _finish_bulk_load().
+    """
+    if not bulk:
+        return []
+
+    if bulk["foreign_keys"] == "defer":
+        # The foreign keys are deferrable since schema migration 7.
+        cur.execute("SET CONSTRAINTS ALL DEFERRED")
+        logger.info("Foreign keys deferred to commit.")
+    elif bulk["foreign_keys"] == "drop":
+        for table, fks in FOREIGN_KEYS.items():
+            for column, _ in fks:
                 cur.execute(
-                    """
-                    INSERT INTO people (person_id, name, age, gender, blood_type)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (person_id) DO UPDATE
-                    SET name = EXCLUDED.name,
-                        age = EXCLUDED.age,
-                        gender = EXCLUDED.gender,
-                        blood_type = EXCLUDED.blood_type;
-                    """,
-                    (person_id, row.name, age, row.gender, row.blood_type),
+                    f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS "
+                    f"{foreign_key_name(table, column)}"
                 )
+        logger.info("Foreign keys dropped for the load.")
+
+    indexes = []
+    if bulk["rebuild_indexes"]:
+        indexes = _secondary_indexes(cur)
+        for name, _ in indexes:
+            cur.execute(f"DROP INDEX {name}")
+        logger.info("Dropped %d secondary index(es) for the load.", len(indexes))
+    return indexes
+
+
+def _finish_bulk_load(cur, bulk, indexes):
+    """Recreate what _begin_bulk_load() dropped, before the commit."""
+    if not bulk:
+        return
+    for name, definition in indexes:
+        with stage(f"load.index.{name}"):
+            cur.execute(definition)
+    if indexes:
+        logger.info("Rebuilt %d secondary index(es).", len(indexes))
+    if bulk["foreign_keys"] == "drop":
+        for table, fks in FOREIGN_KEYS.items():
+            for column, ref in fks:
+                name = foreign_key_name(table, column)
+                with stage(f"load.{name}"):
+                    cur.execute(
+                        f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                        f"FOREIGN KEY ({column}) REFERENCES {ref}({column}) "
+                        "DEFERRABLE INITIALLY IMMEDIATE"
+                    )
+        logger.info("Foreign keys recreated and validated.")
+
+
+def _analyze_tables(conn, cur, bulk):
+    if not bulk or not bulk["analyze"]:
+        return
+    with stage("load.analyze"):
+        for table in TABLE_SPECS:
+            cur.execute(f"ANALYZE {table}")
+        conn.commit()
+    logger.info("Analyzed %d table(s).", len(TABLE_SPECS))
+
+
+def _write_tables(cur, loaded_data, method, batch_size, on_conflict, skip=()):
+    """
+    Serial write of one set of transformed tables on a single cursor,
+    leaving out the tables in skip.
+    """
+    if method == "row":
+        for table in skip:
+            key = TABLE_SPECS[table][0]
+            loaded_data = {**loaded_data, key: loaded_data[key].iloc[:0]}
+        _insert_rows(cur, loaded_data)
+    elif on_conflict == "upsert":
+        _merge_tables(cur, loaded_data, method, batch_size, skip)
+    elif method == "copy":
+        _copy_tables(cur, loaded_data, skip)
+    else:
+        _insert_batches(cur, loaded_data, batch_size, skip)
+
+
+def _write_partitioned(cur, loaded_data, method, batch_size, on_conflict, interval, written):
+    """
+    Write one set of transformed tables into a partitioned admission_data.
+
+    The other tables are always upserted: truncating them would orphan the
+    admissions in partitions this load does not touch. admission_data is
+    written partition by partition; in replace mode each partition is
+    truncated the first time it is written (written collects the names of
+    the partitions written so far, across calls), and in upsert mode each
+    partition's rows are merged on PARTITION_KEY. Partitions the load does
+    not touch are left alone. Returns the partitions written by this call.
+    """
+    _write_tables(cur, loaded_data, method, batch_size, "upsert", skip=("admission_data",))
+
+    _, columns = TABLE_SPECS["admission_data"]
+    df = _prepare_frame("admission_data", loaded_data["admissions"])
+    if df.empty:
+        return []
+    starts = partition_starts(df["date_of_admission"], interval)
+    if starts.isna().any():
+        raise ValueError("admission_data rows without date_of_admission cannot be partitioned")
 
+    partitions = []
+    for start, part in df.groupby(starts, sort=True):
+        name, _ = partition_bounds(start, interval)
+        logger.debug("Writing %d row(s) into partition %s...", len(part), name)
+        with stage(f"load.{name}", rows_in=len(part)):
+            try:
+                cur.execute(create_partition_sql(start, interval))
+                if on_conflict == "replace":
+                    if name not in written:
+                        cur.execute(f"TRUNCATE {name}")
+                    if method == "copy":
+                        _copy_frame(cur, name, part, columns)
+                    else:
+                        _insert_frame_batches(cur, name, part, columns, batch_size)
+                else:
+                    _merge_partition(cur, name, part, columns, method, batch_size)
             except psycopg2.Error:
-                logger.exception("Failed inserting people row: %s", row)
+                logger.exception("Failed writing partition %s", name)
                 raise
+        written.add(name)
+        partitions.append(name)
+    logger.info("Wrote admission_data into %d partition(s).", len(partitions))
+    return partitions
+
+
+def _merge_partition(cur, partition, df, columns, method, batch_size):
+    """Stage one partition's rows and upsert them on the partitioned key."""
+    staging = _stage_name(partition)
+    col_list = ", ".join(columns)
+    cur.execute(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {col_list} FROM {partition} WITH NO DATA"
+    )
+    if method == "copy":
+        _copy_frame(cur, staging, df, columns)
+    else:
+        _insert_frame_batches(cur, staging, df, columns, batch_size)
+    cur.execute(
+        f"INSERT INTO {partition} ({col_list}) SELECT {col_list} FROM {staging} "
+        f"ORDER BY {', '.join(PARTITION_KEY)}"
+        + _upsert_clause(partition, columns, PARTITION_KEY)
+    )
+    cur.execute(f"DROP TABLE {staging}")
+
+
+def _insert_rows(cur, loaded_data):
+    people_df = loaded_data["people"]
+    hospitals_df = loaded_data["hospitals"]
+    doctors_df = loaded_data["doctors"]
+    conditions_df = loaded_data["conditions"]
+    insurance_df = loaded_data["insurance"]
+    test_results_df = loaded_data["test_results"]
+    admission_types_df = loaded_data["admission_types"]
+    admissions_df = loaded_data["admissions"]
+    rejects_df = loaded_data["rejects"]
+
+    logger.debug("Inserting into people...")
+    invalid_ages = 0
+    for row in people_df.itertuples(index=False):
+        try:
+            age = row.age
+
+            if pd.isna(age):
+                age = None
+            else:
+                age = int(age)
+                if age < 0 or age > 120:
+                    logger.debug(
+                        "Invalid age %s for person %s; setting age to NULL before insert",
+                        age,
+                        row.name,
+                    )
+                    invalid_ages += 1
+                    age = None
+
+            person_id = int(row.person_id)
 
-        logger.debug("Inserting into hospitals...")
-        for row in hospitals_df.itertuples(index=False):
             cur.execute(
                 """
-                INSERT INTO hospitals (hospital_id, hospital_name)
-                VALUES (%s, %s)
-                ON CONFLICT (hospital_id) DO UPDATE
-                SET hospital_name = EXCLUDED.hospital_name;
+                INSERT INTO people (person_id, name, age, gender, blood_type)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (person_id) DO UPDATE
+                SET name = EXCLUDED.name,
+                    age = EXCLUDED.age,
+                    gender = EXCLUDED.gender,
+                    blood_type = EXCLUDED.blood_type;
                 """,
-                (row.hospital_id, row.hospital_name)
+                (person_id, row.name, age, row.gender, row.blood_type),
             )
 
-        logger.debug("Inserting into doctors...")
-        for row in doctors_df.itertuples(index=False):
-            cur.execute(
-                """
-                INSERT INTO doctors (doctor_id, doctor_name, hospital_id)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (doctor_id) DO UPDATE
-                SET doctor_name = EXCLUDED.doctor_name,
-                    hospital_id = EXCLUDED.hospital_id;
-                """,
-                (row.doctor_id, row.doctor_name, row.hospital_id)
+        except psycopg2.Error:
+            logger.exception("Failed inserting people row: %s", row)
+            raise
+
+    if invalid_ages:
+        logger.warning(
+            "people: %d invalid age value(s) outside 0–120; set to NULL before insert",
+            invalid_ages,
+            extra={"rate_limit": True},
+        )
+
+    logger.debug("Inserting into hospitals...")
+    for row in hospitals_df.itertuples(index=False):
+        cur.execute(
+            """
+            INSERT INTO hospitals (hospital_id, hospital_name)
+            VALUES (%s, %s)
+            ON CONFLICT (hospital_id) DO UPDATE
+            SET hospital_name = EXCLUDED.hospital_name;
+            """,
+            (row.hospital_id, row.hospital_name)
+        )
+
+    logger.debug("Inserting into doctors...")
+    for row in doctors_df.itertuples(index=False):
+        cur.execute(
+            """
+            INSERT INTO doctors (doctor_id, doctor_name, hospital_id)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (doctor_id) DO UPDATE
+            SET doctor_name = EXCLUDED.doctor_name,
+                hospital_id = EXCLUDED.hospital_id;
+            """,
+            (row.doctor_id, row.doctor_name, row.hospital_id)
+        )
+
+    logger.debug("Inserting into conditions...")
+    for row in conditions_df.itertuples(index=False):
+        cur.execute(
+            """
+            INSERT INTO conditions (condition_id, condition_name)
+            VALUES (%s, %s)
+            ON CONFLICT (condition_id) DO UPDATE
+            SET condition_name = EXCLUDED.condition_name;
+            """,
+            (row.condition_id, row.condition_name)
+        )
+
+    logger.debug("Inserting into insurance...")
+    for row in insurance_df.itertuples(index=False):
+        cur.execute(
+            """
+            INSERT INTO insurance (insurance_id, provider_name)
+            VALUES (%s, %s)
+            ON CONFLICT (insurance_id) DO UPDATE
+            SET provider_name = EXCLUDED.provider_name;
+            """,
+            (row.insurance_id, row.provider_name)
+        )
+
+    logger.debug("Inserting into test_results...")
+    for row in test_results_df.itertuples(index=False):
+        cur.execute(
+            """
+            INSERT INTO test_results (test_result_id, result_label)
+            VALUES (%s, %s)
+            ON CONFLICT (test_result_id) DO UPDATE
+            SET result_label = EXCLUDED.result_label;
+            """,
+            (row.test_result_id, row.result_label)
+        )
+
+    logger.debug("Inserting into admission_types...")
+    for row in admission_types_df.itertuples(index=False):
+        cur.execute(
+            """
+            INSERT INTO admission_types (admission_type_id, type_name)
+            VALUES (%s, %s)
+            ON CONFLICT (admission_type_id) DO UPDATE
+            SET type_name = EXCLUDED.type_name;
+            """,
+            (row.admission_type_id, row.type_name)
+        )
+
+    logger.debug("Inserting into admission_data...")
+    for row in admissions_df.itertuples(index=False):
+        cur.execute(
+            """
+            INSERT INTO admission_data (
+                admission_id,
+                person_id,
+                doctor_id,
+                condition_id,
+                insurance_id,
+                admission_type_id,
+                test_result_id,
+                date_of_admission,
+                discharge_date,
+                billing_amount,
+                room_number,
+                medication
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (admission_id) DO UPDATE
+            SET person_id         = EXCLUDED.person_id,
+                doctor_id         = EXCLUDED.doctor_id,
+                condition_id      = EXCLUDED.condition_id,
+                insurance_id      = EXCLUDED.insurance_id,
+                admission_type_id = EXCLUDED.admission_type_id,
+                test_result_id    = EXCLUDED.test_result_id,
+                date_of_admission = EXCLUDED.date_of_admission,
+                discharge_date    = EXCLUDED.discharge_date,
+                billing_amount    = EXCLUDED.billing_amount,
+                room_number       = EXCLUDED.room_number,
+                medication        = EXCLUDED.medication;
+            """,
+            (
+                row.admission_id,
+                row.person_id,
+                row.doctor_id,
+                row.condition_id,
+                row.insurance_id,
+                row.admission_type_id,
+                row.test_result_id,
+                row.date_of_admission,
+                row.discharge_date,
+                row.billing_amount,
+                row.room_number,
+                row.medication,
             )
+        )
 
-        logger.debug("Inserting into conditions...")
-        for row in conditions_df.itertuples(index=False):
-            cur.execute(
-                """
-                INSERT INTO conditions (condition_id, condition_name)
-                VALUES (%s, %s)
-                ON CONFLICT (condition_id) DO UPDATE
-                SET condition_name = EXCLUDED.condition_name;
-                """,
-                (row.condition_id, row.condition_name)
+    logger.debug("Inserting into rejects...")
+    for row in rejects_df.itertuples(index=False):
+        cur.execute(
+            """
+            INSERT INTO rejects (
+                name,
+                age,
+                gender,
+                blood_type,
+                medical_condition,
+                date_of_admission,
+                doctor,
+                hospital,
+                insurance_provider,
+                billing_amount,
+                room_number,
+                admission_type,
+                discharge_date,
+                medication,
+                test_results,
+                missing_columns,
+                missing_bitmask,
+                reason
             )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+            """,
+            (
+                row.name,
+                None if pd.isna(row.age) else str(row.age),
+                row.gender,
+                row.blood_type,
+                row.medical_condition,
+                None if pd.isna(row.date_of_admission) else str(row.date_of_admission),
+                row.doctor,
+                row.hospital,
+                row.insurance_provider,
+                None if pd.isna(row.billing_amount) else str(row.billing_amount),
+                None if pd.isna(row.room_number) else str(row.room_number),
+                row.admission_type,
+                None if pd.isna(row.discharge_date) else str(row.discharge_date),
+                row.medication,
+                row.test_results,
+                row.missing_columns,
+                None if pd.isna(row.missing_bitmask) else int(row.missing_bitmask),
+                row.reason,
+            ),
+        )
 
-        logger.debug("Inserting into insurance...")
-        for row in insurance_df.itertuples(index=False):
-            cur.execute(
-                """
-                INSERT INTO insurance (insurance_id, provider_name)
-                VALUES (%s, %s)
-                ON CONFLICT (insurance_id) DO UPDATE
-                SET provider_name = EXCLUDED.provider_name;
-                """,
-                (row.insurance_id, row.provider_name)
+
+def _to_wire_frame(df, columns):
+    """
+    Coerce a DataFrame to the column types expected by the target table so
+    that to_csv() renders every value the way Postgres will parse it.
+    """
+    out = pd.DataFrame(index=df.index)
+    for col, kind in columns.items():
+        values = df[col]
+        if kind == "int":
+            out[col] = pd.to_numeric(values, errors="coerce").round().astype("Int64")
+        elif kind == "numeric":
+            out[col] = pd.to_numeric(values, errors="coerce").round(2)
+        elif kind == "timestamp":
+            out[col] = pd.to_datetime(values, errors="coerce")
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            out[col] = values.dt.strftime(COPY_DATE_FORMAT)
+        elif pd.api.types.is_numeric_dtype(values):
+            out[col] = values.astype(str).where(values.notna())
+        else:
+            out[col] = values
+    return out
+
+
+def _to_copy_csv(df, columns):
+    buf = io.StringIO()
+    _to_wire_frame(df, columns).to_csv(
+        buf,
+        header=False,
+        index=False,
+        na_rep=COPY_NULL,
+        date_format=COPY_DATE_FORMAT,
+    )
+    return buf.getvalue()
+
+
+class _CopyStream:
+    """
+    Read-only file-like object that serializes a DataFrame lazily, one slice
+    of COPY_CHUNK_ROWS rows at a time, as copy_expert() asks for more data.
+    """
+
+    def __init__(self, df, columns, chunk_rows=COPY_CHUNK_ROWS):
+        self._chunks = (
+            _to_copy_csv(df.iloc[start:start + chunk_rows], columns)
+            for start in range(0, len(df), chunk_rows)
+        )
+        self._current = io.StringIO()
+
+    def read(self, size=-1):
+        parts = []
+        while size < 0 or size > 0:
+            data = self._current.read(size)
+            if data:
+                parts.append(data)
+                if size > 0:
+                    size -= len(data)
+                continue
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._current = io.StringIO(chunk)
+        return "".join(parts)
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def _copy_sql(table, columns):
+    return (
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+        f"WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    )
+
+
+def _copy_frame(cur, table, df, columns):
+    cur.copy_expert(_copy_sql(table, columns), _CopyStream(df, columns))
+
+
+def _prepare_frame(table, df):
+    if table == "people":
+        age = pd.to_numeric(df["age"], errors="coerce")
+        invalid_age_mask = age.notna() & ((age < 0) | (age > 120))
+        invalid_count = int(invalid_age_mask.sum())
+        if invalid_count > 0:
+            logger.warning(
+                "people: %d invalid age value(s) outside 0–120; setting to NULL before insert",
+                invalid_count,
+                extra={"rate_limit": True},
             )
+            df = df.assign(age=age.mask(invalid_age_mask))
+    return df
 
-        logger.debug("Inserting into test_results...")
-        for row in test_results_df.itertuples(index=False):
-            cur.execute(
-                """
-                INSERT INTO test_results (test_result_id, result_label)
-                VALUES (%s, %s)
-                ON CONFLICT (test_result_id) DO UPDATE
-                SET result_label = EXCLUDED.result_label;
-                """,
-                (row.test_result_id, row.result_label)
+
+def _copy_tables(cur, loaded_data, skip=()):
+    for table, (key, columns) in TABLE_SPECS.items():
+        if table in skip:
+            continue
+        df = _prepare_frame(table, loaded_data[key])
+
+        logger.debug("Copying %d row(s) into %s...", len(df), table)
+        with stage(f"load.{table}", rows_in=len(df)):
+            try:
+                _copy_frame(cur, table, df, columns)
+            except psycopg2.Error:
+                logger.exception("Failed copying into %s", table)
+                raise
+
+
+def _upsert_clause(table, columns, conflict_cols=None):
+    """
+    ON CONFLICT clause that updates every non-key column, skipping rows whose
+    values are unchanged so that untouched rows are not rewritten.
+    conflict_cols defaults to the table's primary key in CONFLICT_KEYS.
+    """
+    conflict_cols = conflict_cols or (CONFLICT_KEYS[table],)
+    conflict_key = ", ".join(conflict_cols)
+    value_cols = [col for col in columns if col not in conflict_cols]
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in value_cols)
+    current = ", ".join(f"{table}.{col}" for col in value_cols)
+    incoming = ", ".join(f"EXCLUDED.{col}" for col in value_cols)
+    return (
+        f" ON CONFLICT ({conflict_key}) DO UPDATE SET {updates}"
+        f" WHERE ({current}) IS DISTINCT FROM ({incoming})"
+    )
+
+
+def _insert_values_sql(table, columns, n_rows, upsert_into=None):
+    """
+    Multi-row INSERT ... VALUES for n_rows rows. upsert_into names the table
+    whose primary key drives ON CONFLICT; pass None for a plain insert.
+    """
+    row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        + ", ".join([row_placeholder] * n_rows)
+    )
+    if upsert_into is not None and CONFLICT_KEYS[upsert_into] is not None:
+        sql += _upsert_clause(upsert_into, columns)
+    return sql
+
+
+def _to_params(df, columns):
+    """Flatten a DataFrame slice into one row-major parameter list."""
+    frame = _to_wire_frame(df, columns)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_numpy().ravel().tolist()
+
+
+def _insert_frame_batches(cur, table, df, columns, batch_size, upsert_into=None):
+    logger.debug(
+        "Inserting %d row(s) into %s in batches of %d...",
+        len(df),
+        table,
+        batch_size,
+    )
+    full_batch_sql = _insert_values_sql(table, columns, batch_size, upsert_into)
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        sql = (
+            full_batch_sql
+            if len(batch) == batch_size
+            else _insert_values_sql(table, columns, len(batch), upsert_into)
+        )
+        try:
+            cur.execute(sql, _to_params(batch, columns))
+        except psycopg2.Error:
+            logger.exception(
+                "Failed inserting %s batch starting at row %d", table, start
             )
+            raise
+
+
+def _insert_batches(cur, loaded_data, batch_size, skip=()):
+    for table, (key, columns) in TABLE_SPECS.items():
+        if table in skip:
+            continue
+        df = _prepare_frame(table, loaded_data[key])
+        with stage(f"load.{table}", rows_in=len(df)):
+            _insert_frame_batches(cur, table, df, columns, batch_size, upsert_into=table)
+
+
+def _stage_name(table, tag=None):
+    """
+    Staging table of `table`. Temp tables are private to their session; the
+    shared staging tables of a parallel load carry the load's tag so that
+    concurrent loads never touch each other's.
+    """
+    return f"_stage_{table}" if tag is None else f"_stage_{table}_{tag}"
+
+
+def _merge_sql(table, columns, tag=None):
+    """
+    Set-based merge of the staging table into its target. Keyed tables are
+    upserted on their primary key; rejects, which have no natural key, only
+    receive staged rows that are not already present. Keyed rows are
+    merged in key order, so concurrent loads upserting the same keys lock
+    them in the same order and cannot deadlock. The equality on
+    rejects.row_hash lets Postgres hash (or index) the anti-join; the
+    column-by-column match only settles hash collisions.
+    """
+    staging = _stage_name(table, tag)
+    col_list = ", ".join(columns)
+
+    if CONFLICT_KEYS[table] is None:
+        match = " AND ".join(
+            [f"t.row_hash = {reject_hash_sql('s.')}"]
+            + [f"t.{col} IS NOT DISTINCT FROM s.{col}" for col in columns]
+        )
+        return (
+            f"INSERT INTO {table} ({col_list}) "
+            f"SELECT {col_list} FROM {staging} s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {match})"
+        )
+
+    return (
+        f"INSERT INTO {table} ({col_list}) "
+        f"SELECT {col_list} FROM {staging} ORDER BY {CONFLICT_KEYS[table]}"
+        + _upsert_clause(table, columns)
+    )
+
+
+def _merge_tables(cur, loaded_data, method, batch_size, skip=()):
+    for table, (key, columns) in TABLE_SPECS.items():
+        if table in skip:
+            continue
+        df = _prepare_frame(table, loaded_data[key])
+        staging = _stage_name(table)
+
+        logger.debug("Staging %d row(s) for %s in %s...", len(df), table, staging)
+        with stage(f"load.{table}", rows_in=len(df)):
+            try:
+                cur.execute(
+                    f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                    f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+                )
+                if method == "copy":
+                    _copy_frame(cur, staging, df, columns)
+                else:
+                    _insert_frame_batches(cur, staging, df, columns, batch_size)
+                with stage(f"load.{table}.merge", rows_in=len(df)):
+                    cur.execute(_merge_sql(table, columns))
+                cur.execute(f"DROP TABLE {staging}")
+            except psycopg2.Error:
+                logger.exception("Failed merging staged rows into %s", table)
+                raise
+
+
+def _read_load_state(cur, load_id):
+    """{table: (rows_done, completed)} committed so far by load_id."""
+    cur.execute(
+        f"SELECT table_name, rows_done, completed FROM {LOAD_STATE_TABLE} WHERE load_id = %s",
+        (load_id,),
+    )
+    return {table: (rows_done, completed) for table, rows_done, completed in cur.fetchall()}
+
+
+def _save_checkpoint(cur, load_id, table, rows_done, completed=False):
+    cur.execute(
+        f"INSERT INTO {LOAD_STATE_TABLE} (load_id, table_name, rows_done, completed) "
+        "VALUES (%s, %s, %s, %s) "
+        "ON CONFLICT (load_id, table_name) DO UPDATE "
+        "SET rows_done = EXCLUDED.rows_done, completed = EXCLUDED.completed, updated_at = now()",
+        (load_id, table, int(rows_done), completed),
+    )
+
+
+def _batch_staged(table, method, on_conflict):
+    """
+    Whether a checkpointed upsert batch merges through a temp table: COPY
+    cannot upsert, and rejects have no key for INSERT ... ON CONFLICT.
+    """
+    return on_conflict == "upsert" and (method == "copy" or CONFLICT_KEYS[table] is None)
 
-        logger.debug("Inserting into admission_types...")
-        for row in admission_types_df.itertuples(index=False):
+
+def _write_batch(cur, table, batch, columns, method, batch_size, on_conflict):
+    """Write one batch into its target, directly or through its temp table."""
+    if _batch_staged(table, method, on_conflict):
+        staging = _stage_name(table)
+        cur.execute(f"TRUNCATE {staging}")
+        if method == "copy":
+            _copy_frame(cur, staging, batch, columns)
+        else:
+            _insert_frame_batches(cur, staging, batch, columns, batch_size)
+        cur.execute(_merge_sql(table, columns))
+    elif method == "batch":
+        _insert_frame_batches(cur, table, batch, columns, batch_size, upsert_into=table)
+    else:
+        _copy_frame(cur, table, batch, columns)
+
+
+def _load_checkpointed(conn, cur, loaded_data, method, batch_size, on_conflict, every, load_id):
+    """
+    Write every table batch by batch straight into its target, committing
+    the data and the table's watermark in etl_load_state every `every`
+    batches. After a failure only the batches since the last commit are
+    lost: loading the same load_id again (load() defaults it to a hash of
+    loaded_data, in row order, and on_conflict) skips the finished tables and continues
+    each table from its watermark. Replace mode truncates only when a load
+    starts fresh.
+
+    Returns the load_id, the number of checkpoints committed and the
+    watermarks resumed from.
+    """
+    state = _read_load_state(cur, load_id)
+    if state:
+        logger.info("Resuming load %s from its checkpoints: %s", load_id, state)
+    else:
+        if on_conflict == "replace":
+            logger.info("Truncating tables and resetting identities...")
+            cur.execute(TRUNCATE_SQL)
+        for table in TABLE_SPECS:
+            _save_checkpoint(cur, load_id, table, 0)
+        conn.commit()
+
+    checkpoints = 0
+    resumed = {}
+    for table, (key, columns) in TABLE_SPECS.items():
+        rows_done, completed = state.get(table, (0, False))
+        if completed:
+            logger.info("Skipping %s (completed by an earlier attempt)", table)
+            continue
+        if rows_done:
+            resumed[table] = rows_done
+
+        df = _prepare_frame(table, loaded_data[key])
+        if _batch_staged(table, method, on_conflict):
             cur.execute(
-                """
-                INSERT INTO admission_types (admission_type_id, type_name)
-                VALUES (%s, %s)
-                ON CONFLICT (admission_type_id) DO UPDATE
-                SET type_name = EXCLUDED.type_name;
-                """,
-                (row.admission_type_id, row.type_name)
+                f"CREATE TEMP TABLE IF NOT EXISTS {_stage_name(table)} AS "
+                f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
             )
 
-        logger.debug("Inserting into admission_data...")
-        for row in admissions_df.itertuples(index=False):
-            cur.execute(
-                """
-                INSERT INTO admission_data (
-                    admission_id,
-                    person_id,
-                    doctor_id,
-                    condition_id,
-                    insurance_id,
-                    admission_type_id,
-                    test_result_id,
-                    date_of_admission,
-                    discharge_date,
-                    billing_amount,
-                    room_number,
-                    medication
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (admission_id) DO UPDATE
-                SET person_id         = EXCLUDED.person_id,
-                    doctor_id         = EXCLUDED.doctor_id,
-                    condition_id      = EXCLUDED.condition_id,
-                    insurance_id      = EXCLUDED.insurance_id,
-                    admission_type_id = EXCLUDED.admission_type_id,
-                    test_result_id    = EXCLUDED.test_result_id,
-                    date_of_admission = EXCLUDED.date_of_admission,
-                    discharge_date    = EXCLUDED.discharge_date,
-                    billing_amount    = EXCLUDED.billing_amount,
-                    room_number       = EXCLUDED.room_number,
-                    medication        = EXCLUDED.medication;
-                """,
-                (
-                    row.admission_id,
-                    row.person_id,
-                    row.doctor_id,
-                    row.condition_id,
-                    row.insurance_id,
-                    row.admission_type_id,
-                    row.test_result_id,
-                    row.date_of_admission,
-                    row.discharge_date,
-                    row.billing_amount,
-                    row.room_number,
-                    row.medication,
+        logger.debug("Writing %s from row %d of %d...", table, rows_done, len(df))
+        committed = rows_done
+        with stage(f"load.{table}", rows_in=len(df) - rows_done):
+            try:
+                for n, start in enumerate(range(rows_done, len(df), batch_size), 1):
+                    batch = df.iloc[start:start + batch_size]
+                    _write_batch(cur, table, batch, columns, method, batch_size, on_conflict)
+                    end = start + len(batch)
+                    if n % every == 0 and end < len(df):
+                        _save_checkpoint(cur, load_id, table, end)
+                        conn.commit()
+                        committed = end
+                        checkpoints += 1
+                        logger.debug("Checkpoint: %s at row %d", table, end)
+                _save_checkpoint(cur, load_id, table, len(df), completed=True)
+                conn.commit()
+                checkpoints += 1
+            except psycopg2.Error:
+                logger.exception(
+                    "Failed loading %s; its first %d row(s) are committed", table, committed
                 )
+                raise
+
+    cur.execute(f"DELETE FROM {LOAD_STATE_TABLE} WHERE load_id = %s", (load_id,))
+    conn.commit()
+    return {"load_id": load_id, "checkpoints": checkpoints, "resumed": resumed}
+
+
+def _load_waves():
+    """Group the target tables into waves whose dependencies are all earlier."""
+    level = {}
+    for table in TABLE_SPECS:
+        deps = TABLE_DEPENDENCIES.get(table, ())
+        level[table] = 1 + max((level[dep] for dep in deps), default=-1)
+    return [
+        [table for table in TABLE_SPECS if level[table] == wave]
+        for wave in range(max(level.values()) + 1)
+    ]
+
+
+def _shard_frame(df, table, n_shards):
+    """
+    Split a frame into at most n_shards contiguous key ranges. Tables without
+    a primary key are split by row position instead.
+    """
+    if n_shards <= 1 or len(df) <= 1:
+        return [df]
+    key = CONFLICT_KEYS[table]
+    if key is None:
+        order = np.arange(len(df))
+    else:
+        order = np.argsort(df[key].to_numpy(), kind="stable")
+    return [df.iloc[positions] for positions in np.array_split(order, n_shards) if len(positions)]
+
+
+def _stage_shard(pool, table, df, columns, method, batch_size, tag):
+    staging = _stage_name(table, tag)
+    conn = pool.get()
+    try:
+        cur = _CountingCursor(conn.cursor())
+        try:
+            with stage(f"load.{table}.shard", rows_in=len(df)):
+                if method == "copy":
+                    _copy_frame(cur, staging, df, columns)
+                else:
+                    _insert_frame_batches(cur, staging, df, columns, batch_size)
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+        return cur.round_trips
+    finally:
+        pool.put(conn)
+
+
+def _stage_threaded(db_url, loaded_data, method, batch_size, workers, bulk, tag):
+    """
+    Fill the staging tables over a pool of psycopg2 worker connections
+    driven by a thread pool, wave by wave in foreign-key order. Returns the
+    number of round trips made by the worker connections.
+    """
+    pool = queue.Queue()
+    worker_conns = []
+    round_trips = 0
+
+    try:
+        logger.info("Opening %d worker connection(s)...", workers)
+        for _ in range(workers):
+            worker_conn = psycopg2.connect(db_url)
+            worker_conns.append(worker_conn)
+            pool.put(worker_conn)
+            if bulk and bulk["session"]:
+                worker_cur = worker_conn.cursor()
+                _apply_session_settings(worker_cur, bulk)
+                worker_cur.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for wave in _load_waves():
+                futures = []
+                for table, shard, columns in _wave_shards(wave, loaded_data, batch_size, workers):
+                    futures.append(
+                        executor.submit(
+                            _stage_shard, pool, table, shard, columns, method, batch_size, tag
+                        )
+                    )
+
+                done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in not_done:
+                    future.cancel()
+                wait(not_done)
+                for future in done:
+                    round_trips += future.result()
+                logger.info("Staged wave: %s", ", ".join(wave))
+
+        return round_trips
+
+    finally:
+        for worker_conn in worker_conns:
+            worker_conn.close()
+
+
+def _wave_shards(wave, loaded_data, batch_size, workers):
+    """(table, shard, columns) for every shard of the tables of one wave."""
+    for table in wave:
+        key, columns = TABLE_SPECS[table]
+        df = _prepare_frame(table, loaded_data[key])
+        n_shards = 1
+        if table in SHARDED_TABLES:
+            n_shards = min(workers, -(-len(df) // batch_size))
+        for shard in _shard_frame(df, table, n_shards):
+            logger.debug(
+                "Scheduling %d row(s) of %s on a worker connection",
+                len(shard),
+                table,
             )
+            yield table, shard, columns
+
+
+def _load_parallel(
+    conn,
+    cur,
+    db_url,
+    loaded_data,
+    method,
+    batch_size,
+    on_conflict,
+    workers,
+    bulk=None,
+    stager=_stage_threaded,
+):
+    """
+    Stage every table over worker connections with stager, then swap the
+    staged rows into the targets on the coordinating connection, so the
+    load still commits or rolls back as a unit. The sync backend stages
+    with the thread pool of _stage_threaded; the async one with
+    src.load_async.stage_tables, which also serves a single worker. Tables
+    are staged in foreign-key waves, admission_data and rejects in
+    key-range shards. The staging tables are named with a tag unique to
+    this load. The caller
+    commits the swap; on any failure the staging tables are dropped and the
+    targets are left untouched. The bulk-load profile applies to the worker
+    sessions, the staging tables and the swap.
+
+    Returns the number of round trips made by the worker connections.
+    """
+    tag = uuid.uuid4().hex[:12]
+    stages = [_stage_name(table, tag) for table in TABLE_SPECS]
 
-        logger.debug("Inserting into rejects...")
-        for row in rejects_df.itertuples(index=False):
+    try:
+        for table, (_, columns) in TABLE_SPECS.items():
+            staging = _stage_name(table, tag)
             cur.execute(
-                """
-                INSERT INTO rejects (
-                    name,
-                    age,
-                    gender,
-                    blood_type,
-                    medical_condition,
-                    date_of_admission,
-                    doctor,
-                    hospital,
-                    insurance_provider,
-                    billing_amount,
-                    room_number,
-                    admission_type,
-                    discharge_date,
-                    medication,
-                    test_results,
-                    missing_columns
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-                """,
-                (
-                    row.name,
-                    None if pd.isna(row.age) else str(row.age),
-                    row.gender,
-                    row.blood_type,
-                    row.medical_condition,
-                    None if pd.isna(row.date_of_admission) else str(row.date_of_admission),
-                    row.doctor,
-                    row.hospital,
-                    row.insurance_provider,
-                    None if pd.isna(row.billing_amount) else str(row.billing_amount),
-                    None if pd.isna(row.room_number) else str(row.room_number),
-                    row.admission_type,
-                    None if pd.isna(row.discharge_date) else str(row.discharge_date),
-                    row.medication,
-                    row.test_results,
-                    row.missing_columns,
-                ),
+                f"CREATE {'UNLOGGED ' if bulk and bulk['unlogged_staging'] else ''}TABLE {staging} AS "
+                f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
             )
-
         conn.commit()
-        logger.info("Load completed successfully.")
 
-    except psycopg2.Error:
-        logger.exception("Error in load() while working with the database.")
-        if 'conn' in locals():
-            conn.rollback()
-            logger.info("Transaction rolled back due to error.")
+        round_trips = stager(db_url, loaded_data, method, batch_size, workers, bulk, tag)
 
-    finally:
-        if 'cur' in locals() and cur:
-            cur.close()
-        if 'conn' in locals() and conn:
-            conn.close()
-        logger.info("Database connection closed. End of load().")
\ No newline at end of file
+        logger.info("Swapping staged data into target tables...")
+        if on_conflict == "replace":
+            cur.execute(TRUNCATE_SQL)
+        indexes = _begin_bulk_load(cur, bulk)
+        for table, (_, columns) in TABLE_SPECS.items():
+            with stage(f"load.{table}.swap"):
+                if on_conflict == "replace":
+                    col_list = ", ".join(columns)
+                    cur.execute(
+                        f"INSERT INTO {table} ({col_list}) "
+                        f"SELECT {col_list} FROM {_stage_name(table, tag)}"
+                    )
+                else:
+                    cur.execute(_merge_sql(table, columns, tag))
+        _finish_bulk_load(cur, bulk, indexes)
+        cur.execute(f"DROP TABLE {', '.join(stages)}")
+
+        return round_trips
+
+    except Exception:
+        logger.exception("Parallel load failed; dropping staging tables.")
+        conn.rollback()
+        try:
+            cur.execute(f"DROP TABLE IF EXISTS {', '.join(stages)}")
+            conn.commit()
+        except psycopg2.Error:
+            logger.exception("Failed to drop staging tables after parallel load error.")
+        raise
+
+
+class _CountingCursor:
+    """Cursor proxy that counts the statements sent to the server."""
+
+    def __init__(self, cur):
+        self._cur = cur
+        self.round_trips = 0
+
+    def execute(self, sql, params=None):
+        self.round_trips += 1
+        return self._cur.execute(sql, params)
+
+    def copy_expert(self, sql, file):
+        self.round_trips += 1
+        return self._cur.copy_expert(sql, file)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import psycopg2
+
+from src.load import (
+    COPY_CHUNK_ROWS,
+    COPY_NULL,
+    _load_waves,
+    _stage_name,
+    _to_copy_csv,
+    _to_params,
+    _wave_shards,
+)
+from src.logger import get_logger
+from src.profiling import record
+
+try:
+    import asyncpg
+except ImportError:  # optional: only the async backend needs it
+    asyncpg = None
+
+logger = get_logger(__name__)
+
+# Most parameters asyncpg can bind to one statement (the protocol counts
+# them in an int16); multi-row INSERTs are split to stay under it.
+MAX_QUERY_ARGS = 32767
+
+# Errors raised by the driver or the network while staging.
+DRIVER_ERRORS = (OSError,) if asyncpg is None else (asyncpg.PostgresError, asyncpg.InterfaceError, OSError)
+
+
+async def _connect(db_url):
+    if asyncpg is None:
+        raise ImportError("The async load backend requires asyncpg (pip install asyncpg).")
+    return await asyncpg.connect(db_url)
+
+
+def _insert_values_sql(table, columns, n_rows):
+    """Multi-row INSERT ... VALUES with asyncpg's numbered placeholders."""
+    width = len(columns)
+    rows = (
+        "(" + ", ".join(f"${row * width + col + 1}" for col in range(width)) + ")"
+        for row in range(n_rows)
+    )
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join(rows)
+
+
+async def _pipelined(items, serialize):
+    """
+    Yield serialize(item) for every item. Each item is serialized in a
+    thread as soon as the previous one is handed out, so the next payload
+    is being built while the caller is still sending the current one.
+    """
+    pending = None
+    for item in items:
+        upcoming = asyncio.ensure_future(asyncio.to_thread(serialize, item))
+        if pending is not None:
+            yield await pending
+        pending = upcoming
+    if pending is not None:
+        yield await pending
+
+
+def _slices(df, rows):
+    return [df.iloc[start:start + rows] for start in range(0, len(df), rows)]
+
+
+async def _stage_shard(pool, table, df, columns, method, batch_size, tag):
+    staging = _stage_name(table, tag)
+    conn = await pool.get()
+    round_trips = 0
+    started = time.perf_counter()
+    try:
+        async with conn.transaction():
+            if method == "copy":
+                source = _pipelined(
+                    _slices(df, COPY_CHUNK_ROWS),
+                    lambda part: _to_copy_csv(part, columns).encode("utf-8"),
+                )
+                await conn.copy_to_table(
+                    staging, source=source, columns=list(columns), format="csv", null=COPY_NULL
+                )
+                round_trips += 1
+            else:
+                rows = max(1, min(batch_size, MAX_QUERY_ARGS // len(columns)))
+                batches = _pipelined(
+                    _slices(df, rows),
+                    lambda batch: (
+                        _insert_values_sql(staging, columns, len(batch)),
+                        _to_params(batch, columns),
+                    ),
+                )
+                async for sql, params in batches:
+                    await conn.execute(sql, *params)
+                    round_trips += 1
+    finally:
+        pool.put_nowait(conn)
+    record(f"load.{table}.shard", time.perf_counter() - started, rows_out=len(df), backend="async")
+    return round_trips
+
+
+async def _stage_waves(db_url, loaded_data, method, batch_size, workers, bulk, tag):
+    pool = asyncio.Queue()
+    conns = []
+    round_trips = 0
+
+    try:
+        logger.info("Opening %d async worker connection(s)...", workers)
+        opened = await asyncio.gather(
+            *(_connect(db_url) for _ in range(workers)), return_exceptions=True
+        )
+        # Keep the connections that did open, so they are closed below
+        # when another one failed.
+        conns = [conn for conn in opened if not isinstance(conn, BaseException)]
+        for conn in opened:
+            if isinstance(conn, BaseException):
+                raise conn
+        for conn in conns:
+            if bulk and bulk["session"]:
+                for name, value in bulk["session"].items():
+                    await conn.execute("SELECT set_config($1, $2, false)", name, str(value))
+            pool.put_nowait(conn)
+
+        for wave in _load_waves():
+            tasks = [
+                asyncio.ensure_future(
+                    _stage_shard(pool, table, shard, columns, method, batch_size, tag)
+                )
+                for table, shard, columns in _wave_shards(wave, loaded_data, batch_size, workers)
+            ]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                round_trips += task.result()
+            logger.info("Staged wave: %s", ", ".join(wave))
+
+        return round_trips
+
+    finally:
+        await asyncio.gather(*(conn.close() for conn in conns), return_exceptions=True)
+
+
+def stage_tables(db_url, loaded_data, method, batch_size, workers, bulk, tag):
+    """
+    Fill the staging tables of a parallel load (see src.load._load_parallel)
+    over `workers` asyncpg connections driven by one event loop.
+
+    The tables of a wave, and the shards of admission_data and rejects,
+    are staged concurrently, each on its own connection and transaction.
+    Within a shard, the next COPY slice or INSERT batch is serialized in a
+    thread while the previous one is on the wire. An INSERT batch holds
+    batch_size rows, or fewer when that many would exceed MAX_QUERY_ARGS
+    parameters. Driver errors are
+    re-raised as psycopg2.Error, so load() rolls back and reports them as
+    it does for the other backends.
+
+    Returns the number of round trips made by the worker connections.
+    """
+    try:
+        return asyncio.run(_stage_waves(db_url, loaded_data, method, batch_size, workers, bulk, tag))
+    except DRIVER_ERRORS as exc:
+        raise psycopg2.Error(f"Async staging failed: {exc}") from exc
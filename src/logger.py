@@ -1,25 +1,155 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
+from src.config import CONFIG
+
 LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
 LOG_FILE = LOG_DIR / "etl.log"
 
-def get_logger(name: str = __name__) -> logging.Logger:
+LOG_SETTINGS = CONFIG.get("defaults", {}).get("logging") or {}
+# "text" or "json"; ETL_LOG_FORMAT overrides the config.
+LOG_FORMAT = os.environ.get("ETL_LOG_FORMAT", LOG_SETTINGS.get("format", "text"))
+# After a rate-limited warning is written, the same warnings (see
+# RepeatedWarningFilter) within this many seconds are only counted.
+WARNING_INTERVAL = float(LOG_SETTINGS.get("warning_interval", 10))
 
-    logger = logging.getLogger(name)
+# Attributes every LogRecord has; anything else came in through extra=.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+# extra= fields that only steer the logging itself (see
+# RepeatedWarningFilter); JsonFormatter leaves them out too.
+_UNLOGGED_ATTRS = _RECORD_ATTRS | {"rate_limit"}
 
-    if logger.handlers:
-        return logger
 
-    logger.setLevel(logging.INFO)
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra= fields alongside."""
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        entry.update(
+            {key: value for key, value in vars(record).items() if key not in _UNLOGGED_ATTRS}
+        )
+        return json.dumps(entry, default=str)
+
+
+class RepeatedWarningFilter(logging.Filter):
+    """
+    Rate-limit repeated warnings that opt in with extra={"rate_limit": key}.
+
+    Opted-in warnings are keyed by logger name, message template (not the
+    arguments) and that key, so a warning logged for every chunk is one key
+    per column (or whatever the caller passes); other warnings always pass.
+    The first occurrence passes; the rest within `interval` seconds are
+    counted and dropped. The next one to pass after the interval carries
+    the count as record.suppressed, and flush() emits one summary record
+    per key with a pending count, so a warning repeated a million times
+    costs two log records.
+    """
+
+    def __init__(self, interval: float = WARNING_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        limit = getattr(record, "rate_limit", None)
+        if record.levelno != logging.WARNING or limit is None or getattr(record, "summary", False):
+            return True
+        key = (record.name, record.msg, limit)
+        now = time.monotonic()
+        with self._lock:
+            last = self._seen.get(key)
+            if last is not None and now - last[0] < self.interval:
+                last[1] += 1
+                last[2] = record
+                return False
+            suppressed = last[1] if last is not None else 0
+            self._seen[key] = [now, 0, None]
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg} [{suppressed} similar warning(s) suppressed]"
+        return True
+
+    def flush(self) -> list[logging.LogRecord]:
+        """Summary records for warnings suppressed since they last passed."""
+        summaries = []
+        with self._lock:
+            for last in self._seen.values():
+                count, record = last[1], last[2]
+                if not count:
+                    continue
+                summary = logging.makeLogRecord(vars(record))
+                summary.msg = f"{count} more warning(s) like: {record.getMessage()}"
+                summary.args = None
+                summary.suppressed = count
+                summary.summary = True
+                summaries.append(summary)
+                last[1], last[2] = 0, None
+        return summaries
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Writes to whatever sys.stderr is at emit time, not at creation."""
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _DirectQueue:
+    """
+    Stand-in queue for forked worker processes: they exit without running
+    atexit hooks, so their records are handled synchronously instead.
+    """
+
+    def __init__(self, listener):
+        self.listener = listener
+
+    def put_nowait(self, record):
+        self.listener.handle(record)
+
+
+_queue = queue.Queue(-1)
+_queue_handler = None
+_listener = None
+_warning_filter = RepeatedWarningFilter()
+_setup_lock = threading.Lock()
+
+
+def _build_formatter() -> logging.Formatter:
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
-    console_handler = logging.StreamHandler()
+
+def _start_listener() -> logging.Handler:
+    global _queue_handler, _listener
+
+    formatter = _build_formatter()
+
+    console_handler = _StderrHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
 
@@ -27,9 +157,59 @@ def get_logger(name: str = __name__) -> logging.Logger:
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Formatting and I/O happen on the listener thread; callers only
+    # enqueue the record.
+    _listener = logging.handlers.QueueListener(
+        _queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+    _queue_handler = logging.handlers.QueueHandler(_queue)
+    _queue_handler.addFilter(_warning_filter)
+
+    atexit.register(shutdown)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_after_fork)
+    return _queue_handler
+
+
+def _after_fork() -> None:
+    # The listener thread does not survive fork; the handlers do.
+    if _queue_handler is not None:
+        _queue_handler.queue = _DirectQueue(_listener)
+
+
+def flush() -> None:
+    """Write out pending warning summaries and wait for the queue to drain."""
+    if _queue_handler is None:
+        return
+    for summary in _warning_filter.flush():
+        _queue_handler.handle(summary)
+    if isinstance(_queue_handler.queue, queue.Queue) and _listener._thread is not None:
+        _queue_handler.queue.join()
+
+
+def shutdown() -> None:
+    """flush() and stop the listener thread; registered with atexit."""
+    flush()
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def get_logger(name: str = __name__) -> logging.Logger:
+
+    logger = logging.getLogger(name)
+
+    if logger.handlers:
+        return logger
+
+    logger.setLevel(logging.INFO)
+
+    with _setup_lock:
+        handler = _queue_handler or _start_listener()
+
+    logger.addHandler(handler)
 
     logger.propagate = False
 
-    return logger
\ No newline at end of file
+    return logger
@@ -1,21 +1,197 @@
-from src.read import read
+import argparse
+import contextlib
+import time
+from pathlib import Path
+
+from src.read import read_chunks
 from src.transform import transform
-from src.load import load
+from src.load import load_stream
 from src.clean import clean
+from src.rules import compile_rules, load_datetime_formats, save_datetime_formats
+from src.cache import StageCache
 from src.config import CONFIG, get_source_config
+from src.keys import load_key_registry, new_key_state, save_key_registry
+from src.logger import get_logger
+from src.pipeline import run_sources
+from src.profiling import Profiler, activate, stage
+
+logger = get_logger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the healthcare ETL pipeline.")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="ignore and do not write the on-disk stage cache",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        dest="sources",
+        metavar="NAME",
+        help="ingest only this source (repeatable); default: every configured source",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every stage and write a JSON run report (see profiling in the config)",
+    )
+    parser.add_argument(
+        "--cprofile-dir",
+        metavar="DIR",
+        help="with --profile, also dump cProfile stats per top-level stage into DIR",
+    )
+    return parser.parse_args(argv)
+
+
+def _stream_source(source_cfg, key_state, db_url, formats_dir=None, **load_options):
+    formats_path = Path(formats_dir) / f"{source_cfg['name']}.json" if formats_dir else None
+    known_formats = load_datetime_formats(formats_path) if formats_path else {}
+    cleaning_plan = compile_rules(source_cfg.get("rules"), datetime_formats=known_formats)
+
+    def process(raw_chunk):
+        with stage("clean", rows_in=len(raw_chunk)):
+            cleaned = clean(
+                raw_chunk,
+                categorical=source_cfg.get("categorical", False),
+                rules=cleaning_plan,
+            )
+        with stage("transform", rows_in=len(cleaned)) as rec:
+            result = transform(cleaned, key_state=key_state)
+            rec["rows_out"] = len(result["admissions"])
+        return result
+
+    chunks = (
+        process(raw_chunk)
+        for raw_chunk in read_chunks(source_cfg, load_options.pop("chunksize"))
+    )
+    with stage(f"source:{source_cfg['name']}"):
+        stats = load_stream(chunks, db_url=db_url, **load_options)
+    if formats_path and cleaning_plan.datetime_formats != known_formats:
+        save_datetime_formats(cleaning_plan.datetime_formats, formats_path)
+    return stats
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
-def main():
     db_url = CONFIG["defaults"]["db_url"]
     batch_size = CONFIG["defaults"]["batch_size"]
     on_conflict = CONFIG["defaults"]["on_conflict"]
+    load_method = CONFIG["defaults"].get("load_method", "copy")
+    load_workers = CONFIG["defaults"].get("load_workers", 1)
+    chunksize = CONFIG["defaults"].get("chunksize")
+    key_registry = CONFIG["defaults"].get("key_registry")
+    source_workers = CONFIG["defaults"].get("source_workers", 1)
+    load_connections = CONFIG["defaults"].get("load_connections", 1)
+    datetime_formats = CONFIG["defaults"].get("datetime_formats")
+    profiling = dict(CONFIG["defaults"].get("profiling") or {})
+
+    if args.sources:
+        source_cfgs = [get_source_config(name) for name in args.sources]
+    else:
+        source_cfgs = CONFIG.get("sources", [])
+
+    # Sources share one key state so their surrogate ids never collide.
+    key_state = load_key_registry(key_registry) if key_registry else new_key_state()
+
+    profiler = None
+    if args.profile or profiling.get("enabled"):
+        profiler = Profiler(
+            memory=profiling.get("memory", True),
+            cprofile_dir=args.cprofile_dir or profiling.get("cprofile_dir"),
+        )
+
+    with contextlib.ExitStack() as run_stack:
+        if profiler is not None:
+            run_stack.enter_context(activate(profiler))
+            run_stack.enter_context(stage("run"))
+        reports = _ingest(
+            source_cfgs,
+            key_state,
+            db_url,
+            args,
+            chunksize=chunksize,
+            datetime_formats=datetime_formats,
+            source_workers=source_workers,
+            load_connections=load_connections,
+            method=load_method,
+            batch_size=batch_size,
+            on_conflict=on_conflict,
+            workers=load_workers,
+        )
+
+    if profiler is not None:
+        profiler.write_report(profiling.get("report", "logs/run_report.json"), sources=reports)
+
+    if key_registry and any(report["status"] == "ok" for report in reports):
+        save_key_registry(key_state, key_registry)
 
-    healthcare_cfg = get_source_config("healthcare_csv")
+    return reports
 
-    raw_df = read(healthcare_cfg)
-    cleaned_data = clean(raw_df)
-    transformed_data = transform(cleaned_data)
 
-    load(transformed_data, db_url=db_url)
+def _ingest(
+    source_cfgs,
+    key_state,
+    db_url,
+    args,
+    chunksize=None,
+    datetime_formats=None,
+    source_workers=1,
+    load_connections=1,
+    method="copy",
+    batch_size=5000,
+    on_conflict="upsert",
+    workers=1,
+):
+    if chunksize:
+        # Streaming keeps one chunk in memory at a time, so sources are
+        # streamed one after another rather than in parallel.
+        reports = []
+        for i, source_cfg in enumerate(source_cfgs):
+            started = time.perf_counter()
+            try:
+                stats = _stream_source(
+                    source_cfg,
+                    key_state,
+                    db_url,
+                    formats_dir=datetime_formats,
+                    chunksize=chunksize,
+                    method=method,
+                    batch_size=batch_size,
+                    on_conflict="upsert" if i > 0 else on_conflict,
+                )
+                error = None if stats is not None else "load_stream() rolled back"
+            except Exception as exc:
+                logger.exception("Source %s failed", source_cfg["name"])
+                error = repr(exc)
+            reports.append(
+                {
+                    "source": source_cfg["name"],
+                    "status": "ok" if error is None else "failed",
+                    "error": error,
+                    "seconds": {"total": round(time.perf_counter() - started, 3)},
+                }
+            )
+    else:
+        cache = StageCache.from_config(
+            CONFIG["defaults"].get("cache"), enabled=not args.no_cache
+        )
+        reports = run_sources(
+            source_cfgs,
+            db_url,
+            key_state,
+            cache=cache,
+            processes=source_workers,
+            load_connections=load_connections,
+            formats_dir=datetime_formats,
+            method=method,
+            batch_size=batch_size,
+            on_conflict=on_conflict,
+            workers=workers,
+        )
+    return reports
 
 
 if __name__ == "__main__":
@@ -0,0 +1,344 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import src.clean as clean_module
+import src.keys as keys_module
+import src.read as read_module
+import src.rules as rules_module
+import src.transform as transform_module
+from src.cache import StageCache, code_version, frames_fingerprint
+from src.clean import clean
+from src.load import load
+from src.logger import get_logger
+from src.profiling import deactivate, record, stage
+from src.read import read
+from src.rules import compile_rules, load_datetime_formats, save_datetime_formats
+from src.transform import transform
+
+logger = get_logger(__name__)
+
+TRANSFORM_OUTPUTS = (
+    "people",
+    "doctors",
+    "hospitals",
+    "conditions",
+    "insurance",
+    "admission_types",
+    "test_results",
+    "admissions",
+    "rejects",
+)
+KEY_PREFIX = "keys__"
+
+
+def _stage_keys(source_cfg: dict, cache: StageCache) -> tuple[str, str]:
+    fingerprint = cache.file_fingerprint(source_cfg["path"])
+    read_key = cache.key("read", fingerprint, source_cfg, code_version(read_module))
+    clean_key = cache.key("clean", read_key, code_version(clean_module, rules_module))
+    return read_key, clean_key
+
+
+def _transform_key(cache: StageCache, clean_key: str, key_state: dict | None) -> str:
+    registry = frames_fingerprint(key_state["ids"]) if key_state is not None else None
+    return cache.key(
+        "transform",
+        clean_key,
+        registry,
+        code_version(transform_module, keys_module),
+    )
+
+
+def _formats_path(formats_dir, source_cfg: dict):
+    return Path(formats_dir) / f"{source_cfg['name']}.json"
+
+
+def _read(source_cfg: dict) -> pd.DataFrame:
+    with stage("read") as rec:
+        raw_df = read(source_cfg)
+        rec["rows_out"] = len(raw_df)
+    return raw_df
+
+
+def _transform(cleaned_df: pd.DataFrame, key_state: dict | None) -> dict:
+    with stage("transform", rows_in=len(cleaned_df)) as rec:
+        result = transform(cleaned_df, key_state=key_state)
+        rec["rows_out"] = len(result["admissions"])
+    return result
+
+
+def clean_source(
+    source_cfg: dict,
+    cache: StageCache | None = None,
+    formats_dir=None,
+) -> pd.DataFrame:
+    """
+    Run read -> clean for one source, reusing the cached read and clean
+    outputs whose inputs have not changed.
+
+    With formats_dir, datetime formats detected for the source by an
+    earlier run are read from <formats_dir>/<source name>.json, and newly
+    detected ones are written back, so detection runs once per source.
+    """
+    if cache is not None and cache.enabled:
+        read_key, clean_key = _stage_keys(source_cfg, cache)
+        cached = cache.get(clean_key)
+        if cached is not None:
+            logger.info("Skipping read and clean for %s (cached)", source_cfg["path"])
+            return cached["cleaned"]
+
+        cached = cache.get(read_key)
+        if cached is not None:
+            logger.info("Skipping read for %s (cached)", source_cfg["path"])
+            raw_df = cached["raw"]
+        else:
+            raw_df = _read(source_cfg)
+            cache.put(read_key, {"raw": raw_df})
+    else:
+        raw_df = _read(source_cfg)
+
+    known_formats = load_datetime_formats(_formats_path(formats_dir, source_cfg)) if formats_dir else {}
+    plan = compile_rules(source_cfg.get("rules"), datetime_formats=known_formats)
+    with stage("clean", rows_in=len(raw_df)) as rec:
+        cleaned_df = clean(
+            raw_df,
+            categorical=source_cfg.get("categorical", False),
+            rules=plan,
+        )
+        rec["rows_out"] = len(cleaned_df)
+    if formats_dir and plan.datetime_formats != known_formats:
+        save_datetime_formats(plan.datetime_formats, _formats_path(formats_dir, source_cfg))
+
+    if cache is not None and cache.enabled:
+        cache.put(clean_key, {"cleaned": cleaned_df})
+    return cleaned_df
+
+
+def _restore_transform(cached: dict, key_state: dict | None) -> dict:
+    if key_state is not None:
+        key_state["ids"] = {
+            name[len(KEY_PREFIX):]: df
+            for name, df in cached.items()
+            if name.startswith(KEY_PREFIX)
+        }
+    return {name: cached[name] for name in TRANSFORM_OUTPUTS}
+
+
+def _transform_and_cache(cleaned_df, key_state, cache, transform_key) -> dict:
+    result = _transform(cleaned_df, key_state)
+
+    frames = dict(result)
+    if key_state is not None:
+        frames.update(
+            {f"{KEY_PREFIX}{name}": df for name, df in key_state["ids"].items()}
+        )
+    cache.put(transform_key, frames)
+
+    return result
+
+
+def transform_source(
+    source_cfg: dict,
+    cleaned_df: pd.DataFrame,
+    key_state: dict | None = None,
+    cache: StageCache | None = None,
+) -> dict:
+    """Run transform on an already cleaned source, reusing a cached output."""
+    if cache is None or not cache.enabled:
+        return _transform(cleaned_df, key_state)
+
+    _, clean_key = _stage_keys(source_cfg, cache)
+    transform_key = _transform_key(cache, clean_key, key_state)
+
+    cached = cache.get(transform_key)
+    if cached is not None:
+        logger.info("Skipping transform for %s (cached)", source_cfg["path"])
+        return _restore_transform(cached, key_state)
+
+    return _transform_and_cache(cleaned_df, key_state, cache, transform_key)
+
+
+def process_source(
+    source_cfg: dict,
+    key_state: dict | None = None,
+    cache: StageCache | None = None,
+    formats_dir=None,
+) -> dict:
+    """
+    Run read -> clean -> transform for one source and return the transform
+    output, reusing cached stage outputs whose inputs have not changed.
+
+    Stage keys are chained: read is keyed by the source file fingerprint,
+    the source config (including its cleaning rules) and read.py; clean by
+    the read key and the clean/rules code; transform by the clean key, the
+    key registry contents and the transform/keys code. The latest stage
+    with a hit is loaded and only the stages after it run. A transform hit
+    also restores the key registry ids it produced, admission ids included,
+    so the sources after it continue their sequences and the registry saved
+    after the load stays current. formats_dir is passed to clean_source().
+    """
+    if cache is None or not cache.enabled:
+        return _transform(clean_source(source_cfg, formats_dir=formats_dir), key_state)
+
+    _, clean_key = _stage_keys(source_cfg, cache)
+    transform_key = _transform_key(cache, clean_key, key_state)
+
+    cached = cache.get(transform_key)
+    if cached is not None:
+        logger.info("Skipping read, clean and transform for %s (cached)", source_cfg["path"])
+        return _restore_transform(cached, key_state)
+
+    return _transform_and_cache(
+        clean_source(source_cfg, cache, formats_dir),
+        key_state,
+        cache,
+        transform_key,
+    )
+
+
+def _timed_clean_source(source_cfg: dict, cache: StageCache | None, formats_dir) -> tuple[pd.DataFrame, float]:
+    started = time.perf_counter()
+    cleaned_df = clean_source(source_cfg, cache, formats_dir)
+    return cleaned_df, time.perf_counter() - started
+
+
+def _timed_load(name: str, loaded_data: dict, db_url: str, load_options: dict) -> tuple[dict | None, float]:
+    started = time.perf_counter()
+    with stage(f"load:{name}", rows_in=len(loaded_data["admissions"])):
+        stats = load(loaded_data, db_url=db_url, **load_options)
+    return stats, time.perf_counter() - started
+
+
+def run_sources(
+    source_cfgs: list[dict],
+    db_url: str,
+    key_state: dict,
+    cache: StageCache | None = None,
+    processes: int = 1,
+    load_connections: int = 1,
+    formats_dir=None,
+    **load_options,
+) -> list[dict]:
+    """
+    Ingest several sources and return one report entry per source.
+
+    read -> clean runs for every source in a pool of `processes` worker
+    processes (inline when processes <= 1).
+    transform then runs in the parent, in source order, because every
+    source draws its surrogate ids from the one shared key_state. Each
+    source's output holds every dimension row its admissions reference, so
+    its load does not depend on any other source's. Each transformed
+    source is handed to a pool of `load_connections` threads, so at most
+    that many load() calls (each holding its own connections;
+    load_workers of them with a parallel load) talk to the database at
+    once, while later sources are still being transformed.
+
+    A source that fails in any stage is logged and reported with its
+    error; the other sources carry on. With on_conflict="replace" only
+    the first source replaces the tables: its load finishes before any
+    other starts, and the rest are upserted on top of it.
+
+    formats_dir is passed to clean_source() for every source.
+
+    With a profiler active (see src.profiling), each source gets a
+    "source:<name>" stage holding its read, clean and transform stages and
+    each load a "load:<name>" stage. read -> clean in worker processes is
+    not profiled there; its wall time is recorded as a "read_clean" stage.
+
+    Report entries hold the source name, status ("ok" or "failed"), the
+    failed stage and error if any, seconds spent in read_clean, transform
+    and load, and the row counts load() reported.
+    """
+    reports = [
+        {"source": cfg["name"], "status": "ok", "stage": None, "error": None, "seconds": {}}
+        for cfg in source_cfgs
+    ]
+
+    def fail(report, stage, error):
+        report.update(status="failed", stage=stage, error=repr(error))
+        logger.error("Source %s failed during %s: %r", report["source"], stage, error)
+
+    replace_first = load_options.get("on_conflict") == "replace" and len(source_cfgs) > 1
+
+    if processes > 1 and len(source_cfgs) > 1:
+        clean_pool = ProcessPoolExecutor(
+            max_workers=min(processes, len(source_cfgs)),
+            initializer=deactivate,
+        )
+        clean_futures = [
+            clean_pool.submit(_timed_clean_source, cfg, cache, formats_dir) for cfg in source_cfgs
+        ]
+    else:
+        clean_pool = None
+        clean_futures = None
+
+    load_futures = []
+    with ThreadPoolExecutor(max_workers=load_connections) as load_pool:
+        try:
+            for i, (cfg, report) in enumerate(zip(source_cfgs, reports)):
+                with stage(f"source:{cfg['name']}"):
+                    try:
+                        if clean_futures is not None:
+                            cleaned_df, elapsed = clean_futures[i].result()
+                            record("read_clean", elapsed, rows_out=len(cleaned_df), process="worker")
+                        else:
+                            cleaned_df, elapsed = _timed_clean_source(cfg, cache, formats_dir)
+                        report["seconds"]["read_clean"] = round(elapsed, 3)
+                    except Exception as exc:
+                        fail(report, "read_clean", exc)
+                        continue
+
+                    started = time.perf_counter()
+                    # Every source emits all the dimension rows it references:
+                    # its load may run before, or alongside, the load of the
+                    # source that first saw them.
+                    key_state["emitted"] = {}
+                    try:
+                        loaded_data = transform_source(cfg, cleaned_df, key_state=key_state, cache=cache)
+                    except Exception as exc:
+                        fail(report, "transform", exc)
+                        continue
+                    finally:
+                        report["seconds"]["transform"] = round(time.perf_counter() - started, 3)
+                del cleaned_df
+
+                options = dict(load_options)
+                if replace_first and load_futures:
+                    options["on_conflict"] = "upsert"
+                future = load_pool.submit(_timed_load, cfg["name"], loaded_data, db_url, options)
+                load_futures.append((report, future))
+                if replace_first and len(load_futures) == 1:
+                    future.exception()
+        finally:
+            if clean_pool is not None:
+                clean_pool.shutdown(cancel_futures=True)
+
+        for report, future in load_futures:
+            try:
+                stats, elapsed = future.result()
+            except Exception as exc:
+                fail(report, "load", exc)
+                continue
+            report["seconds"]["load"] = round(elapsed, 3)
+            if stats is None:
+                fail(report, "load", RuntimeError("load() rolled back"))
+            else:
+                report["rows"] = stats["rows"]
+
+    for report in reports:
+        logger.info(
+            "Source %s: %s %s",
+            report["source"],
+            report["status"] if report["error"] is None else f"failed in {report['stage']}",
+            report["seconds"],
+        )
+    failed = [r["source"] for r in reports if r["status"] == "failed"]
+    logger.info(
+        "Ingested %d of %d source(s)%s",
+        len(reports) - len(failed),
+        len(reports),
+        f"; failed: {failed}" if failed else "",
+    )
+    return reports
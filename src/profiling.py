@@ -0,0 +1,208 @@
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.config import ROOT_DIR
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+_active = None
+_local = threading.local()
+
+
+class Profiler:
+    """
+    Collects a tree of stage measurements for one run.
+
+    Every stage records wall and CPU time, rows in/out, rows per second
+    and, with memory=True, the tracemalloc peak reached while it was open
+    (nested stages included). With cprofile_dir set, each top-level stage
+    also runs under cProfile and its stats are dumped to
+    <cprofile_dir>/<stage>.pstats for pstats/snakeviz.
+
+    Activate it with profiling.activate(); code everywhere else only calls
+    profiling.stage(), which does nothing while no profiler is active.
+    """
+
+    def __init__(self, memory: bool = True, cprofile_dir=None):
+        self.memory = memory
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+        if self.cprofile_dir is not None and not self.cprofile_dir.is_absolute():
+            self.cprofile_dir = ROOT_DIR / self.cprofile_dir
+        self.started_at = datetime.now(timezone.utc)
+        self.stages = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._main_stack = None
+        self._open = []
+        self._owns_tracemalloc = False
+
+    def _stack(self) -> list:
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        return stack
+
+    def _update_peaks(self) -> None:
+        # The tracemalloc peak is process-wide and reset whenever a stage
+        # opens, so fold it into every open stage (on any thread) first.
+        peak = tracemalloc.get_traced_memory()[1]
+        for record in self._open:
+            record["_peak"] = max(record["_peak"], peak)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows_in: int | None = None):
+        stack = self._stack()
+        if self._main_stack is None:
+            self._main_stack = stack
+        # A worker thread's first stage hangs under the outermost stage the
+        # main thread has open at that moment.
+        parents = stack if stack else self._main_stack[:1]
+
+        record = {
+            "name": name,
+            "rows_in": rows_in,
+            "rows_out": None,
+            "children": [],
+            "_peak": 0,
+        }
+        with self._lock:
+            (parents[-1]["children"] if parents else self.stages).append(record)
+            if self.memory:
+                self._update_peaks()
+                tracemalloc.reset_peak()
+            self._open.append(record)
+
+        profile = None
+        is_main = threading.current_thread() is threading.main_thread()
+        if self.cprofile_dir is not None and not stack and is_main:
+            profile = cProfile.Profile()
+
+        stack.append(record)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record["wall_s"] = round(time.perf_counter() - wall, 6)
+            record["cpu_s"] = round(time.process_time() - cpu, 6)
+            stack.pop()
+            with self._lock:
+                if self.memory:
+                    self._update_peaks()
+                self._open.remove(record)
+            if self.memory:
+                record["peak_mib"] = round(record["_peak"] / 2**20, 3)
+            rows = record["rows_out"] if record["rows_out"] is not None else record["rows_in"]
+            if rows is not None and record["wall_s"] > 0:
+                record["rows_per_sec"] = round(rows / record["wall_s"], 1)
+            if profile is not None:
+                self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+                target = self.cprofile_dir / f"{name.replace('/', '_')}.pstats"
+                profile.dump_stats(target)
+                logger.info("Wrote cProfile stats for stage %s to %s", name, target)
+
+    def record(self, name: str, wall_s: float, rows_out: int | None = None, **fields) -> None:
+        """Add a stage that was measured elsewhere, e.g. in a worker process."""
+        stack = self._stack()
+        parents = stack if stack else (self._main_stack or [])[:1]
+        entry = {"name": name, "rows_in": None, "rows_out": rows_out, "children": [], "_peak": 0}
+        entry["wall_s"] = round(wall_s, 6)
+        if rows_out is not None and wall_s > 0:
+            entry["rows_per_sec"] = round(rows_out / wall_s, 1)
+        entry.update(fields)
+        with self._lock:
+            (parents[-1]["children"] if parents else self.stages).append(entry)
+
+    def start(self) -> None:
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+    def stop(self) -> None:
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def report(self) -> dict:
+        def clean(record):
+            out = {k: v for k, v in record.items() if not k.startswith("_") and k != "children"}
+            if record["children"]:
+                out["children"] = [clean(child) for child in record["children"]]
+            return out
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "wall_s": round(time.perf_counter() - self._started, 6),
+            "memory": self.memory,
+            "stages": [clean(record) for record in self.stages],
+        }
+
+    def write_report(self, path, **extra) -> Path:
+        """Write report() plus any extra top-level fields as JSON."""
+        path = Path(path)
+        if not path.is_absolute():
+            path = ROOT_DIR / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.tmp")
+        report = {**self.report(), **extra}
+        tmp.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+        logger.info("Wrote run report to %s", path)
+        return path
+
+
+@contextlib.contextmanager
+def activate(profiler: Profiler):
+    """Make profiler the target of profiling.stage() for the duration."""
+    global _active
+    previous = _active
+    _active = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active = previous
+
+
+@contextlib.contextmanager
+def stage(name: str, rows_in: int | None = None):
+    """
+    Measure a block as a stage of the active profiler. Yields the stage
+    record (set record["rows_out"] inside the block), or a throwaway dict
+    when no profiler is active.
+    """
+    if _active is None:
+        yield {}
+        return
+    with _active.stage(name, rows_in=rows_in) as record:
+        yield record
+
+
+def deactivate() -> None:
+    """
+    Drop the active profiler, e.g. in a forked worker process, whose
+    stages would otherwise go to a copy of the parent's profiler.
+    """
+    global _active
+    if _active is not None:
+        _active.stop()
+    _active = None
+
+
+def record(name: str, wall_s: float, rows_out: int | None = None, **fields) -> None:
+    """Profiler.record() on the active profiler, if any."""
+    if _active is not None:
+        _active.record(name, wall_s, rows_out=rows_out, **fields)
@@ -1,14 +1,171 @@
+import codecs
+import contextlib
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
 import pandas as pd
 
 from src.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Compressed inputs are recognized by extension first, then by magic bytes.
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+    ".bz2": "bz2",
+}
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"BZh", "bz2"),
+)
+
+# Bytes read per step by the incremental JSON array parser.
+JSON_READ_BLOCK_SIZE = 1024 * 1024
+
+# Arrow types a source schema may declare for a column.
+SCHEMA_TYPES = ("string", "int64", "float64", "bool", "timestamp", "category")
+
+
+def detect_compression(filepath: str) -> str | None:
+    """Codec name ("gzip", "zstd", "bz2") of a compressed file, else None."""
+    suffix = Path(filepath).suffix.lower()
+    if suffix in COMPRESSION_EXTENSIONS:
+        return COMPRESSION_EXTENSIONS[suffix]
+
+    with open(filepath, "rb") as f:
+        head = f.read(4)
+    for magic, codec in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+@contextlib.contextmanager
+def _open_input(filepath: str, memory_map: bool = False):
+    """
+    Yield something the readers can parse without copying the whole file
+    into Python memory first: a streaming decompressor (pyarrow's codecs,
+    which include zstd) for compressed files, a memory map for uncompressed
+    files when memory_map is set (Arrow readers), else the path itself
+    (pandas readers memory-map it on their own).
+    """
+    codec = detect_compression(filepath)
+    if codec is not None:
+        import pyarrow as pa
+
+        logger.info("Decompressing %s (%s) while reading", filepath, codec)
+        with pa.input_stream(filepath, compression=codec) as stream:
+            yield stream
+    elif memory_map:
+        import pyarrow as pa
+
+        with pa.memory_map(filepath) as mapped:
+            yield mapped
+    else:
+        yield filepath
+
+
+def _arrow_type(pa, col: str, kind: str):
+    if kind == "string":
+        return pa.string()
+    if kind == "int64":
+        return pa.int64()
+    if kind == "float64":
+        return pa.float64()
+    if kind == "bool":
+        return pa.bool_()
+    if kind == "timestamp":
+        return pa.timestamp("ns")
+    if kind == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    raise ValueError(f"Unsupported schema type for column {col!r}: {kind} (expected one of {SCHEMA_TYPES})")
+
+
+def _arrow_csv_options(schema: dict):
+    """
+    Build pyarrow CSV read/convert options from a source schema:
+
+        schema:
+          null_values: ["", "NA", "null"]   # optional, Arrow defaults otherwise
+          block_size: 16777216              # optional, bytes per parse block
+          columns:
+            Name: string
+            Date of Admission: {type: timestamp, format: "%Y-%m-%d"}
+
+    Only the declared columns are parsed (in declared order); every other
+    column in the file is skipped by the parser. Values that do not fit a
+    declared type fail the read rather than being coerced.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    columns = schema.get("columns") or {}
+    if not columns:
+        raise ValueError("A CSV schema must declare at least one column")
+
+    column_types = {}
+    timestamp_formats = []
+    for col, spec in columns.items():
+        if isinstance(spec, str):
+            spec = {"type": spec}
+        column_types[col] = _arrow_type(pa, col, spec.get("type", "string"))
+        fmt = spec.get("format")
+        if fmt is not None and fmt not in timestamp_formats:
+            timestamp_formats.append(fmt)
 
-def read_csv(filepath: str) -> pd.DataFrame:
+    convert_kwargs = {
+        "include_columns": list(columns),
+        "column_types": column_types,
+        "strings_can_be_null": True,
+    }
+    if schema.get("null_values") is not None:
+        convert_kwargs["null_values"] = list(schema["null_values"])
+    if timestamp_formats:
+        convert_kwargs["timestamp_parsers"] = timestamp_formats
+
+    read_kwargs = {"use_threads": True}
+    if schema.get("block_size"):
+        read_kwargs["block_size"] = int(schema["block_size"])
+
+    return (
+        pa_csv,
+        pa_csv.ReadOptions(**read_kwargs),
+        pa_csv.ConvertOptions(**convert_kwargs),
+    )
+
+
+def _read_csv_arrow(source, schema: dict) -> pd.DataFrame:
+    pa_csv, read_options, convert_options = _arrow_csv_options(schema)
+    table = pa_csv.read_csv(
+        source,
+        read_options=read_options,
+        convert_options=convert_options,
+    )
+    return table.to_pandas()
+
+
+def read_csv(filepath: str, schema: dict | None = None) -> pd.DataFrame:
+    """
+    Read a whole CSV file. With a schema (see _arrow_csv_options) the file
+    is parsed by pyarrow's multi-threaded reader with the declared types
+    and only the declared columns; without one pandas infers every column.
+    gzip/zstd/bz2 files are decompressed as they are parsed and plain files
+    are memory-mapped.
+    """
     logger.info("Reading CSV file from %s", filepath)
     try:
-        df = pd.read_csv(filepath)
+        with _open_input(filepath, memory_map=bool(schema)) as source:
+            if schema:
+                df = _read_csv_arrow(source, schema)
+            elif source is filepath:
+                df = pd.read_csv(source, memory_map=True)
+            else:
+                df = pd.read_csv(source)
         logger.info("Successfully read CSV: %d rows x %d columns", df.shape[0], df.shape[1])
         return df
     except Exception:
@@ -16,10 +173,26 @@ def read_csv(filepath: str) -> pd.DataFrame:
         raise
 
 
-def read_json(filepath: str) -> pd.DataFrame:
+def _apply_dtypes(df: pd.DataFrame, dtypes: dict | None) -> pd.DataFrame:
+    """
+    Give a frame exactly the declared columns, in declared order and with
+    the declared pandas dtypes, so every batch of a source has one schema.
+    Declared columns missing from the input come out all-NA.
+    """
+    if not dtypes:
+        return df
+    return df.reindex(columns=list(dtypes)).astype(dtypes)
+
+
+def read_json(filepath: str, lines: bool = False, dtypes: dict | None = None) -> pd.DataFrame:
     logger.info("Reading JSON file from %s", filepath)
     try:
-        df = pd.read_json(filepath)
+        with _open_input(filepath) as source:
+            if dtypes:
+                df = pd.read_json(source, lines=lines, dtype=False, convert_dates=False)
+            else:
+                df = pd.read_json(source, lines=lines)
+        df = _apply_dtypes(df, dtypes)
         logger.info("Successfully read JSON: %d rows x %d columns", df.shape[0], df.shape[1])
         return df
     except Exception:
@@ -31,8 +204,10 @@ def read(source_cfg: dict) -> pd.DataFrame:
     """
     source_cfg example:
     {
-        "type": "csv" | "json",
-        "path": "/path/to/file"
+        "type": "csv" | "json" | "jsonl",
+        "path": "/path/to/file",
+        "schema": {...},  # optional, csv only; see _arrow_csv_options
+        "dtypes": {...}   # optional, json/jsonl only; column -> pandas dtype
     }
     """
     source_type = source_cfg["type"]
@@ -41,9 +216,233 @@ def read(source_cfg: dict) -> pd.DataFrame:
     logger.info("Starting read() for type=%s, path=%s", source_type, path)
 
     if source_type == "csv":
-        return read_csv(path)
-    elif source_type == "json":
-        return read_json(path)
+        return read_csv(path, schema=source_cfg.get("schema"))
+    elif source_type in ("json", "jsonl"):
+        return read_json(
+            path,
+            lines=source_type == "jsonl" or source_cfg.get("lines", False),
+            dtypes=source_cfg.get("dtypes"),
+        )
     else:
         logger.error("Unsupported source type in read(): %s", source_type)
-        raise ValueError(f"Unsupported source type: {source_type}")
\ No newline at end of file
+        raise ValueError(f"Unsupported source type: {source_type}")
+
+
+def _read_csv_arrow_chunks(source, schema: dict, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream Arrow record batches and regroup them into frames of exactly
+    chunksize rows (the last may be shorter), indexed like pandas chunks.
+    """
+    import pyarrow as pa
+
+    pa_csv, read_options, convert_options = _arrow_csv_options(schema)
+    pending = []
+    pending_rows = 0
+    start = 0
+
+    def emit(table):
+        nonlocal start
+        df = table.to_pandas()
+        df.index = pd.RangeIndex(start, start + len(df))
+        start += len(df)
+        return df
+
+    with pa_csv.open_csv(
+        source,
+        read_options=read_options,
+        convert_options=convert_options,
+    ) as reader:
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows < chunksize:
+                continue
+            table = pa.Table.from_batches(pending)
+            offset = 0
+            while pending_rows - offset >= chunksize:
+                yield emit(table.slice(offset, chunksize))
+                offset += chunksize
+            pending = table.slice(offset).to_batches()
+            pending_rows -= offset
+
+    if pending_rows:
+        yield emit(pa.Table.from_batches(pending))
+
+
+def read_csv_chunks(filepath: str, chunksize: int, schema: dict | None = None) -> Iterator[pd.DataFrame]:
+    logger.info("Reading CSV file from %s in chunks of %d rows", filepath, chunksize)
+    try:
+        with contextlib.ExitStack() as stack:
+            source = stack.enter_context(_open_input(filepath, memory_map=bool(schema)))
+            if schema:
+                reader = _read_csv_arrow_chunks(source, schema, chunksize)
+            elif source is filepath:
+                reader = pd.read_csv(source, chunksize=chunksize, memory_map=True)
+            else:
+                reader = pd.read_csv(source, chunksize=chunksize)
+            stack.enter_context(contextlib.closing(reader))
+            for i, chunk in enumerate(reader):
+                logger.info(
+                    "Read CSV chunk %d: %d rows x %d columns",
+                    i,
+                    chunk.shape[0],
+                    chunk.shape[1],
+                )
+                yield chunk
+    except Exception:
+        logger.exception("Failed to read CSV file from %s", filepath)
+        raise
+
+
+def read_json_chunks(filepath: str, chunksize: int, dtypes: dict | None = None) -> Iterator[pd.DataFrame]:
+    """JSON Lines input: one record per line, read chunksize lines at a time."""
+    logger.info("Reading JSON lines from %s in chunks of %d rows", filepath, chunksize)
+    options = {"dtype": False, "convert_dates": False} if dtypes else {}
+    try:
+        with _open_input(filepath) as source, pd.read_json(
+            source, lines=True, chunksize=chunksize, **options
+        ) as reader:
+            for i, chunk in enumerate(reader):
+                chunk = _apply_dtypes(chunk, dtypes)
+                logger.info(
+                    "Read JSON chunk %d: %d rows x %d columns",
+                    i,
+                    chunk.shape[0],
+                    chunk.shape[1],
+                )
+                yield chunk
+    except Exception:
+        logger.exception("Failed to read JSON file from %s", filepath)
+        raise
+
+
+def iter_json_array(fileobj, batch_size: int) -> Iterator[list[dict]]:
+    """
+    Incrementally parse a binary file holding one top-level JSON array of
+    objects and yield lists of at most batch_size records. Only one read
+    block plus the current batch is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+    batch = []
+
+    def fill():
+        nonlocal buf, pos, eof
+        block = fileobj.read(JSON_READ_BLOCK_SIZE)
+        if not block:
+            eof = True
+        buf = buf[pos:] + utf8.decode(block, final=eof)
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("Chunked JSON reads require a top-level JSON array of records")
+    pos += 1
+
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of input inside JSON array")
+        if buf[pos] == "]":
+            break
+        if started:
+            if buf[pos] != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {buf[pos]!r}")
+            pos += 1
+            skip_whitespace()
+
+        # An object only decodes once its closing brace is in the buffer,
+        # so a failed decode with more input left just means "read more".
+        while True:
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+        if not isinstance(record, dict):
+            raise ValueError(f"JSON array elements must be objects, got {type(record).__name__}")
+
+        pos = end
+        started = True
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def read_json_array_chunks(filepath: str, chunksize: int, dtypes: dict | None = None) -> Iterator[pd.DataFrame]:
+    """A top-level JSON array of records, parsed chunksize records at a time."""
+    logger.info("Reading JSON array from %s in chunks of %d records", filepath, chunksize)
+    try:
+        with _open_input(filepath) as source, contextlib.ExitStack() as stack:
+            if isinstance(source, str):
+                source = stack.enter_context(open(source, "rb"))
+            start = 0
+            for i, records in enumerate(iter_json_array(source, chunksize)):
+                chunk = _apply_dtypes(
+                    pd.DataFrame.from_records(records, columns=list(dtypes) if dtypes else None),
+                    dtypes,
+                )
+                chunk.index = pd.RangeIndex(start, start + len(chunk))
+                start += len(chunk)
+                logger.info(
+                    "Read JSON chunk %d: %d rows x %d columns",
+                    i,
+                    chunk.shape[0],
+                    chunk.shape[1],
+                )
+                yield chunk
+    except Exception:
+        logger.exception("Failed to read JSON file from %s", filepath)
+        raise
+
+
+def read_chunks(source_cfg: dict, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Streaming counterpart of read(): yields DataFrames of at most chunksize
+    rows so that large files never need to be held in memory at once.
+
+    jsonl sources (or json with "lines": true) are read line by line; a
+    plain json source must hold a top-level array of records, which is
+    parsed incrementally into batches of chunksize records.
+    """
+    source_type = source_cfg["type"]
+    path = source_cfg["path"]
+
+    logger.info(
+        "Starting read_chunks() for type=%s, path=%s, chunksize=%d",
+        source_type,
+        path,
+        chunksize,
+    )
+
+    if chunksize <= 0:
+        raise ValueError(f"chunksize must be positive, got {chunksize}")
+
+    if source_type == "csv":
+        return read_csv_chunks(path, chunksize, schema=source_cfg.get("schema"))
+    elif source_type == "jsonl" or (source_type == "json" and source_cfg.get("lines", False)):
+        return read_json_chunks(path, chunksize, dtypes=source_cfg.get("dtypes"))
+    elif source_type == "json":
+        return read_json_array_chunks(path, chunksize, dtypes=source_cfg.get("dtypes"))
+    else:
+        logger.error("Unsupported source type in read_chunks(): %s", source_type)
+        raise ValueError(f"Unsupported source type: {source_type}")
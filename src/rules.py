@@ -0,0 +1,474 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import ROOT_DIR
+from src.logger import get_logger
+from src.profiling import stage
+
+logger = get_logger(__name__)
+
+# Rules applied when a source does not declare its own. They reproduce the
+# cleaning the healthcare dataset has always had.
+DEFAULT_RULES = {
+    "columns": {
+        "name": {"type": "text", "case": "title"},
+        "gender": {"type": "text", "case": "upper", "category": True},
+        "blood_type": {"type": "text", "case": "upper", "category": True},
+        "doctor": {"type": "text", "case": "title"},
+        "hospital": {"type": "text", "case": "title"},
+        "insurance_provider": {"type": "text", "case": "title", "category": True},
+        "medical_condition": {"type": "text", "case": "title", "category": True},
+        "test_results": {
+            "type": "text",
+            "case": "lower",
+            "allowed": ["inconclusive", "normal", "abnormal"],
+            "category": True,
+        },
+        "admission_type": {"type": "text", "case": "lower", "category": True},
+        "age": {"type": "numeric", "min": 0, "max": 120, "dtype": "int"},
+        "billing_amount": {"type": "numeric", "round": 2},
+        "room_number": {"type": "numeric", "min": 0, "max": 100000, "dtype": "int"},
+        "date_of_admission": {"type": "datetime"},
+        "discharge_date": {"type": "datetime"},
+    }
+}
+
+RULE_OPTIONS = {
+    "text": {"type", "case", "allowed", "category"},
+    "numeric": {"type", "min", "max", "round", "dtype"},
+    "datetime": {"type", "format", "formats", "fallback_formats"},
+}
+
+# Formats tried when a datetime column declares none, and by default for
+# values its formats leave unparsed. Month-first precedes day-first.
+DATETIME_CANDIDATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+    "%m-%d-%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%Y%m%d",
+    "%d %b %Y",
+    "%b %d, %Y",
+    "%d %B %Y",
+    "%B %d, %Y",
+]
+DATETIME_SAMPLE_SIZE = 1000
+DATETIME_MIN_SHARE = 0.01
+
+# Stripped from numeric text before parsing: whitespace, thousands
+# separators and currency symbols.
+NUMERIC_JUNK = r"[\s,$€£¥]"
+NUMERIC_DTYPES = ("int", "float32", "float64")
+INT_DTYPES = ("Int8", "Int16", "Int32", "Int64")
+
+CASES = {
+    "upper": lambda s: s.str.upper(),
+    "lower": lambda s: s.str.lower(),
+    "title": lambda s: s.str.title(),
+}
+
+
+def _normalize_categories(series: pd.Series, fn) -> pd.Series:
+    """
+    Apply a string transform to the categories of a categorical Series
+    instead of to every row. Categories that normalize to the same value
+    are merged and those that normalize to NA become missing.
+    """
+    categories = series.cat.categories
+    normalized = fn(pd.Series(categories, dtype=categories.dtype))
+    new_categories = pd.Index(normalized.dropna().unique())
+    lookup = new_categories.get_indexer(normalized)
+    codes = series.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, lookup[codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=new_categories),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def _normalize_distinct(series: pd.Series, fn) -> pd.Series:
+    """
+    Apply a string transform once per distinct value and map the results
+    back to the rows. Categorical columns reuse their categories.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _normalize_categories(series, fn)
+    codes, uniques = pd.factorize(series)
+    normalized = fn(pd.Series(uniques, dtype=series.dtype))
+    return pd.Series(
+        normalized.array.take(codes, allow_fill=True),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def _text_step(col: str, spec: dict):
+    case_fn = CASES.get(spec.get("case"), lambda s: s)
+    allowed = spec.get("allowed")
+
+    def normalize(values: pd.Series) -> pd.Series:
+        return case_fn(values.str.strip().replace("", pd.NA))
+
+    def step(series: pd.Series) -> pd.Series:
+        result = _normalize_distinct(series, normalize)
+        if allowed is not None:
+            invalid_mask = result.notna() & ~result.isin(allowed)
+            invalid_count = int(invalid_mask.sum())
+            if invalid_count > 0:
+                logger.warning(
+                    "%s: %d value(s) not in %s; setting to NA",
+                    col,
+                    invalid_count,
+                    allowed,
+                    extra={"rate_limit": col},
+                )
+                result = result.mask(invalid_mask)
+                if isinstance(result.dtype, pd.CategoricalDtype):
+                    result = result.cat.remove_unused_categories()
+        return result
+
+    return step
+
+
+def _smallest_int_dtype(low: float, high: float) -> str:
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return dtype
+    return "Int64"
+
+
+def _numeric_step(col: str, spec: dict, numeric_report: dict):
+    low = spec.get("min")
+    high = spec.get("max")
+    decimals = spec.get("round")
+    target = spec.get("dtype", "float64")
+
+    def step(series: pd.Series) -> pd.Series:
+        entry = numeric_report.setdefault(
+            col,
+            {"input_dtype": str(series.dtype), "rows": 0, "unparsable": 0, "out_of_range": 0},
+        )
+        entry["rows"] += len(series)
+
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            # Already numeric: no string round trip, just validate.
+            codes = counts = None
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            # Text: parse each distinct value once, stripping whitespace,
+            # thousands separators and currency symbols in a single regex
+            # pass, then map back to the rows via the factorize codes.
+            codes, uniques = pd.factorize(series)
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            values = (
+                pd.Series(uniques, dtype=object)
+                .astype(str)
+                .str.replace(NUMERIC_JUNK, "", regex=True)
+                .pipe(pd.to_numeric, errors="coerce")
+                .to_numpy(dtype="float64", na_value=np.nan)
+            )
+
+        def rows(mask) -> int:
+            return int(counts[mask].sum()) if counts is not None else int(mask.sum())
+
+        unparsable = rows(np.isnan(values)) if counts is not None else 0
+        entry["unparsable"] += unparsable
+        if unparsable > 0:
+            logger.warning(
+                "Column %s: %d value(s) could not be converted to numeric and were set to NaN",
+                col,
+                unparsable,
+                extra={"rate_limit": col},
+            )
+        else:
+            logger.info("Column %s converted to numeric successfully.", col)
+
+        if low is not None or high is not None:
+            present = values[~np.isnan(values)]
+            logger.info(
+                "%s range before validation: min=%s, max=%s",
+                col,
+                present.min() if len(present) else np.nan,
+                present.max() if len(present) else np.nan,
+            )
+            invalid_mask = np.zeros(len(values), dtype=bool)
+            if low is not None:
+                invalid_mask |= values < low
+            if high is not None:
+                invalid_mask |= values > high
+            invalid_count = rows(invalid_mask)
+            entry["out_of_range"] += invalid_count
+            if invalid_count > 0:
+                logger.warning(
+                    "%s: %d value(s) outside valid range (%s–%s); setting to NA",
+                    col,
+                    invalid_count,
+                    low,
+                    high,
+                    extra={"rate_limit": col},
+                )
+                values = np.where(invalid_mask, np.nan, values)
+
+        if decimals is not None:
+            values = values.round(decimals)
+            logger.info("Rounded %s to %d decimal places.", col, decimals)
+
+        if codes is not None:
+            # Code -1 (missing) picks the trailing NaN.
+            values = np.append(values, np.nan)[codes]
+
+        if target == "int":
+            values = values.round()
+            if low is not None and high is not None:
+                # Declared bounds keep the dtype identical across chunks.
+                dtype = _smallest_int_dtype(low, high)
+            elif np.isnan(values).all():
+                dtype = "Int64"
+            else:
+                dtype = _smallest_int_dtype(np.nanmin(values), np.nanmax(values))
+        else:
+            dtype = target
+
+        result = pd.Series(values, index=series.index, name=series.name).astype(dtype)
+        entry["dtype"] = str(result.dtype)
+        return result
+
+    return step
+
+
+def detect_datetime_formats(
+    values: pd.Series,
+    candidates: list[str] = DATETIME_CANDIDATE_FORMATS,
+    sample_size: int = DATETIME_SAMPLE_SIZE,
+) -> list[str]:
+    """
+    Pick the formats that parse a sample of the distinct values, dominant
+    first: each round keeps the candidate parsing the most still-unparsed
+    sample values, until none parses at least DATETIME_MIN_SHARE of them.
+    Ties go to the earlier candidate (month-first, like pandas).
+    """
+    sample = pd.Series(values).dropna().drop_duplicates()
+    if len(sample) > sample_size:
+        sample = sample.sample(sample_size, random_state=0)
+    sample = sample.astype(str)
+
+    formats = []
+    remaining = sample
+    while len(remaining):
+        best_fmt, best_parsed = None, None
+        for fmt in candidates:
+            if fmt in formats:
+                continue
+            parsed = pd.to_datetime(remaining, format=fmt, errors="coerce")
+            if best_parsed is None or parsed.notna().sum() > best_parsed.notna().sum():
+                best_fmt, best_parsed = fmt, parsed
+        if best_parsed is None or best_parsed.notna().sum() < max(1, DATETIME_MIN_SHARE * len(sample)):
+            break
+        formats.append(best_fmt)
+        remaining = remaining[best_parsed.isna()]
+
+    return formats
+
+
+def _parse_datetimes(values: pd.Series, formats: list[str]) -> tuple[pd.Series, list[str]]:
+    """
+    Parse with each format in turn, only over values still unparsed.
+    Returns the parsed values and the formats that matched anything.
+    """
+    parsed = None
+    used = []
+    for fmt in formats:
+        todo = values.notna() if parsed is None else values.notna() & parsed.isna()
+        if not todo.any():
+            break
+        attempt = pd.to_datetime(values[todo], format=fmt, errors="coerce")
+        if attempt.notna().any():
+            used.append(fmt)
+        parsed = attempt.reindex(values.index) if parsed is None else parsed.fillna(attempt)
+    if parsed is None:
+        parsed = pd.to_datetime(pd.Series(pd.NaT, index=values.index))
+    return parsed, used
+
+
+def _datetime_step(col: str, spec: dict, datetime_formats: dict):
+    declared = spec.get("formats") or ([spec["format"]] if spec.get("format") else None)
+    fallback = spec.get("fallback_formats", DATETIME_CANDIDATE_FORMATS)
+    if declared:
+        datetime_formats[col] = list(declared)
+
+    def step(series: pd.Series) -> pd.Series:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+
+        before_non_null = series.notna().sum()
+        codes, uniques = pd.factorize(series)
+        distinct = pd.Series(uniques)
+        if not pd.api.types.is_string_dtype(distinct):
+            distinct = distinct.astype(str)
+
+        if col not in datetime_formats:
+            datetime_formats[col] = detect_datetime_formats(distinct)
+            logger.info(
+                "Column %s: detected datetime format(s) %s from %d distinct value(s)",
+                col,
+                datetime_formats[col],
+                len(distinct),
+            )
+        formats = datetime_formats[col]
+
+        if formats:
+            parsed, _ = _parse_datetimes(distinct, formats)
+            unparsed = distinct.notna() & parsed.isna()
+            extra = [fmt for fmt in fallback if fmt not in formats]
+            if unparsed.any() and extra:
+                recovered, used = _parse_datetimes(distinct[unparsed], extra)
+                parsed = parsed.fillna(recovered)
+                if used:
+                    logger.info(
+                        "Column %s: %d distinct value(s) parsed with fallback format(s) %s",
+                        col,
+                        int(recovered.notna().sum()),
+                        used,
+                    )
+        else:
+            # Nothing in the sample matched a known format: let pandas infer.
+            parsed = pd.to_datetime(distinct, errors="coerce")
+
+        values = pd.Series(
+            parsed.array.take(codes, allow_fill=True),
+            index=series.index,
+            name=series.name,
+        )
+        coerced = before_non_null - values.notna().sum()
+        if coerced > 0:
+            logger.warning(
+                "Column %s: %d value(s) could not be parsed as datetime and were set to NaT",
+                col,
+                coerced,
+                extra={"rate_limit": col},
+            )
+        else:
+            logger.info("Column %s parsed as datetime successfully.", col)
+        return values
+
+    return step
+
+
+def resolve_formats_path(path) -> Path:
+    path = Path(path)
+    if not path.is_absolute():
+        path = ROOT_DIR / path
+    return path
+
+
+def load_datetime_formats(path) -> dict:
+    """Datetime formats detected by an earlier run ({column: [formats]})."""
+    path = resolve_formats_path(path)
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        logger.warning("Ignoring unreadable datetime format cache %s", path)
+        return {}
+
+
+def save_datetime_formats(datetime_formats: dict, path) -> None:
+    """Persist detected datetime formats so later runs skip detection."""
+    path = resolve_formats_path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(datetime_formats, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+    logger.info("Saved datetime formats to %s: %s", path, datetime_formats)
+
+
+class CleaningPlan:
+    """
+    Compiled form of a rules section: one fused step function per column.
+
+    Build it once per source with compile_rules() and reuse it for every
+    chunk; apply() runs each step over its column exactly once.
+    datetime_formats holds the declared or detected formats per datetime
+    column; formats detected on the first chunk are reused for the rest.
+    numeric_report accumulates, per numeric column, the rows seen, values
+    that could not be parsed or were out of range, and the output dtype.
+    """
+
+    def __init__(
+        self,
+        steps: list,
+        text_columns: list[str],
+        category_columns: list[str],
+        datetime_formats: dict,
+        numeric_report: dict | None = None,
+    ):
+        self.steps = steps
+        self.text_columns = text_columns
+        self.category_columns = category_columns
+        self.datetime_formats = datetime_formats
+        self.numeric_report = numeric_report if numeric_report is not None else {}
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        for col, step in self.steps:
+            if col in df.columns:
+                with stage(f"clean.{col}", rows_in=len(df)):
+                    df[col] = step(df[col])
+        return df
+
+
+def compile_rules(rules: dict | None = None, datetime_formats: dict | None = None) -> CleaningPlan:
+    """
+    Validate a rules section (see DEFAULT_RULES for the format) and compile
+    it into a CleaningPlan. Raises ValueError for unknown rule types,
+    options or case names.
+
+    datetime_formats seeds formats detected by an earlier run (see
+    load_datetime_formats) for datetime columns that declare none.
+    """
+    if rules is None:
+        rules = DEFAULT_RULES
+
+    steps = []
+    text_columns = []
+    category_columns = []
+    known_formats = dict(datetime_formats or {})
+    numeric_report = {}
+
+    for col, spec in rules.get("columns", {}).items():
+        kind = spec.get("type", "text")
+        if kind not in RULE_OPTIONS:
+            raise ValueError(f"Unsupported rule type for column {col!r}: {kind}")
+        unknown = set(spec) - RULE_OPTIONS[kind]
+        if unknown:
+            raise ValueError(f"Unsupported {kind} rule option(s) for column {col!r}: {sorted(unknown)}")
+        if kind == "text":
+            if spec.get("case") is not None and spec["case"] not in CASES:
+                raise ValueError(f"Unsupported case for column {col!r}: {spec['case']}")
+            text_columns.append(col)
+            if spec.get("category"):
+                category_columns.append(col)
+
+        if kind == "numeric" and spec.get("dtype", "float64") not in NUMERIC_DTYPES:
+            raise ValueError(f"Unsupported numeric dtype for column {col!r}: {spec['dtype']}")
+
+        if kind == "text":
+            steps.append((col, _text_step(col, spec)))
+        elif kind == "numeric":
+            steps.append((col, _numeric_step(col, spec, numeric_report)))
+        else:
+            steps.append((col, _datetime_step(col, spec, known_formats)))
+
+    logger.debug("Compiled cleaning plan for columns: %s", [col for col, _ in steps])
+    return CleaningPlan(steps, text_columns, category_columns, known_formats, numeric_report)
@@ -0,0 +1,390 @@
+import pandas as pd
+import psycopg2
+import psycopg2.errors
+
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+# Progress of checkpointed loads: per load and table, the rows committed so
+# far and whether the table is done. Rows of a finished load are deleted.
+LOAD_STATE_TABLE = "etl_load_state"
+
+# Key of the advisory lock that serializes migrations across connections.
+MIGRATION_LOCK_ID = 7_311_023
+
+# Text columns of rejects hashed into rejects.row_hash. Rejects have no key,
+# so upsert loads find the staged rows already present by this hash (see
+# src.load._merge_sql).
+REJECT_HASH_COLUMNS = (
+    "name",
+    "age",
+    "gender",
+    "blood_type",
+    "medical_condition",
+    "date_of_admission",
+    "doctor",
+    "hospital",
+    "insurance_provider",
+    "billing_amount",
+    "room_number",
+    "admission_type",
+    "discharge_date",
+    "medication",
+    "test_results",
+    "missing_columns",
+)
+
+
+def reject_hash_sql(prefix: str = "") -> str:
+    """
+    md5 of the REJECT_HASH_COLUMNS, each qualified with prefix. Only
+    immutable functions are used, so it can define a generated column.
+    """
+    parts = " || '|' || ".join(f"coalesce({prefix}{col}, '')" for col in REJECT_HASH_COLUMNS)
+    return f"md5({parts})"
+
+
+# Foreign keys of admission_data: column -> referenced table.
+ADMISSION_FOREIGN_KEYS = {
+    "person_id": "people",
+    "doctor_id": "doctors",
+    "condition_id": "conditions",
+    "insurance_id": "insurance",
+    "admission_type_id": "admission_types",
+    "test_result_id": "test_results",
+}
+
+# Foreign keys between the target tables: table -> (column, referenced
+# table), the referenced column having the same name. Constraint names are
+# Postgres' defaults for inline REFERENCES (see foreign_key_name()), which
+# the partitioned admission_data keeps (see ensure_partitioned). Migration
+# 7 makes them all DEFERRABLE INITIALLY IMMEDIATE, so a load can defer
+# them with SET CONSTRAINTS without altering the schema.
+FOREIGN_KEYS = {
+    "doctors": (("hospital_id", "hospitals"),),
+    "admission_data": tuple(ADMISSION_FOREIGN_KEYS.items()),
+}
+
+
+def foreign_key_name(table: str, column: str) -> str:
+    return f"{table}_{column}_fkey"
+
+
+# Ordered migrations: (version, description, statements). Versions only
+# ever grow; a schema change is a new entry, never an edit of an applied
+# one. Version 1 uses IF NOT EXISTS so databases created before
+# schema_version existed are adopted as they are.
+MIGRATIONS = [
+    (1, "create target tables", [
+        """
+        CREATE TABLE IF NOT EXISTS people (
+            person_id   SERIAL PRIMARY KEY,
+            name        TEXT NOT NULL,
+            age         INT,
+            gender      TEXT NOT NULL,
+            blood_type  TEXT NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS hospitals (
+            hospital_id   INT PRIMARY KEY,
+            hospital_name TEXT NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS doctors (
+            doctor_id     INT PRIMARY KEY,
+            doctor_name   TEXT NOT NULL,
+            hospital_id   INT NOT NULL REFERENCES hospitals(hospital_id)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS conditions (
+            condition_id   INT PRIMARY KEY,
+            condition_name TEXT NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS insurance (
+            insurance_id  INT PRIMARY KEY,
+            provider_name TEXT NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS test_results (
+            test_result_id INT PRIMARY KEY,
+            result_label   TEXT NOT NULL CHECK (result_label IN ('inconclusive', 'normal', 'abnormal'))
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS admission_types (
+            admission_type_id INT PRIMARY KEY,
+            type_name         TEXT NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS admission_data (
+            admission_id       INT PRIMARY KEY,
+            person_id          INT NOT NULL REFERENCES people(person_id),
+            doctor_id          INT NOT NULL REFERENCES doctors(doctor_id),
+            condition_id       INT NOT NULL REFERENCES conditions(condition_id),
+            insurance_id       INT NOT NULL REFERENCES insurance(insurance_id),
+            admission_type_id  INT NOT NULL REFERENCES admission_types(admission_type_id),
+            test_result_id     INT NOT NULL REFERENCES test_results(test_result_id),
+            date_of_admission  TIMESTAMP,
+            discharge_date     TIMESTAMP,
+            billing_amount     NUMERIC(12, 2),
+            room_number        INT,
+            medication         TEXT NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rejects (
+            reject_id          SERIAL PRIMARY KEY,
+            name               TEXT,
+            age                TEXT,
+            gender             TEXT,
+            blood_type         TEXT,
+            medical_condition  TEXT,
+            date_of_admission  TEXT,
+            doctor             TEXT,
+            hospital           TEXT,
+            insurance_provider TEXT,
+            billing_amount     TEXT,
+            room_number        TEXT,
+            admission_type     TEXT,
+            discharge_date     TEXT,
+            medication         TEXT,
+            test_results       TEXT,
+            missing_columns    TEXT NOT NULL
+        );
+        """,
+    ]),
+    (2, "add rejects.missing_bitmask", [
+        """
+        ALTER TABLE rejects ADD COLUMN IF NOT EXISTS missing_bitmask INT;
+        """,
+    ]),
+    (3, "create load state table", [
+        f"""
+        CREATE TABLE IF NOT EXISTS {LOAD_STATE_TABLE} (
+            load_id     TEXT NOT NULL,
+            table_name  TEXT NOT NULL,
+            rows_done   BIGINT NOT NULL DEFAULT 0,
+            completed   BOOLEAN NOT NULL DEFAULT FALSE,
+            updated_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (load_id, table_name)
+        )
+        """,
+    ]),
+    (4, "add rejects.row_hash", [
+        f"""
+        ALTER TABLE rejects ADD COLUMN IF NOT EXISTS row_hash TEXT
+            GENERATED ALWAYS AS ({reject_hash_sql()}) STORED
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS rejects_row_hash_idx ON rejects (row_hash)
+        """,
+    ]),
+    (5, "add rejects.reason", [
+        """
+        ALTER TABLE rejects ADD COLUMN IF NOT EXISTS reason TEXT
+        """,
+    ]),
+    (6, "widen admission_data.admission_id to BIGINT", [
+        """
+        ALTER TABLE admission_data ALTER COLUMN admission_id TYPE BIGINT
+        """,
+    ]),
+    (7, "make foreign keys deferrable", [
+        f"ALTER TABLE {table} ALTER CONSTRAINT {foreign_key_name(table, column)} "
+        "DEFERRABLE INITIALLY IMMEDIATE"
+        for table, fks in FOREIGN_KEYS.items()
+        for column, _ in fks
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _read_version(cur) -> int:
+    cur.execute(f"SELECT max(version) FROM {SCHEMA_VERSION_TABLE}")
+    row = cur.fetchone()
+    return row[0] if row and row[0] is not None else 0
+
+
+def current_version(conn, cur) -> int:
+    """The applied schema version, 0 for a database never migrated."""
+    try:
+        return _read_version(cur)
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return 0
+
+
+def ensure_schema(conn, cur) -> int:
+    """
+    Bring the database schema up to LATEST_VERSION and return the version.
+
+    A database that is already current costs one query and no DDL, locks or
+    commit. Otherwise the pending migrations run under an advisory lock
+    (so concurrent loads migrate once), each recorded in schema_version,
+    and are committed together.
+    """
+    version = current_version(conn, cur)
+    if version >= LATEST_VERSION:
+        if version > LATEST_VERSION:
+            logger.warning(
+                "Database schema version %d is newer than this code's %d",
+                version,
+                LATEST_VERSION,
+            )
+        logger.debug("Schema is at version %d; no migration needed.", version)
+        return version
+
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} (
+            version     INT PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+    # Another connection may have migrated while we waited for the lock.
+    version = _read_version(cur)
+
+    for migration_version, description, statements in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        logger.info("Applying schema migration %d: %s", migration_version, description)
+        for sql in statements:
+            cur.execute(sql)
+        cur.execute(
+            f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, description) VALUES (%s, %s)",
+            (migration_version, description),
+        )
+    conn.commit()
+    logger.info("Schema migrated from version %d to %d.", version, LATEST_VERSION)
+    return LATEST_VERSION
+
+
+# Optional range partitioning of admission_data by date_of_admission (see
+# ensure_partitioned). interval -> pandas period frequency.
+PARTITION_INTERVALS = {"month": "M", "year": "Y"}
+PARTITION_KEY = ("admission_id", "date_of_admission")
+
+# The foreign keys are named explicitly, with the names Postgres gives the
+# inline REFERENCES of migration 1, so src.load finds them after a
+# conversion too, and are deferrable as migration 7 made them.
+PARTITIONED_ADMISSIONS_DDL = """
+    CREATE TABLE admission_data (
+        admission_id       BIGINT NOT NULL,
+        person_id          INT NOT NULL CONSTRAINT admission_data_person_id_fkey
+                               REFERENCES people(person_id) DEFERRABLE INITIALLY IMMEDIATE,
+        doctor_id          INT NOT NULL CONSTRAINT admission_data_doctor_id_fkey
+                               REFERENCES doctors(doctor_id) DEFERRABLE INITIALLY IMMEDIATE,
+        condition_id       INT NOT NULL CONSTRAINT admission_data_condition_id_fkey
+                               REFERENCES conditions(condition_id) DEFERRABLE INITIALLY IMMEDIATE,
+        insurance_id       INT NOT NULL CONSTRAINT admission_data_insurance_id_fkey
+                               REFERENCES insurance(insurance_id) DEFERRABLE INITIALLY IMMEDIATE,
+        admission_type_id  INT NOT NULL CONSTRAINT admission_data_admission_type_id_fkey
+                               REFERENCES admission_types(admission_type_id) DEFERRABLE INITIALLY IMMEDIATE,
+        test_result_id     INT NOT NULL CONSTRAINT admission_data_test_result_id_fkey
+                               REFERENCES test_results(test_result_id) DEFERRABLE INITIALLY IMMEDIATE,
+        date_of_admission  TIMESTAMP NOT NULL,
+        discharge_date     TIMESTAMP,
+        billing_amount     NUMERIC(12, 2),
+        room_number        INT,
+        medication         TEXT NOT NULL,
+        PRIMARY KEY (admission_id, date_of_admission)
+    ) PARTITION BY RANGE (date_of_admission);
+"""
+
+
+def partition_starts(dates: pd.Series, interval: str) -> pd.Series:
+    """Start of the partition each date falls in."""
+    return pd.to_datetime(dates).dt.to_period(PARTITION_INTERVALS[interval]).dt.start_time
+
+
+def partition_bounds(start: pd.Timestamp, interval: str) -> tuple[str, pd.Timestamp]:
+    """Name and exclusive upper bound of the partition starting at start."""
+    if interval == "year":
+        return f"admission_data_p{start:%Y}", start + pd.DateOffset(years=1)
+    return f"admission_data_p{start:%Y_%m}", start + pd.DateOffset(months=1)
+
+
+def create_partition_sql(start: pd.Timestamp, interval: str) -> str:
+    name, end = partition_bounds(start, interval)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF admission_data "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    )
+
+
+def ensure_partitioned(conn, cur, interval: str) -> bool:
+    """
+    Make admission_data range-partitioned by date_of_admission, one
+    partition per `interval`. Costs one catalog query when it already is.
+
+    A plain admission_data (as created by the migrations) is converted in
+    one transaction: it is renamed aside, the partitioned table and the
+    partitions its rows need are created, the rows are moved and the old
+    table is dropped. The primary key becomes (admission_id,
+    date_of_admission), as Postgres requires the partition key in it, so
+    Postgres no longer enforces admission_id alone to be unique. It stays
+    unique because admission_id is a hash of the admission's natural key,
+    which includes date_of_admission (see src.transform.admission_ids()),
+    as long as the person and doctor ids in that key come from a persisted
+    key registry (defaults.key_registry). Without one they are renumbered
+    every run, and replace mode, which reloads only the touched partitions,
+    can leave the same admission_id in several partitions.
+    Rows without a date_of_admission have no partition to go to, so the
+    conversion is refused (ValueError) while admission_data holds any.
+    Returns True if the table was converted. The interval must not change
+    once partitions exist.
+    """
+    if interval not in PARTITION_INTERVALS:
+        raise ValueError(f"Unsupported partition interval: {interval}")
+
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = 'admission_data'::regclass")
+    row = cur.fetchone()
+    if row is not None and row[0] == "p":
+        return False
+
+    cur.execute("SELECT count(*) FROM admission_data WHERE date_of_admission IS NULL")
+    undated = cur.fetchone()[0]
+    if undated:
+        logger.error(
+            "admission_data has %d row(s) without date_of_admission; "
+            "not converting it to partitions.",
+            undated,
+        )
+        raise ValueError(
+            f"Cannot partition admission_data: {undated} row(s) have no date_of_admission"
+        )
+
+    logger.info("Converting admission_data to %sly range partitions...", interval)
+    cur.execute("ALTER TABLE admission_data RENAME TO admission_data_unpartitioned")
+    cur.execute("ALTER TABLE admission_data_unpartitioned DROP CONSTRAINT admission_data_pkey")
+    # The old table's foreign keys would keep their names from the new one.
+    for column in ADMISSION_FOREIGN_KEYS:
+        cur.execute(
+            "ALTER TABLE admission_data_unpartitioned "
+            f"DROP CONSTRAINT IF EXISTS admission_data_{column}_fkey"
+        )
+    cur.execute(PARTITIONED_ADMISSIONS_DDL)
+    cur.execute(
+        "SELECT DISTINCT date_of_admission FROM admission_data_unpartitioned "
+        "WHERE date_of_admission IS NOT NULL"
+    )
+    dates = pd.Series([value for value, in cur.fetchall()], dtype="datetime64[us]")
+    for start in partition_starts(dates, interval).drop_duplicates():
+        cur.execute(create_partition_sql(start, interval))
+    cur.execute("INSERT INTO admission_data SELECT * FROM admission_data_unpartitioned")
+    cur.execute("DROP TABLE admission_data_unpartitioned")
+    conn.commit()
+    logger.info("admission_data is now partitioned by %s.", interval)
+    return True
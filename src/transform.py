@@ -1,10 +1,185 @@
+import numpy as np
 import pandas as pd
+from src.keys import assign_ids
 from src.logger import get_logger
+from src.profiling import stage
 
 logger = get_logger(__name__)
 
-
-def transform(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+# Columns an admission needs; bit i of a reject's missing_bitmask is set
+# when REQUIRED_COLUMNS[i] is null.
+REQUIRED_COLUMNS = [
+    "person_id",
+    "doctor_id",
+    "condition_id",
+    "insurance_id",
+    "admission_type_id",
+    "test_result_id",
+    "date_of_admission",
+    "discharge_date",
+    "billing_amount",
+    "room_number",
+    "medication",
+]
+
+# Natural key of an admission. With a key_state its admission_id is derived
+# from this key (see admission_ids()), so a later run that sees the same
+# admission updates it instead of adding a row under a new id.
+ADMISSION_KEY = ["person_id", "doctor_id", "date_of_admission"]
+
+# Values of rejects.reason.
+REJECT_MISSING = "missing_columns"
+REJECT_KEY_CONFLICT = "admission_key_conflict"
+
+
+def missing_bitmask(null_matrix: np.ndarray) -> np.ndarray:
+    """Encode each row of a (rows x REQUIRED_COLUMNS) null matrix as an int."""
+    weights = np.left_shift(1, np.arange(null_matrix.shape[1], dtype=np.int64))
+    return null_matrix.astype(np.int64) @ weights
+
+
+def decode_missing_bitmask(bitmasks: np.ndarray) -> np.ndarray:
+    """
+    Turn bitmasks back into comma-separated column names. Only the distinct
+    bitmask values are decoded; the labels are then mapped back by index.
+    """
+    uniques, inverse = np.unique(bitmasks, return_inverse=True)
+    labels = np.array(
+        [
+            ",".join(
+                col for bit, col in enumerate(REQUIRED_COLUMNS) if (value >> bit) & 1
+            )
+            for value in uniques
+        ],
+        dtype=object,
+    )
+    return labels[inverse.reshape(-1)]
+
+
+def encode_keys(df: pd.DataFrame, key_cols: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Dictionary-encode the key columns of df in one pass.
+
+    Returns (codes, first): codes[i] is the 0-based code of row i's key in
+    order of first appearance, or -1 if any key column is null; first[k]
+    is the row position where code k first appears. Categorical columns
+    are factorized from their existing codes, so dimensions built from them
+    only ever look at the categories. Multi-column keys are
+    combined pairwise from per-column factorize() codes and re-factorized,
+    so intermediate keys stay within int64 regardless of cardinality.
+    """
+    codes = None
+    for col in key_cols:
+        col_codes, uniques = pd.factorize(df[col])
+        col_codes = col_codes.astype(np.int64)
+        if codes is None:
+            codes = col_codes
+            continue
+        valid = (codes >= 0) & (col_codes >= 0)
+        combined = np.full(len(df), -1, dtype=np.int64)
+        combined[valid] = pd.factorize(
+            codes[valid] * len(uniques) + col_codes[valid]
+        )[0]
+        codes = combined
+
+    valid_positions = np.flatnonzero(codes >= 0)
+    _, first_idx = np.unique(codes[valid_positions], return_index=True)
+    return codes, valid_positions[first_idx]
+
+
+def admission_ids(admissions: pd.DataFrame) -> np.ndarray:
+    """
+    admission_id of every row, derived from its ADMISSION_KEY: a 63-bit
+    hash of the key, so an admission gets the same id in every run without
+    keeping its key anywhere. Dates are hashed at nanosecond resolution, so
+    the id does not depend on the datetime unit the frame was parsed with.
+    """
+    key = pd.DataFrame(
+        {
+            "person_id": admissions["person_id"].to_numpy(dtype="int64"),
+            "doctor_id": admissions["doctor_id"].to_numpy(dtype="int64"),
+            "date_of_admission": admissions["date_of_admission"]
+            .astype("datetime64[ns]")
+            .to_numpy()
+            .view("int64"),
+        }
+    )
+    hashes = pd.util.hash_pandas_object(key, index=False).to_numpy()
+    return (hashes >> np.uint64(1)).astype(np.int64)
+
+
+def admission_repeats(
+    admissions: pd.DataFrame, ids: np.ndarray, emitted: dict
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Masks of the rows whose admission id was already seen, earlier in the
+    frame or in emitted ({admission_id: content hash} of the rows emitted so
+    far in the run, updated in place with the new ones): (exact, conflict).
+    Exact repeats have the same values as the first row with their id;
+    conflicts differ from it in some other column.
+    """
+    content = pd.util.hash_pandas_object(admissions, index=False).to_numpy()
+    exact = np.zeros(len(admissions), dtype=bool)
+    conflict = np.zeros(len(admissions), dtype=bool)
+    for i, (admission_id, row_hash) in enumerate(zip(ids.tolist(), content.tolist())):
+        seen = emitted.get(admission_id)
+        if seen is None:
+            emitted[admission_id] = row_hash
+        elif seen == row_hash:
+            exact[i] = True
+        else:
+            conflict[i] = True
+    return exact, conflict
+
+
+def _plain_dtypes(dim_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dimension columns taken from categorical fact columns (see
+    clean(categorical=True)) are turned back into their category dtype so
+    dimension tables look the same whichever clean mode produced them.
+    """
+    for col in dim_df.columns:
+        if isinstance(dim_df[col].dtype, pd.CategoricalDtype):
+            dim_df[col] = dim_df[col].astype(dim_df[col].cat.categories.dtype)
+    return dim_df
+
+
+def _lookup_ids(codes: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """
+    Map row codes to dimension ids. Rows without a key get NaN, which (as
+    with a left merge) makes the column float only when such rows exist.
+    """
+    missing = codes < 0
+    if not missing.any():
+        return ids[codes]
+    out = np.full(len(codes), np.nan)
+    out[~missing] = ids[codes[~missing]]
+    return out
+
+
+def transform(
+    df: pd.DataFrame,
+    key_state: dict | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Split the cleaned frame into dimension tables, admissions and rejects.
+
+    Dimension ids are attached by dictionary-encoding the key columns once
+    (see encode_keys()); each dimension table is the first occurrence of
+    every code and the fact id columns are array lookups by code, so no
+    joins against the full frame are needed.
+
+    key_state makes dimension ids stable: pass the same dict for every chunk
+    of a run (an empty dict, or one loaded with src.keys.load_key_registry()
+    to reuse the ids of earlier runs). Known natural keys keep their id,
+    and dimension tables in the result only hold the rows not yet emitted in
+    this run, so each chunk can be loaded as-is. Admissions are keyed on
+    ADMISSION_KEY, whose hash is the admission_id: exact duplicates of a
+    row already emitted in the run are dropped, and a row repeating the key
+    of such a row with different values goes to rejects (reason
+    REJECT_KEY_CONFLICT). Without key_state admission ids are 1..n and
+    every valid row is kept.
+    """
     logger.info(
         "Starting transform(): input df has %d rows x %d columns",
         df.shape[0],
@@ -12,273 +187,220 @@ def transform(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
     )
 
     try:
-        people_df = (
-            df[["name", "age", "gender", "blood_type"]]
-            .dropna(subset=["name", "age", "gender", "blood_type"])
-            .drop_duplicates()
-            .reset_index(drop=True)
-        )
-        people_df["person_id"] = people_df.index + 1
-        logger.info(
-            "Built people_df (no nulls): %d rows x %d columns",
-            people_df.shape[0],
-            people_df.shape[1],
-        )
-
-        doctors_df = (
-            df[["doctor", "hospital"]]
-            .dropna(subset=["doctor", "hospital"])
-            .drop_duplicates()
-            .reset_index(drop=True)
-        )
-        doctors_df["doctor_id"] = doctors_df.index + 1
-        logger.info(
-            "Built doctors_df (pre-hospital merge, no nulls): %d rows x %d columns",
-            doctors_df.shape[0],
-            doctors_df.shape[1],
-        )
-
-        hospitals_df = (
-            doctors_df[["hospital"]]
-            .dropna(subset=["hospital"])
-            .drop_duplicates()
-            .reset_index(drop=True)
-            .rename(columns={"hospital": "hospital_name"})
-        )
-        hospitals_df["hospital_id"] = hospitals_df.index + 1
-        logger.info(
-            "Built hospitals_df (no nulls): %d rows x %d columns",
-            hospitals_df.shape[0],
-            hospitals_df.shape[1],
-        )
+        df = df.reset_index(drop=True)
+        fact_ids = {}
+
+        with stage("transform.people", rows_in=len(df)) as rec:
+            people_cols = ["name", "age", "gender", "blood_type"]
+            people_codes, people_first = encode_keys(df, people_cols)
+            people_df = _plain_dtypes(
+                df[people_cols].iloc[people_first].reset_index(drop=True)
+            )
+            people_df, people_new = assign_ids(
+                people_df, "person_id", people_cols, key_state, "people"
+            )
+            fact_ids["person_id"] = _lookup_ids(people_codes, people_df["person_id"].to_numpy())
+            rec["rows_out"] = len(people_df)
+            logger.info(
+                "Built people_df (no nulls): %d rows x %d columns",
+                people_df.shape[0],
+                people_df.shape[1],
+            )
 
-        doctors_df = doctors_df.merge(
-            hospitals_df.rename(columns={"hospital_name": "hospital"}),
-            on="hospital",
-            how="left",
-        )
-        doctors_df = doctors_df.rename(
-            columns={
-                "doctor": "doctor_name",
-                "hospital": "hospital_name",
-            }
-        )
-        logger.info(
-            "Updated doctors_df after hospital merge: %d rows x %d columns",
-            doctors_df.shape[0],
-            doctors_df.shape[1],
-        )
+        with stage("transform.doctors", rows_in=len(df)) as rec:
+            doctor_codes, doctor_first = encode_keys(df, ["doctor", "hospital"])
+            doctors_df = _plain_dtypes(
+                df[["doctor", "hospital"]].iloc[doctor_first].reset_index(drop=True)
+            )
+            doctors_df, doctors_new = assign_ids(
+                doctors_df, "doctor_id", ["doctor", "hospital"], key_state, "doctors"
+            )
+            fact_ids["doctor_id"] = _lookup_ids(doctor_codes, doctors_df["doctor_id"].to_numpy())
+            rec["rows_out"] = len(doctors_df)
+            logger.info(
+                "Built doctors_df (pre-hospital link, no nulls): %d rows x %d columns",
+                doctors_df.shape[0],
+                doctors_df.shape[1],
+            )
 
-        conditions_df = (
-            df[["medical_condition"]]
-            .dropna(subset=["medical_condition"])
-            .drop_duplicates()
-            .reset_index(drop=True)
-            .rename(columns={"medical_condition": "condition_name"})
-        )
-        conditions_df["condition_id"] = conditions_df.index + 1
-        logger.info(
-            "Built conditions_df (no nulls): %d rows x %d columns",
-            conditions_df.shape[0],
-            conditions_df.shape[1],
-        )
+        with stage("transform.hospitals", rows_in=len(doctors_df)) as rec:
+            hospital_codes, hospital_first = encode_keys(doctors_df, ["hospital"])
+            hospitals_df = (
+                doctors_df[["hospital"]]
+                .iloc[hospital_first]
+                .reset_index(drop=True)
+                .rename(columns={"hospital": "hospital_name"})
+            )
+            hospitals_df, hospitals_new = assign_ids(
+                hospitals_df, "hospital_id", ["hospital_name"], key_state, "hospitals"
+            )
+            rec["rows_out"] = len(hospitals_df)
+            logger.info(
+                "Built hospitals_df (no nulls): %d rows x %d columns",
+                hospitals_df.shape[0],
+                hospitals_df.shape[1],
+            )
 
-        insurance_df = (
-            df[["insurance_provider"]]
-            .dropna(subset=["insurance_provider"])
-            .drop_duplicates()
-            .reset_index(drop=True)
-            .rename(columns={"insurance_provider": "provider_name"})
-        )
-        insurance_df["insurance_id"] = insurance_df.index + 1
-        logger.info(
-            "Built insurance_df (no nulls): %d rows x %d columns",
-            insurance_df.shape[0],
-            insurance_df.shape[1],
-        )
+            doctors_df["hospital_id"] = hospitals_df["hospital_id"].to_numpy()[hospital_codes]
+            doctors_df = doctors_df.rename(
+                columns={
+                    "doctor": "doctor_name",
+                    "hospital": "hospital_name",
+                }
+            )
+            doctors_new = doctors_df[
+                doctors_df["doctor_id"].isin(doctors_new["doctor_id"])
+            ].reset_index(drop=True)
+            logger.info(
+                "Updated doctors_df with hospital ids: %d rows x %d columns",
+                doctors_df.shape[0],
+                doctors_df.shape[1],
+            )
 
         valid_results = ["inconclusive", "normal", "abnormal"]
 
-        test_results_df = (
-            df[["test_results"]]
-            .rename(columns={"test_results": "result_label"})
-        )
-
-        valid_mask = (
-            test_results_df["result_label"].notna()
-            & test_results_df["result_label"].isin(valid_results)
-        )
-        invalid_count = len(test_results_df) - valid_mask.sum()
+        result_labels = df["test_results"]
+        valid_mask = result_labels.notna() & result_labels.isin(valid_results)
+        invalid_count = len(result_labels) - valid_mask.sum()
         if invalid_count > 0:
             logger.warning(
                 "test_results_df: %d invalid or null result_label value(s) "
                 "dropped before dimension build",
                 invalid_count,
+                extra={"rate_limit": True},
             )
 
-        test_results_df = (
-            test_results_df[valid_mask]
-            .drop_duplicates()
-            .reset_index(drop=True)
-        )
-        test_results_df["test_result_id"] = test_results_df.index + 1
-        logger.info(
-            "Built test_results_df (no nulls): %d rows x %d columns",
-            test_results_df.shape[0],
-            test_results_df.shape[1],
-        )
-
-        admission_types_df = (
-            df[["admission_type"]]
-            .dropna(subset=["admission_type"])
-            .drop_duplicates()
-            .reset_index(drop=True)
-            .rename(columns={"admission_type": "type_name"})
-        )
-        admission_types_df["admission_type_id"] = admission_types_df.index + 1
-        logger.info(
-            "Built admission_types_df (no nulls): %d rows x %d columns",
-            admission_types_df.shape[0],
-            admission_types_df.shape[1],
-        )
-
-        logger.debug("Merging people into base df...")
-        df = df.merge(
-            people_df,
-            on=["name", "age", "gender", "blood_type"],
-            how="left",
-        )
-
-        logger.debug("Merging doctors into base df...")
-        df = df.merge(
-            doctors_df[["doctor_name", "hospital_name", "doctor_id"]],
-            left_on=["doctor", "hospital"],
-            right_on=["doctor_name", "hospital_name"],
-            how="left",
-        )
-
-        logger.debug("Merging conditions into base df...")
-        df = df.merge(
-            conditions_df,
-            left_on="medical_condition",
-            right_on="condition_name",
-            how="left",
-        )
+        single_dims = [
+            # (name, source column, dimension column, id column, values)
+            ("conditions", "medical_condition", "condition_name", "condition_id",
+             df["medical_condition"]),
+            ("insurance", "insurance_provider", "provider_name", "insurance_id",
+             df["insurance_provider"]),
+            ("test_results", "test_results", "result_label", "test_result_id",
+             result_labels.where(valid_mask)),
+            ("admission_types", "admission_type", "type_name", "admission_type_id",
+             df["admission_type"]),
+        ]
 
-        logger.debug("Merging insurance into base df...")
-        df = df.merge(
-            insurance_df,
-            left_on="insurance_provider",
-            right_on="provider_name",
-            how="left",
-        )
-
-        logger.debug("Merging test_results into base df...")
-        df = df.merge(
-            test_results_df,
-            left_on="test_results",
-            right_on="result_label",
-            how="left",
-        )
-
-        logger.debug("Merging admission_types into base df...")
-        df = df.merge(
-            admission_types_df,
-            left_on="admission_type",
-            right_on="type_name",
-            how="left",
-        )
+        dims = {}
+        for name, source_col, dim_col, id_col, values in single_dims:
+            with stage(f"transform.{name}", rows_in=len(df)) as rec:
+                codes, first = encode_keys(values.to_frame(dim_col), [dim_col])
+                dim_df = _plain_dtypes(
+                    df[[source_col]]
+                    .iloc[first]
+                    .reset_index(drop=True)
+                    .rename(columns={source_col: dim_col})
+                )
+                dim_df, dim_new = assign_ids(dim_df, id_col, [dim_col], key_state, name)
+                fact_ids[id_col] = _lookup_ids(codes, dim_df[id_col].to_numpy())
+                dims[name] = (dim_df, dim_new)
+                rec["rows_out"] = len(dim_df)
+                logger.info(
+                    "Built %s_df (no nulls): %d rows x %d columns",
+                    name,
+                    dim_df.shape[0],
+                    dim_df.shape[1],
+                )
+
+        conditions_df, conditions_new = dims["conditions"]
+        insurance_df, insurance_new = dims["insurance"]
+        test_results_df, test_results_new = dims["test_results"]
+        admission_types_df, admission_types_new = dims["admission_types"]
 
         logger.info(
-            "Finished merges; df is now %d rows x %d columns",
+            "Attached %d dimension id column(s) to %d rows without joins",
+            len(fact_ids),
             df.shape[0],
-            df.shape[1],
         )
 
-        admissions_required = df[
-            [
-                "person_id",
-                "doctor_id",
-                "condition_id",
-                "insurance_id",
-                "admission_type_id",
-                "test_result_id",
-                "date_of_admission",
-                "discharge_date",
-                "billing_amount",
-                "room_number",
-                "medication",
-            ]
-        ].copy()
-
-        required_cols = [
-            "person_id",
-            "doctor_id",
-            "condition_id",
-            "insurance_id",
-            "admission_type_id",
-            "test_result_id",
-            "date_of_admission",
-            "discharge_date",
-            "billing_amount",
-            "room_number",
-            "medication",
-        ]
-
-        missing_mask = admissions_required[required_cols].isna().any(axis=1)
-
-        missing_columns_series = admissions_required[required_cols].isna().apply(
-            lambda row: ",".join(row.index[row]), axis=1
-        )
+        with stage("transform.admissions", rows_in=len(df)) as rec:
+            admissions_required = df[
+                [col for col in REQUIRED_COLUMNS if col not in fact_ids]
+            ].assign(**fact_ids)[REQUIRED_COLUMNS]
+
+            bitmasks = missing_bitmask(admissions_required.isna().to_numpy())
+            missing_mask = bitmasks != 0
+
+            admissions_df = admissions_required[~missing_mask].reset_index(drop=True)
+            conflict_mask = np.zeros(len(df), dtype=bool)
+            if key_state is None:
+                admissions_df["admission_id"] = admissions_df.index + 1
+            else:
+                id_cols = list(fact_ids)
+                admissions_df[id_cols] = admissions_df[id_cols].astype("int64")
+                ids = admission_ids(admissions_df)
+                emitted = key_state.setdefault("emitted", {}).setdefault("admissions", {})
+                exact, conflict = admission_repeats(admissions_df, ids, emitted)
+                if exact.any():
+                    logger.info(
+                        "admissions: dropped %d exact duplicate row(s)", int(exact.sum())
+                    )
+                if conflict.any():
+                    logger.warning(
+                        "admissions: %d row(s) repeat the admission key %s of an earlier "
+                        "row with different values; sending them to rejects",
+                        int(conflict.sum()),
+                        ADMISSION_KEY,
+                        extra={"rate_limit": True},
+                    )
+                conflict_mask[np.flatnonzero(~missing_mask)[conflict]] = True
+                keep = ~(exact | conflict)
+                admissions_df = admissions_df[keep].reset_index(drop=True)
+                admissions_df["admission_id"] = ids[keep]
+
+            reject_mask = missing_mask | conflict_mask
+            rejects_df = df.loc[
+                reject_mask,
+                [
+                    "name",
+                    "age",
+                    "gender",
+                    "blood_type",
+                    "medical_condition",
+                    "date_of_admission",
+                    "doctor",
+                    "hospital",
+                    "insurance_provider",
+                    "billing_amount",
+                    "room_number",
+                    "admission_type",
+                    "discharge_date",
+                    "medication",
+                    "test_results",
+                ],
+            ].copy()
+
+            reject_bitmasks = bitmasks[reject_mask]
+            rejects_df["missing_columns"] = decode_missing_bitmask(reject_bitmasks)
+            rejects_df["missing_bitmask"] = reject_bitmasks
+            rejects_df["reason"] = np.where(
+                missing_mask[reject_mask], REJECT_MISSING, REJECT_KEY_CONFLICT
+            )
 
-        rejects_df = df.loc[
-            missing_mask,
-            [
-                "name",
-                "age",
-                "gender",
-                "blood_type",
-                "medical_condition",
-                "date_of_admission",
-                "doctor",
-                "hospital",
-                "insurance_provider",
-                "billing_amount",
-                "room_number",
-                "admission_type",
-                "discharge_date",
-                "medication",
-                "test_results",
-            ],
-        ].copy()
-
-        rejects_df["missing_columns"] = missing_columns_series[missing_mask].values
-
-        admissions_df = admissions_required[~missing_mask].reset_index(drop=True)
-        admissions_df["admission_id"] = admissions_df.index + 1
-
-        admissions_df = admissions_df[
-            [
-                "admission_id",
-                "person_id",
-                "doctor_id",
-                "condition_id",
-                "insurance_id",
-                "admission_type_id",
-                "test_result_id",
-                "date_of_admission",
-                "discharge_date",
-                "billing_amount",
-                "room_number",
-                "medication",
+            admissions_df = admissions_df[
+                [
+                    "admission_id",
+                    "person_id",
+                    "doctor_id",
+                    "condition_id",
+                    "insurance_id",
+                    "admission_type_id",
+                    "test_result_id",
+                    "date_of_admission",
+                    "discharge_date",
+                    "billing_amount",
+                    "room_number",
+                    "medication",
+                ]
             ]
-        ]
 
-        logger.info(
-            "Built admissions_df: %d rows x %d columns",
-            admissions_df.shape[0],
-            admissions_df.shape[1],
-        )
+            rec["rows_out"] = len(admissions_df)
+            logger.info(
+                "Built admissions_df: %d rows x %d columns",
+                admissions_df.shape[0],
+                admissions_df.shape[1],
+            )
 
         logger.info(
             "After reject split: %d valid admissions, %d rejected rows",
@@ -287,13 +409,13 @@ def transform(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
         )
 
         result = {
-            "people": people_df,
-            "doctors": doctors_df,
-            "hospitals": hospitals_df,
-            "conditions": conditions_df,
-            "insurance": insurance_df,
-            "admission_types": admission_types_df,
-            "test_results": test_results_df,
+            "people": people_new,
+            "doctors": doctors_new,
+            "hospitals": hospitals_new,
+            "conditions": conditions_new,
+            "insurance": insurance_new,
+            "admission_types": admission_types_new,
+            "test_results": test_results_new,
             "admissions": admissions_df,
             "rejects": rejects_df,
         }
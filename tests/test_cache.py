@@ -0,0 +1,127 @@
+import os
+
+import pandas as pd
+
+import src.pipeline as pipeline
+from src.cache import StageCache
+from src.pipeline import process_source
+
+
+def _write_source(tmp_path):
+    df = pd.DataFrame(
+        {
+            "Name": ["john doe", "jane smith"],
+            "Age": ["30", "40"],
+            "Gender": ["m", "f"],
+            "Blood Type": ["o+", "a-"],
+            "Medical Condition": ["flu", "cold"],
+            "Date of Admission": ["2024-01-01", "2024-01-02"],
+            "Doctor": ["dr house", "dr wilson"],
+            "Hospital": ["general", "city"],
+            "Insurance Provider": ["acme", "acme"],
+            "Billing Amount": ["1,000.50", "200"],
+            "Room Number": ["101", "202"],
+            "Admission Type": ["Emergency", "Elective"],
+            "Discharge Date": ["2024-01-05", "2024-01-07"],
+            "Medication": ["Med A", "Med B"],
+            "Test Results": ["Normal", "Abnormal"],
+        }
+    )
+    path = tmp_path / "source.csv"
+    df.to_csv(path, index=False)
+    return {"name": "test_csv", "type": "csv", "path": str(path)}
+
+
+def test_stage_cache_round_trip(tmp_path):
+    cache = StageCache(tmp_path / "cache")
+    frames = {"raw": pd.DataFrame({"a": [1, 2], "b": ["x", None]})}
+
+    assert cache.get("read-abc") is None
+    cache.put("read-abc", frames)
+
+    pd.testing.assert_frame_equal(cache.get("read-abc")["raw"], frames["raw"], check_dtype=False)
+
+
+def test_stage_cache_evicts_least_recently_used(tmp_path):
+    df = pd.DataFrame({"a": range(1000)})
+    cache = StageCache(tmp_path / "cache")
+    cache.put("old", {"df": df})
+    cache.put("new", {"df": df})
+
+    entry_size = sum(f.stat().st_size for f in (tmp_path / "cache" / "old").iterdir())
+    os.utime(tmp_path / "cache" / "old" / ".last_used", (0, 0))
+
+    cache.max_bytes = entry_size
+    cache.evict()
+
+    assert not (tmp_path / "cache" / "old").exists()
+    assert (tmp_path / "cache" / "new").exists()
+
+
+def test_process_source_skips_unchanged_stages(tmp_path, monkeypatch):
+    source_cfg = _write_source(tmp_path)
+    cache = StageCache(tmp_path / "cache")
+
+    calls = {"read": 0, "clean": 0, "transform": 0}
+
+    def counting(name, fn):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(pipeline, "read", counting("read", pipeline.read))
+    monkeypatch.setattr(pipeline, "clean", counting("clean", pipeline.clean))
+    monkeypatch.setattr(pipeline, "transform", counting("transform", pipeline.transform))
+
+    first = process_source(source_cfg, cache=cache)
+    second = process_source(source_cfg, cache=cache)
+
+    assert calls == {"read": 1, "clean": 1, "transform": 1}
+    for name in first:
+        pd.testing.assert_frame_equal(
+            second[name].reset_index(drop=True),
+            first[name].reset_index(drop=True),
+            check_dtype=False,
+        )
+
+    # Changing the source file invalidates every stage.
+    with open(source_cfg["path"], "a", encoding="utf-8") as f:
+        f.write(
+            "mary major,55,f,b+,flu,2024-02-01,dr grey,general,acme,300,303,"
+            "Urgent,2024-02-03,Med C,Inconclusive\n"
+        )
+    third = process_source(source_cfg, cache=cache)
+
+    assert calls == {"read": 2, "clean": 2, "transform": 2}
+    assert len(third["admissions"]) == 3
+
+
+def test_process_source_disabled_cache_writes_nothing(tmp_path):
+    source_cfg = _write_source(tmp_path)
+    cache = StageCache(tmp_path / "cache", enabled=False)
+
+    process_source(source_cfg, cache=cache)
+
+    assert not (tmp_path / "cache").exists()
+
+
+def test_process_source_transform_hit_restores_key_registry(tmp_path):
+    from src.keys import new_key_state
+
+    source_cfg = _write_source(tmp_path)
+    cache = StageCache(tmp_path / "cache")
+
+    first_state = new_key_state()
+    process_source(source_cfg, key_state=first_state, cache=cache)
+
+    second_state = new_key_state()
+    second_state["ids"] = {}
+    process_source(source_cfg, key_state=second_state, cache=cache)
+
+    assert set(second_state["ids"]) == set(first_state["ids"])
+    pd.testing.assert_frame_equal(
+        second_state["ids"]["people"],
+        first_state["ids"]["people"],
+        check_dtype=False,
+    )
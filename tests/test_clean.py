@@ -28,4 +28,24 @@ def test_clean_handles_missing_optional_columns_gracefully():
     result = clean(raw)
 
     assert "name" in result.columns
-    assert "gender" in result.columns
\ No newline at end of file
+    assert "gender" in result.columns
+
+def test_clean_categorical_mode_normalizes_categories_only():
+    raw = pd.DataFrame({
+        "Gender": [" m", "M", "f ", "", None],
+        "Test Results": ["Normal", " normal", "ABNORMAL", "weird", None],
+        "Name": ["a", "b", "c", "d", "e"],
+    })
+
+    plain = clean(raw)
+    result = clean(raw, categorical=True)
+
+    assert isinstance(result["gender"].dtype, pd.CategoricalDtype)
+    assert list(result["gender"].cat.categories) == ["M", "F"]
+    assert list(result["test_results"].cat.categories) == ["normal", "abnormal"]
+    assert result["name"].dtype == plain["name"].dtype
+
+    for col in ["gender", "test_results"]:
+        assert result[col].astype(object).where(result[col].notna(), None).tolist() == (
+            plain[col].astype(object).where(plain[col].notna(), None).tolist()
+        )
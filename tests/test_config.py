@@ -0,0 +1,36 @@
+import pytest
+
+from src.config import load_config
+
+CONFIG_YAML = """
+defaults:
+  load_workers: 1
+  bulk_load:
+    enabled: false
+    analyze: true
+environments:
+  warehouse:
+    load_workers: 4
+    bulk_load:
+      enabled: true
+"""
+
+
+def test_environment_overrides_defaults(tmp_path, monkeypatch):
+    path = tmp_path / "sources.yml"
+    path.write_text(CONFIG_YAML)
+    monkeypatch.setenv("ETL_ENV", "warehouse")
+
+    defaults = load_config(path)["defaults"]
+
+    assert defaults["load_workers"] == 4
+    assert defaults["bulk_load"] == {"enabled": True, "analyze": True}
+
+
+def test_unknown_environment_is_an_error(tmp_path, monkeypatch):
+    path = tmp_path / "sources.yml"
+    path.write_text(CONFIG_YAML)
+    monkeypatch.setenv("ETL_ENV", "staging")
+
+    with pytest.raises(KeyError, match="staging"):
+        load_config(path)
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from benchmarks.bench_pipeline import run_benchmark
+from src.clean import clean
+from src.generate import RAW_COLUMNS, generate_dirty_healthcare, write_dirty_csv
+
+CLEAN = {
+    "bad_age_rate": 0.0,
+    "comma_number_rate": 0.0,
+    "invalid_test_result_rate": 0.0,
+    "whitespace_rate": 0.0,
+    "mixed_case_rate": 0.0,
+    "missing_rate": 0.0,
+}
+
+
+def test_generate_is_deterministic_and_shaped_like_the_source():
+    df = generate_dirty_healthcare(500, seed=1)
+
+    assert list(df.columns) == RAW_COLUMNS
+    assert len(df) == 500
+    pd.testing.assert_frame_equal(df, generate_dirty_healthcare(500, seed=1))
+
+
+def test_generate_without_dirt_cleans_without_losses():
+    df = generate_dirty_healthcare(1000, dirtiness={**CLEAN, "hospitals": 7})
+
+    cleaned = clean(df.astype("str"))
+
+    assert cleaned.notna().all().all()
+    assert cleaned["hospital"].nunique() <= 7
+
+
+def test_generate_dirtiness_knobs():
+    df = generate_dirty_healthcare(
+        2000,
+        dirtiness={**CLEAN, "bad_age_rate": 0.5, "invalid_test_result_rate": 0.5, "duplicate_people_rate": 0.5},
+    )
+
+    cleaned = clean(df.astype("str"))
+
+    assert 0.3 < cleaned["age"].isna().mean() < 0.7
+    assert 0.3 < cleaned["test_results"].isna().mean() < 0.7
+    assert df["Name"].nunique() < 1500
+
+
+def test_generate_rejects_unknown_knob():
+    with pytest.raises(ValueError, match="dirtiness"):
+        generate_dirty_healthcare(10, dirtiness={"typos": 0.1})
+
+
+def test_write_dirty_csv_in_chunks(tmp_path):
+    path = write_dirty_csv(tmp_path / "dirty.csv", 250, chunk_rows=100)
+
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    assert list(df.columns) == RAW_COLUMNS
+    assert len(df) == 250
+
+
+def test_run_benchmark_times_stages_and_counts_round_trips(tmp_path):
+    result = run_benchmark(200, tmp_path, methods=("copy", "batch"), memory=False)
+
+    assert [s["name"] for s in result["stages"]] == [
+        "read",
+        "clean",
+        "transform",
+        "load.copy",
+        "load.batch",
+    ]
+    assert result["loads"]["copy"]["copies"] > 0
+    assert result["loads"]["batch"]["copies"] == 0
+    assert result["loads"]["copy"]["round_trips"] > 0
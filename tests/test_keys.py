@@ -0,0 +1,112 @@
+import pandas as pd
+
+from src.keys import load_key_registry, new_key_state, save_key_registry
+from src.transform import transform
+
+
+def _make_df(rows):
+    columns = [
+        "name",
+        "age",
+        "gender",
+        "blood_type",
+        "medical_condition",
+        "date_of_admission",
+        "doctor",
+        "hospital",
+        "insurance_provider",
+        "billing_amount",
+        "room_number",
+        "admission_type",
+        "discharge_date",
+        "medication",
+        "test_results",
+    ]
+    return pd.DataFrame(rows, columns=columns)
+
+
+JOHN = ["John Doe", 30, "M", "O+", "Flu", "2024-01-01", "Dr. House", "General Hospital",
+        "Acme Health", 1000.0, 101, "Emergency", "2024-01-05", "Med A", "normal"]
+JANE = ["Jane Smith", 40, "F", "A-", "Cold", "2024-01-02", "Dr. Wilson", "City Clinic",
+        "Acme Health", 2000.0, 202, "Planned", "2024-01-07", "Med B", "abnormal"]
+MARY = ["Mary Major", 55, "F", "B+", "Flu", "2024-02-01", "Dr. Grey", "General Hospital",
+        "Other Health", 300.0, 303, "Urgent", "2024-02-03", "Med C", "inconclusive"]
+
+
+def test_registry_keeps_ids_stable_across_runs(tmp_path):
+    """
+    Ids assigned in one run should be reused in the next run even when the
+    input order changes, and new keys should continue after the highest id.
+    """
+    registry = tmp_path / "keys"
+
+    first_state = load_key_registry(registry)
+    first = transform(_make_df([JOHN, JANE]), key_state=first_state)
+    save_key_registry(first_state, registry)
+
+    second_state = load_key_registry(registry)
+    second = transform(_make_df([MARY, JANE, JOHN]), key_state=second_state)
+
+    def ids(result, table, key_col, id_col):
+        return dict(zip(result[table][key_col], result[table][id_col]))
+
+    first_people = ids(first, "people", "name", "person_id")
+    second_people = ids(second, "people", "name", "person_id")
+    assert second_people["John Doe"] == first_people["John Doe"]
+    assert second_people["Jane Smith"] == first_people["Jane Smith"]
+    assert second_people["Mary Major"] == 3
+
+    first_hospitals = ids(first, "hospitals", "hospital_name", "hospital_id")
+    second_hospitals = ids(second, "hospitals", "hospital_name", "hospital_id")
+    assert second_hospitals == first_hospitals
+
+    doctors = second["doctors"].set_index("doctor_name")
+    assert doctors.loc["Dr. Grey", "hospital_id"] == first_hospitals["General Hospital"]
+
+    # Every dimension row touched by the run is emitted, so a replace load
+    # still receives the full set of referenced rows.
+    assert len(second["people"]) == 3
+    # Admission ids are derived from the admission key, so rerunning an
+    # admission updates its row.
+    first_ids = first["admissions"]["admission_id"].tolist()
+    second_ids = second["admissions"]["admission_id"].tolist()
+    assert second_ids[1:] == first_ids[::-1]
+    assert second_ids[0] not in first_ids
+
+
+def test_transform_drops_exact_duplicates_and_rejects_key_conflicts():
+    """
+    A row repeating an admission key is dropped when it is an exact copy and
+    goes to rejects when its other values differ; without a key_state every
+    valid row is kept.
+    """
+    conflicting = JOHN[:9] + [1500.0, 909] + JOHN[11:]
+    rows = [JOHN, JANE, JOHN, conflicting]
+    key_state = new_key_state()
+
+    result = transform(_make_df(rows), key_state=key_state)
+
+    assert result["admissions"]["billing_amount"].tolist() == [1000.0, 2000.0]
+    assert result["admissions"]["admission_id"].nunique() == 2
+    [reject] = result["rejects"].to_dict("records")
+    assert reject["billing_amount"] == 1500.0
+    assert reject["reason"] == "admission_key_conflict"
+    assert reject["missing_columns"] == ""
+
+    # Later chunks of the run are checked against the rows already emitted.
+    next_chunk = transform(_make_df([JOHN, conflicting, MARY]), key_state=key_state)
+
+    assert next_chunk["admissions"]["billing_amount"].tolist() == [300.0]
+    assert next_chunk["rejects"]["reason"].tolist() == ["admission_key_conflict"]
+
+    plain = transform(_make_df(rows))
+
+    assert plain["admissions"]["admission_id"].tolist() == [1, 2, 3, 4]
+    assert plain["rejects"].empty
+
+
+def test_load_key_registry_missing_dir_is_empty(tmp_path):
+    state = load_key_registry(tmp_path / "missing")
+
+    assert state["ids"] == {}
+    assert state["emitted"] == {}
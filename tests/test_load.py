@@ -4,7 +4,7 @@ import pandas as pd
 import psycopg2
 import pytest
 
-from src.load import load
+from src.load import load, load_stream
 
 
 class FakeCursor:
@@ -18,6 +18,15 @@ class FakeCursor:
             raise psycopg2.Error("Simulated DB error")
         self.executed.append((sql, params))
 
+    def copy_expert(self, sql, file):
+        if self.fail_on_sql_substring and self.fail_on_sql_substring in sql:
+            raise psycopg2.Error("Simulated DB error")
+        self.executed.append((sql, file.read()))
+
+    def fetchone(self):
+        # An empty result: schema_version holds no migrations yet.
+        return None
+
     def close(self):
         self.closed = True
 
@@ -107,6 +116,8 @@ def _make_loaded_data(people_df: pd.DataFrame, rejects_df: pd.DataFrame | None =
                     "medication": "",
                     "test_results": "N/A",
                     "missing_columns": "age, billing_amount",
+                    "missing_bitmask": 256,
+                    "reason": "missing_columns",
                 }
             ]
         )
@@ -155,7 +166,7 @@ def test_load_happy_path_inserts_and_commits(monkeypatch):
 
     monkeypatch.setattr("src.load.psycopg2.connect", fake_connect)
 
-    load(loaded_data, "postgresql://test-db")
+    load(loaded_data, "postgresql://test-db", method="row", on_conflict="replace")
 
     assert any("CREATE TABLE IF NOT EXISTS people" in sql for sql, _ in fake_cursor.executed)
     assert any("TRUNCATE rejects" in sql for sql, _ in fake_cursor.executed)
@@ -211,7 +222,7 @@ def test_load_people_age_handling(monkeypatch):
 
     monkeypatch.setattr("src.load.psycopg2.connect", fake_connect)
 
-    load(loaded_data, "postgresql://test-db")
+    load(loaded_data, "postgresql://test-db", method="row")
 
     people_inserts = [
         params for sql, params in fake_cursor.executed if "INSERT INTO people" in sql
@@ -253,8 +264,754 @@ def test_load_rolls_back_on_db_error(monkeypatch):
 
     monkeypatch.setattr("src.load.psycopg2.connect", fake_connect)
 
-    load(loaded_data, "postgresql://test-db")
+    load(loaded_data, "postgresql://test-db", method="row")
 
     assert fake_conn.rollbacks == 1
     assert fake_cursor.closed
     assert fake_conn.closed
+
+
+def _copied(fake_cursor, table):
+    for sql, data in fake_cursor.executed:
+        if sql.startswith(f"COPY {table} "):
+            return sql, data
+    raise AssertionError(f"no COPY issued for {table}")
+
+
+def test_load_copy_is_default_and_streams_every_table(monkeypatch):
+    """
+    The default method should send exactly one COPY per table and no
+    per-row INSERTs.
+    """
+    people_df = pd.DataFrame(
+        [
+            {
+                "person_id": 1,
+                "name": "John Doe",
+                "age": 30,
+                "gender": "M",
+                "blood_type": "A+",
+            }
+        ]
+    )
+
+    loaded_data = _make_loaded_data(people_df)
+    fake_cursor = FakeCursor()
+    fake_conn = FakeConn(fake_cursor)
+
+    monkeypatch.setattr("src.load.psycopg2.connect", lambda dsn: fake_conn)
+
+    load(loaded_data, "postgresql://test-db", method="copy", on_conflict="replace")
+
+    copies = [sql for sql, _ in fake_cursor.executed if sql.startswith("COPY ")]
+    assert len(copies) == 9
+    assert not any(
+        "INSERT INTO" in sql and "schema_version" not in sql for sql, _ in fake_cursor.executed
+    )
+
+    _, people_data = _copied(fake_cursor, "people")
+    assert people_data == "1,John Doe,30,M,A+\n"
+
+    sql, admission_data = _copied(fake_cursor, "admission_data")
+    assert "FORMAT csv" in sql
+    assert admission_data == (
+        "500,1,10,100,200,400,300,2024-01-01 00:00:00,"
+        "2024-01-02 00:00:00,1234.56,101,Tylenol\n"
+    )
+
+    _, rejects_data = _copied(fake_cursor, "rejects")
+    assert rejects_data.startswith("Bad Row,unknown,X,O+,Unknown,\\N,")
+
+    assert fake_conn.rollbacks == 0
+    assert fake_conn.closed
+
+
+def test_load_copy_nulls_invalid_ages(monkeypatch):
+    people_df = pd.DataFrame(
+        {
+            "person_id": [1, 2, 3],
+            "name": ["Young", "Unknown Age", "Too Old"],
+            "age": [25, None, 150],
+            "gender": ["M", "F", "F"],
+            "blood_type": ["O+", "A-", "B+"],
+        }
+    )
+
+    loaded_data = _make_loaded_data(people_df)
+    fake_cursor = FakeCursor()
+    fake_conn = FakeConn(fake_cursor)
+
+    monkeypatch.setattr("src.load.psycopg2.connect", lambda dsn: fake_conn)
+
+    load(loaded_data, "postgresql://test-db", method="copy", on_conflict="replace")
+
+    _, people_data = _copied(fake_cursor, "people")
+    assert people_data.splitlines() == [
+        "1,Young,25,M,O+",
+        "2,Unknown Age,\\N,F,A-",
+        "3,Too Old,\\N,F,B+",
+    ]
+
+
+def test_load_copy_rolls_back_on_db_error(monkeypatch):
+    people_df = pd.DataFrame(
+        [
+            {
+                "person_id": 1,
+                "name": "Error Person",
+                "age": 40,
+                "gender": "M",
+                "blood_type": "AB+",
+            }
+        ]
+    )
+
+    loaded_data = _make_loaded_data(people_df)
+    fake_cursor = FakeCursor(fail_on_sql_substring="COPY admission_data")
+    fake_conn = FakeConn(fake_cursor)
+
+    monkeypatch.setattr("src.load.psycopg2.connect", lambda dsn: fake_conn)
+
+    load(loaded_data, "postgresql://test-db", method="copy", on_conflict="replace")
+
+    assert fake_conn.rollbacks == 1
+    assert fake_conn.closed
+
+
+def test_load_rejects_unknown_method():
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "A", "age": 1, "gender": "M", "blood_type": "O+"}]
+    )
+
+    with pytest.raises(ValueError, match="Unsupported load method"):
+        load(_make_loaded_data(people_df), "postgresql://test-db", method="bogus")
+
+
+def test_copy_stream_serializes_in_slices():
+    from src.load import _CopyStream
+
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", None, "z"]})
+    columns = {"a": "int", "b": "text"}
+
+    stream = _CopyStream(df, columns, chunk_rows=1)
+    pieces = []
+    while True:
+        data = stream.read(3)
+        if not data:
+            break
+        assert len(data) <= 3
+        pieces.append(data)
+
+    assert "".join(pieces) == "1,x\n2,\\N\n3,z\n"
+
+
+def test_load_batch_groups_rows_per_round_trip(monkeypatch):
+    """
+    batch mode should send ceil(rows / batch_size) multi-row upserts per
+    table and report the total statement count.
+    """
+    people_df = pd.DataFrame(
+        {
+            "person_id": [1, 2, 3],
+            "name": ["Young", "Unknown Age", "Too Old"],
+            "age": [25, None, 150],
+            "gender": ["M", "F", "F"],
+            "blood_type": ["O+", "A-", "B+"],
+        }
+    )
+
+    loaded_data = _make_loaded_data(people_df)
+    fake_cursor = FakeCursor()
+    fake_conn = FakeConn(fake_cursor)
+
+    monkeypatch.setattr("src.load.psycopg2.connect", lambda dsn: fake_conn)
+
+    stats = load(
+        loaded_data,
+        "postgresql://test-db",
+        method="batch",
+        batch_size=2,
+        on_conflict="replace",
+    )
+
+    people_inserts = [
+        (sql, params)
+        for sql, params in fake_cursor.executed
+        if "INSERT INTO people" in sql
+    ]
+    assert len(people_inserts) == 2
+    first_sql, first_params = people_inserts[0]
+    assert first_sql.count("(%s, %s, %s, %s, %s)") == 2
+    assert "ON CONFLICT (person_id) DO UPDATE" in first_sql
+    assert first_params == [1, "Young", 25, "M", "O+", 2, "Unknown Age", None, "F", "A-"]
+    assert people_inserts[1][1] == [3, "Too Old", None, "F", "B+"]
+
+    rejects_sql = [sql for sql, _ in fake_cursor.executed if "INSERT INTO rejects" in sql]
+    assert len(rejects_sql) == 1
+    assert "ON CONFLICT" not in rejects_sql[0]
+
+    assert stats["method"] == "batch"
+    assert stats["round_trips"] == len(fake_cursor.executed)
+    assert stats["rows"]["people"] == 3
+    assert fake_conn.rollbacks == 0
+
+
+def test_load_upsert_stages_and_merges_without_truncate(monkeypatch):
+    """
+    upsert mode should leave existing rows in place: every table is copied
+    into a temp staging table and merged with one set-based statement.
+    """
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+
+    loaded_data = _make_loaded_data(people_df)
+    fake_cursor = FakeCursor()
+    fake_conn = FakeConn(fake_cursor)
+
+    monkeypatch.setattr("src.load.psycopg2.connect", lambda dsn: fake_conn)
+
+    stats = load(loaded_data, "postgresql://test-db", method="copy", on_conflict="upsert")
+
+    executed = [sql for sql, _ in fake_cursor.executed]
+    assert not any("TRUNCATE" in sql for sql in executed)
+
+    stage_idx = executed.index(
+        "CREATE TEMP TABLE _stage_people ON COMMIT DROP AS "
+        "SELECT person_id, name, age, gender, blood_type FROM people WITH NO DATA"
+    )
+    assert executed[stage_idx + 1].startswith("COPY _stage_people ")
+
+    merge_sql = executed[stage_idx + 2]
+    assert merge_sql.startswith("INSERT INTO people (person_id, name, age, gender, blood_type) SELECT")
+    assert "FROM _stage_people ORDER BY person_id ON CONFLICT (person_id) DO UPDATE" in merge_sql
+    assert (
+        "WHERE (people.name, people.age, people.gender, people.blood_type) "
+        "IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.age, EXCLUDED.gender, EXCLUDED.blood_type)"
+    ) in merge_sql
+
+    rejects_merge = [sql for sql in executed if sql.startswith("INSERT INTO rejects")]
+    assert len(rejects_merge) == 1
+    assert "WHERE NOT EXISTS" in rejects_merge[0]
+    assert "WHERE t.row_hash = md5(coalesce(s.name, '') || '|' || " in rejects_merge[0]
+
+    assert stats["on_conflict"] == "upsert"
+    assert fake_conn.rollbacks == 0
+
+
+def test_load_rejects_unknown_on_conflict_mode():
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "A", "age": 1, "gender": "M", "blood_type": "O+"}]
+    )
+
+    with pytest.raises(ValueError, match="Unsupported on_conflict mode"):
+        load(_make_loaded_data(people_df), "postgresql://test-db", on_conflict="merge")
+
+
+def _make_admissions(n):
+    return pd.DataFrame(
+        {
+            "admission_id": range(1, n + 1),
+            "person_id": 1,
+            "doctor_id": 10,
+            "condition_id": 100,
+            "insurance_id": 200,
+            "admission_type_id": 400,
+            "test_result_id": 300,
+            "date_of_admission": pd.Timestamp("2024-01-01"),
+            "discharge_date": pd.Timestamp("2024-01-02"),
+            "billing_amount": 10.0,
+            "room_number": 101,
+            "medication": "Tylenol",
+        }
+    )
+
+
+def test_load_parallel_stages_shards_and_swaps_in_fk_order(monkeypatch):
+    """
+    With workers > 1 every table is staged over worker connections,
+    admission_data is split into key-range shards, and the coordinator
+    swaps the staged rows into the targets in foreign-key order.
+    """
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    loaded_data = _make_loaded_data(people_df)
+    loaded_data["admissions"] = _make_admissions(6)
+
+    conns = []
+
+    def fake_connect(dsn):
+        conn = FakeConn(FakeCursor())
+        conns.append(conn)
+        return conn
+
+    monkeypatch.setattr("src.load.psycopg2.connect", fake_connect)
+
+    stats = load(
+        loaded_data,
+        "postgresql://test-db",
+        method="copy",
+        batch_size=2,
+        on_conflict="replace",
+        workers=3,
+    )
+
+    coordinator, *worker_conns = conns
+    assert len(worker_conns) == 3
+    assert all(c.closed for c in conns)
+
+    worker_copies = [
+        data
+        for c in worker_conns
+        for sql, data in c._cursor.executed
+        if sql.startswith("COPY _stage_admission_data_")
+    ]
+    assert len(worker_copies) == 3
+    first_ids = sorted(int(data.split(",", 1)[0]) for data in worker_copies)
+    assert first_ids == [1, 3, 5]
+
+    executed = [sql for sql, _ in coordinator._cursor.executed if "schema_version" not in sql]
+    assert not any(sql.startswith("COPY ") for sql in executed)
+    swaps = [sql.split()[2] for sql in executed if sql.startswith("INSERT INTO ")]
+    assert swaps.index("hospitals") < swaps.index("doctors")
+    assert swaps.index("doctors") < swaps.index("admission_data")
+    truncate_idx = next(i for i, sql in enumerate(executed) if "TRUNCATE rejects" in sql)
+    first_swap_idx = next(i for i, sql in enumerate(executed) if sql.startswith("INSERT INTO "))
+    assert truncate_idx < first_swap_idx
+    assert executed[-1].startswith("DROP TABLE _stage_people")
+
+    assert stats["workers"] == 3
+    assert coordinator.rollbacks == 0
+
+
+def test_parallel_loads_use_their_own_staging_tables(monkeypatch):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    loaded_data = _make_loaded_data(people_df)
+    coordinators = []
+
+    def fake_connect(dsn):
+        conn = FakeConn(FakeCursor())
+        coordinators.append(conn)
+        return conn
+
+    monkeypatch.setattr("src.load.psycopg2.connect", fake_connect)
+
+    staging = []
+    for _ in range(2):
+        coordinators.clear()
+        load(loaded_data, "postgresql://test-db", method="copy", workers=2)
+        staging.append(
+            {
+                sql.split()[2]
+                for sql, _ in coordinators[0]._cursor.executed
+                if sql.startswith("CREATE TABLE _stage_")
+            }
+        )
+
+    assert len(staging[0]) == len(staging[1]) == 9
+    assert not staging[0] & staging[1]
+
+
+def test_load_parallel_failure_leaves_targets_untouched(monkeypatch):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    loaded_data = _make_loaded_data(people_df)
+
+    conns = []
+
+    def fake_connect(dsn):
+        cursor = FakeCursor(fail_on_sql_substring="COPY _stage_doctors")
+        conn = FakeConn(cursor if conns else FakeCursor())
+        conns.append(conn)
+        return conn
+
+    monkeypatch.setattr("src.load.psycopg2.connect", fake_connect)
+
+    stats = load(
+        loaded_data,
+        "postgresql://test-db",
+        method="copy",
+        on_conflict="replace",
+        workers=2,
+    )
+
+    assert stats is None
+    coordinator = conns[0]
+    executed = [sql for sql, _ in coordinator._cursor.executed if "schema_version" not in sql]
+    assert not any("TRUNCATE" in sql for sql in executed)
+    assert not any(sql.startswith("INSERT INTO ") for sql in executed)
+    assert executed[-1].startswith("DROP TABLE IF EXISTS _stage_people")
+    assert coordinator.rollbacks >= 1
+    assert all(c.closed for c in conns)
+
+
+def test_load_stream_uses_one_connection_and_commits_once(monkeypatch):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    first = _make_loaded_data(people_df)
+    second = _make_loaded_data(
+        pd.DataFrame(
+            [{"person_id": 2, "name": "Jane Roe", "age": 41, "gender": "F", "blood_type": "B+"}]
+        )
+    )
+
+    conns = []
+
+    def fake_connect(dsn):
+        conn = FakeConn(FakeCursor())
+        conns.append(conn)
+        return conn
+
+    monkeypatch.setattr("src.load.psycopg2.connect", fake_connect)
+
+    stats = load_stream(
+        iter([first, second]),
+        "postgresql://test-db",
+        method="copy",
+        on_conflict="replace",
+    )
+
+    assert len(conns) == 1
+    executed = [sql for sql, _ in conns[0]._cursor.executed]
+    assert sum("TRUNCATE rejects" in sql for sql in executed) == 1
+    assert sum(sql.startswith("COPY people ") for sql in executed) == 2
+    # create tables + truncate + final commit
+    assert conns[0].commits == 3
+    assert stats["chunks"] == 2
+    assert stats["rows"]["people"] == 2
+
+
+class FakeStateCursor(FakeCursor):
+    """
+    FakeCursor that keeps etl_load_state rows the way the server would:
+    writes become visible to later loads only once committed. The cursor
+    fails on the fail_on_copy-th COPY into admission_data.
+    """
+
+    def __init__(self, state: dict, fail_on_copy: int | None = None):
+        super().__init__()
+        self.state = state
+        self.pending = dict(state)
+        self.fail_on_copy = fail_on_copy
+        self.admission_copies = 0
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        if sql.startswith("INSERT INTO etl_load_state"):
+            load_id, table, rows_done, completed = params
+            self.pending[(load_id, table)] = (rows_done, completed)
+        elif sql.startswith("SELECT table_name, rows_done, completed FROM etl_load_state"):
+            self._rows = [
+                (table, *value) for (load_id, table), value in self.state.items()
+                if load_id == params[0]
+            ]
+        elif sql.startswith("DELETE FROM etl_load_state"):
+            self.pending = {k: v for k, v in self.pending.items() if k[0] != params[0]}
+
+    def copy_expert(self, sql, file):
+        if sql.startswith("COPY admission_data "):
+            self.admission_copies += 1
+            if self.admission_copies == self.fail_on_copy:
+                raise psycopg2.Error("Simulated DB error")
+        super().copy_expert(sql, file)
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeStateConn(FakeConn):
+    def commit(self):
+        super().commit()
+        self._cursor.state.clear()
+        self._cursor.state.update(self._cursor.pending)
+
+    def rollback(self):
+        super().rollback()
+        self._cursor.pending = dict(self._cursor.state)
+
+
+def _checkpointed_load(
+    monkeypatch,
+    loaded_data,
+    state,
+    fail_on_copy=None,
+    method="copy",
+    on_conflict="replace",
+    load_id="run-1",
+):
+    cursor = FakeStateCursor(state, fail_on_copy)
+    monkeypatch.setattr("src.load.psycopg2.connect", lambda dsn: FakeStateConn(cursor))
+    stats = load(
+        loaded_data,
+        "postgresql://test-db",
+        method=method,
+        batch_size=2,
+        on_conflict=on_conflict,
+        workers=1,
+        checkpoint_every=2,
+        load_id=load_id,
+    )
+    return stats, cursor
+
+
+def test_load_checkpoints_every_n_batches(monkeypatch):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    loaded_data = {**_make_loaded_data(people_df), "admissions": _make_admissions(10)}
+
+    stats, cursor = _checkpointed_load(monkeypatch, loaded_data, {})
+
+    watermarks = [
+        params[2:] for sql, params in cursor.executed
+        if sql.startswith("INSERT INTO etl_load_state") and params[1] == "admission_data"
+    ]
+    # Registered at 0, committed after batches 2 and 4, then completed.
+    assert watermarks == [(0, False), (4, False), (8, False), (10, True)]
+    assert cursor.admission_copies == 5
+    assert stats["resumed"] == {}
+    # A finished load leaves no state behind.
+    assert cursor.state == {}
+
+
+def test_load_resumes_from_last_checkpoint_after_failure(monkeypatch):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    loaded_data = {**_make_loaded_data(people_df), "admissions": _make_admissions(10)}
+    state = {}
+
+    stats, _ = _checkpointed_load(monkeypatch, loaded_data, state, fail_on_copy=4)
+
+    assert stats is None
+    assert state[("run-1", "people")] == (1, True)
+    assert state[("run-1", "admission_data")] == (4, False)
+
+    stats, cursor = _checkpointed_load(monkeypatch, loaded_data, state)
+
+    executed = [sql for sql, _ in cursor.executed]
+    assert not any(sql.lstrip().startswith("TRUNCATE") for sql in executed)
+    assert not any(sql.startswith("COPY people ") for sql in executed)
+    first_copy = next(data for sql, data in cursor.executed if sql.startswith("COPY admission_data "))
+    assert first_copy.startswith("5,")
+    assert cursor.admission_copies == 3
+    assert stats["resumed"] == {"admission_data": 4}
+    assert cursor.state == {}
+
+
+def test_default_load_id_changes_when_rows_are_reordered(monkeypatch):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    admissions = _make_admissions(10)
+    loaded_data = {**_make_loaded_data(people_df), "admissions": admissions}
+    reordered = {**loaded_data, "admissions": admissions.iloc[::-1].reset_index(drop=True)}
+
+    first, _ = _checkpointed_load(monkeypatch, loaded_data, {}, load_id=None)
+    again, _ = _checkpointed_load(monkeypatch, loaded_data, {}, load_id=None)
+    other, _ = _checkpointed_load(monkeypatch, reordered, {}, load_id=None)
+
+    assert again["load_id"] == first["load_id"]
+    assert other["load_id"] != first["load_id"]
+
+
+def test_checkpointed_batch_upsert_merges_rejects(monkeypatch):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+
+    stats, cursor = _checkpointed_load(
+        monkeypatch, _make_loaded_data(people_df), {}, method="batch", on_conflict="upsert"
+    )
+
+    executed = [sql for sql, _ in cursor.executed]
+    assert stats is not None
+    assert any(sql.startswith("INSERT INTO _stage_rejects ") for sql in executed)
+    rejects = [sql for sql in executed if sql.startswith("INSERT INTO rejects ")]
+    assert len(rejects) == 1
+    assert "WHERE NOT EXISTS" in rejects[0]
+    # Keyed tables still upsert straight into the target.
+    assert any(
+        sql.startswith("INSERT INTO people ") and "ON CONFLICT (person_id)" in sql
+        for sql in executed
+    )
+
+
+class FakeIndexCursor(FakeCursor):
+    """FakeCursor whose catalog query reports one secondary index."""
+
+    INDEX = (
+        "admission_data_room_idx",
+        "CREATE INDEX admission_data_room_idx ON public.admission_data USING btree (room_number)",
+    )
+
+    def fetchall(self):
+        return [self.INDEX]
+
+
+def _bulk_load(monkeypatch, bulk_load, workers=1):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    loaded_data = {**_make_loaded_data(people_df), "admissions": _make_admissions(4)}
+    conns = []
+
+    def fake_connect(dsn):
+        conn = FakeConn(FakeIndexCursor())
+        conns.append(conn)
+        return conn
+
+    monkeypatch.setattr("src.load.psycopg2.connect", fake_connect)
+    stats = load(
+        loaded_data,
+        "postgresql://test-db",
+        method="copy",
+        batch_size=2,
+        on_conflict="replace",
+        workers=workers,
+        bulk_load=bulk_load,
+    )
+    return stats, conns
+
+
+def test_load_bulk_profile_defers_fks_and_rebuilds_indexes(monkeypatch):
+    stats, [conn] = _bulk_load(
+        monkeypatch,
+        {
+            "foreign_keys": "defer",
+            "rebuild_indexes": True,
+            "analyze": True,
+            "session": {"synchronous_commit": "off", "work_mem": "256MB"},
+        },
+    )
+
+    assert stats is not None
+    executed = [(sql.strip(), params) for sql, params in conn._cursor.executed]
+    sqls = [sql for sql, _ in executed]
+
+    def first(prefix):
+        return next(i for i, sql in enumerate(sqls) if sql.startswith(prefix))
+
+    settings = [params for sql, params in executed if sql.startswith("SELECT set_config")]
+    assert settings == [("synchronous_commit", "off"), ("work_mem", "256MB")]
+    # The foreign keys are made deferrable by a migration, not by the load.
+    assert not any("ALTER CONSTRAINT" in sql for sql in sqls[first("SELECT set_config"):])
+    assert first("SET CONSTRAINTS ALL DEFERRED") < first("COPY people ")
+    assert first("DROP INDEX admission_data_room_idx") < first("COPY admission_data ")
+    assert first(FakeIndexCursor.INDEX[1]) > first("COPY rejects ")
+    assert first("ANALYZE admission_data") > first(FakeIndexCursor.INDEX[1])
+
+
+def test_load_bulk_profile_drops_and_recreates_fks(monkeypatch):
+    _, [conn] = _bulk_load(monkeypatch, {"foreign_keys": "drop"})
+
+    sqls = [sql.strip() for sql, _ in conn._cursor.executed]
+    drop = sqls.index("ALTER TABLE doctors DROP CONSTRAINT IF EXISTS doctors_hospital_id_fkey")
+    add = sqls.index(
+        "ALTER TABLE doctors ADD CONSTRAINT doctors_hospital_id_fkey "
+        "FOREIGN KEY (hospital_id) REFERENCES hospitals(hospital_id) "
+        "DEFERRABLE INITIALLY IMMEDIATE"
+    )
+    copies = [i for i, sql in enumerate(sqls) if sql.startswith("COPY ")]
+    assert drop < copies[0] and copies[-1] < add
+    assert sum("ADD CONSTRAINT" in sql for sql in sqls) == 7
+    assert not any(sql.startswith(("DROP INDEX", "ANALYZE", "SELECT set_config")) for sql in sqls)
+
+
+def test_load_bulk_profile_stages_parallel_loads_unlogged(monkeypatch):
+    _, conns = _bulk_load(
+        monkeypatch,
+        {"unlogged_staging": True, "session": {"work_mem": "64MB"}},
+        workers=2,
+    )
+
+    coordinator, *workers = conns
+    assert any(
+        sql.startswith("CREATE UNLOGGED TABLE _stage_admission_data")
+        for sql, _ in coordinator._cursor.executed
+    )
+    for conn in conns:
+        assert ("SELECT set_config(%s, %s, false)", ("work_mem", "64MB")) in conn._cursor.executed
+
+
+def test_load_rejects_unknown_bulk_load_option():
+    with pytest.raises(ValueError, match="bulk_load"):
+        load({}, "postgresql://test-db", bulk_load={"fsync": False})
+
+
+class PartitionedCursor(FakeCursor):
+    """FakeCursor over an already partitioned admission_data."""
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        self.last_sql = sql
+
+    def fetchone(self):
+        return ("p",) if "pg_class" in self.last_sql else None
+
+
+def _partitioned_load(monkeypatch, on_conflict, method="copy"):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    admissions_df = _make_admissions(4)
+    admissions_df["date_of_admission"] = [
+        pd.Timestamp("2024-01-03"),
+        pd.Timestamp("2024-01-31 23:00"),
+        pd.Timestamp("2024-03-01"),
+        pd.Timestamp("2024-03-15"),
+    ]
+    loaded_data = {**_make_loaded_data(people_df), "admissions": admissions_df}
+    fake_cursor = PartitionedCursor()
+    monkeypatch.setattr("src.load.psycopg2.connect", lambda dsn: FakeConn(fake_cursor))
+
+    stats = load(
+        loaded_data,
+        "postgresql://test-db",
+        method=method,
+        batch_size=10,
+        on_conflict=on_conflict,
+        workers=2,
+        partitioning={"enabled": True, "interval": "month"},
+    )
+    return stats, [sql.strip() for sql, _ in fake_cursor.executed]
+
+
+def test_load_partitioned_replace_reloads_only_touched_partitions(monkeypatch):
+    stats, sqls = _partitioned_load(monkeypatch, "replace")
+
+    assert stats["workers"] == 1
+    assert stats["partitions"] == ["admission_data_p2024_01", "admission_data_p2024_03"]
+    assert [sql for sql in sqls if sql.startswith("TRUNCATE")] == [
+        "TRUNCATE admission_data_p2024_01",
+        "TRUNCATE admission_data_p2024_03",
+    ]
+    copies = [sql.split()[1] for sql in sqls if sql.startswith("COPY ")]
+    assert "admission_data" not in copies
+    assert copies[-2:] == ["admission_data_p2024_01", "admission_data_p2024_03"]
+    # Dimensions are merged, never truncated, so older partitions keep their references.
+    assert "_stage_people" in copies
+    assert any(
+        "PARTITION OF admission_data FOR VALUES FROM ('2024-03-01') TO ('2024-04-01')" in sql
+        for sql in sqls
+    )
+
+
+def test_load_partitioned_upsert_merges_on_partition_key(monkeypatch):
+    stats, sqls = _partitioned_load(monkeypatch, "upsert", method="batch")
+
+    merges = [sql for sql in sqls if sql.startswith("INSERT INTO admission_data_p")]
+    assert len(merges) == 2
+    assert all("ON CONFLICT (admission_id, date_of_admission) DO UPDATE" in sql for sql in merges)
+    assert not any(sql.startswith("TRUNCATE") for sql in sqls)
+
+
+def test_load_rejects_unknown_partition_interval():
+    with pytest.raises(ValueError, match="partition interval"):
+        load({}, "postgresql://test-db", partitioning={"enabled": True, "interval": "week"})
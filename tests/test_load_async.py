@@ -0,0 +1,168 @@
+import asyncio
+import contextlib
+
+import pandas as pd
+import pytest
+
+from src.load import load
+from src.load_async import _insert_values_sql, _pipelined
+from tests.test_load import FakeConn, FakeCursor, _make_admissions, _make_loaded_data
+
+
+class FakeAsyncConn:
+    """asyncpg-like connection that records statements and COPY payloads."""
+
+    def __init__(self, fail_on_sql_substring=None):
+        self.executed = []
+        self.transactions = 0
+        self.closed = False
+        self.fail_on_sql_substring = fail_on_sql_substring
+
+    def _check(self, sql):
+        if self.fail_on_sql_substring and self.fail_on_sql_substring in sql:
+            raise OSError("Simulated connection reset")
+
+    async def execute(self, sql, *args):
+        self._check(sql)
+        if len(args) > 32767:
+            raise OSError("the number of query arguments cannot exceed 32767")
+        await asyncio.sleep(0)
+        self.executed.append((sql, args))
+
+    async def copy_to_table(self, table, *, source, columns, format, null):
+        self._check(f"COPY {table}")
+        data = b"".join([chunk async for chunk in source])
+        self.executed.append((f"COPY {table}", data.decode("utf-8")))
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    async def close(self):
+        self.closed = True
+
+
+def _async_load(
+    monkeypatch,
+    method="copy",
+    workers=2,
+    fail_on=None,
+    admissions=6,
+    batch_size=2,
+    fail_connect=None,
+):
+    people_df = pd.DataFrame(
+        [{"person_id": 1, "name": "John Doe", "age": 30, "gender": "M", "blood_type": "A+"}]
+    )
+    loaded_data = {**_make_loaded_data(people_df), "admissions": _make_admissions(admissions)}
+    coordinator = FakeConn(FakeCursor())
+    async_conns = []
+
+    async def fake_connect(db_url):
+        if fail_connect is not None and len(async_conns) == fail_connect:
+            async_conns.append(None)
+            raise OSError("Simulated connection refused")
+        conn = FakeAsyncConn(fail_on)
+        async_conns.append(conn)
+        return conn
+
+    monkeypatch.setattr("src.load.psycopg2.connect", lambda dsn: coordinator)
+    monkeypatch.setattr("src.load_async._connect", fake_connect)
+
+    stats = load(
+        loaded_data,
+        "postgresql://test-db",
+        method=method,
+        batch_size=batch_size,
+        on_conflict="replace",
+        workers=workers,
+        backend="async",
+    )
+    return stats, coordinator, async_conns
+
+
+def test_async_backend_stages_on_async_connections_and_swaps_on_coordinator(monkeypatch):
+    stats, coordinator, async_conns = _async_load(monkeypatch)
+
+    assert stats["backend"] == "async"
+    assert len(async_conns) == 2
+    assert all(conn.closed for conn in async_conns)
+    copies = [data for conn in async_conns for sql, data in conn.executed if sql.startswith("COPY _stage_admission_data_")]
+    assert sorted(int(data.split(",", 1)[0]) for data in copies) == [1, 4]
+
+    executed = [sql for sql, _ in coordinator._cursor.executed if "schema_version" not in sql]
+    assert not any(sql.startswith("COPY ") for sql in executed)
+    swaps = [sql.split()[2] for sql in executed if sql.startswith("INSERT INTO ")]
+    assert swaps.index("doctors") < swaps.index("admission_data")
+    assert coordinator.commits >= 2
+
+
+def test_async_backend_batches_use_numbered_placeholders(monkeypatch):
+    stats, _, async_conns = _async_load(monkeypatch, method="batch", workers=1)
+
+    [conn] = async_conns
+    inserts = [(sql, args) for sql, args in conn.executed if sql.startswith("INSERT INTO _stage_admission_data")]
+    assert [len(args) for _, args in inserts] == [24, 24, 24]
+    assert inserts[0][0].endswith("($13, $14, $15, $16, $17, $18, $19, $20, $21, $22, $23, $24)")
+    assert stats["workers"] == 1
+
+
+def test_async_backend_batches_stay_under_the_parameter_limit(monkeypatch):
+    stats, _, async_conns = _async_load(
+        monkeypatch, method="batch", workers=1, admissions=6000, batch_size=5000
+    )
+
+    [conn] = async_conns
+    inserts = [args for sql, args in conn.executed if sql.startswith("INSERT INTO _stage_admission_data")]
+    # 12 columns: at most 32767 // 12 = 2730 rows per statement.
+    assert [len(args) // 12 for args in inserts] == [2730, 2730, 540]
+    assert stats is not None
+
+
+def test_async_backend_failure_rolls_back_and_drops_staging(monkeypatch):
+    stats, coordinator, async_conns = _async_load(monkeypatch, fail_on="_stage_doctors")
+
+    assert stats is None
+    executed = [sql for sql, _ in coordinator._cursor.executed if "schema_version" not in sql]
+    assert not any("TRUNCATE" in sql or sql.startswith("INSERT INTO ") for sql in executed)
+    assert executed[-1].startswith("DROP TABLE IF EXISTS _stage_people")
+    assert all(conn.closed for conn in async_conns)
+
+
+def test_async_backend_closes_opened_connections_when_one_fails_to_open(monkeypatch):
+    stats, _, async_conns = _async_load(monkeypatch, workers=3, fail_connect=1)
+
+    assert stats is None
+    opened = [conn for conn in async_conns if conn is not None]
+    assert len(opened) == 2
+    assert all(conn.closed for conn in opened)
+
+
+def test_pipelined_serializes_ahead_and_keeps_order():
+    started = []
+
+    def serialize(item):
+        started.append(item)
+        return item * 10
+
+    async def consume():
+        out = []
+        async for value in _pipelined([1, 2, 3], serialize):
+            # The next item is already being serialized while this one is handled.
+            await asyncio.sleep(0.01)
+            out.append((value, len(started)))
+        return out
+
+    assert asyncio.run(consume()) == [(10, 2), (20, 3), (30, 3)]
+
+
+def test_insert_values_sql_numbers_every_parameter():
+    assert _insert_values_sql("t", {"a": "int", "b": "text"}, 2) == (
+        "INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)"
+    )
+
+
+def test_load_rejects_unknown_backend():
+    with pytest.raises(ValueError, match="backend"):
+        load({}, "postgresql://test-db", backend="trio")
@@ -0,0 +1,103 @@
+import json
+import logging
+
+import src.logger as logger_module
+from src.logger import JsonFormatter, RepeatedWarningFilter, get_logger
+
+
+def _record(msg, *args, level=logging.WARNING, name="src.test", rate_limit=True):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    if rate_limit is not None:
+        record.rate_limit = rate_limit
+    return record
+
+
+def test_repeated_warnings_are_counted_not_written():
+    warning_filter = RepeatedWarningFilter(interval=60)
+
+    passed = [
+        warning_filter.filter(_record("Invalid age %s for person %s", age, "x"))
+        for age in range(1000)
+    ]
+
+    assert passed.count(True) == 1
+    [summary] = warning_filter.flush()
+    assert summary.suppressed == 999
+    assert summary.getMessage() == "999 more warning(s) like: Invalid age 999 for person x"
+    assert warning_filter.flush() == []
+
+
+def test_repeated_warning_after_interval_carries_suppressed_count():
+    warning_filter = RepeatedWarningFilter(interval=0)
+    warning_filter.filter(_record("bad value %s", 1))
+    warning_filter._seen[("src.test", "bad value %s", True)][1] = 5
+
+    record = _record("bad value %s", 2)
+    assert warning_filter.filter(record)
+    assert record.suppressed == 5
+    assert record.getMessage() == "bad value 2 [5 similar warning(s) suppressed]"
+
+
+def test_other_levels_and_templates_are_not_limited():
+    warning_filter = RepeatedWarningFilter(interval=60)
+
+    assert all(warning_filter.filter(_record("step %s", i, level=logging.INFO)) for i in range(3))
+    assert all(warning_filter.filter(_record("error %s", i, level=logging.ERROR)) for i in range(3))
+    assert warning_filter.filter(_record("first template"))
+    assert warning_filter.filter(_record("second template"))
+
+
+def test_only_opted_in_warnings_are_limited_per_key():
+    warning_filter = RepeatedWarningFilter(interval=60)
+
+    assert all(warning_filter.filter(_record("plain %s", i, rate_limit=None)) for i in range(3))
+    for _ in range(3):
+        for col in ("age", "billing_amount"):
+            warning_filter.filter(_record("Column %s: bad value(s)", col, rate_limit=col))
+
+    summaries = sorted(summary.getMessage() for summary in warning_filter.flush())
+    assert summaries == [
+        "2 more warning(s) like: Column age: bad value(s)",
+        "2 more warning(s) like: Column billing_amount: bad value(s)",
+    ]
+
+
+def test_json_formatter_includes_extra_fields():
+    record = _record("Loaded %d rows", 5, level=logging.INFO)
+    record.table = "people"
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Loaded 5 rows"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "src.test"
+    assert entry["table"] == "people"
+    assert "rate_limit" not in entry
+
+
+def test_get_logger_enqueues_and_flush_writes_through(tmp_path):
+    logger = get_logger("src.test_logger")
+    [handler] = logger.handlers
+    assert isinstance(handler, logging.handlers.QueueHandler)
+
+    captured = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            captured.append(record.getMessage())
+
+    capture = Capture()
+    logger_module._listener.handlers += (capture,)
+    try:
+        for i in range(50):
+            logger.warning("queued warning %d", i, extra={"rate_limit": True})
+        logger_module.flush()
+    finally:
+        logger_module._listener.handlers = tuple(
+            h for h in logger_module._listener.handlers if h is not capture
+        )
+
+    assert [msg for msg in captured if "queued warning" in msg] == [
+        "queued warning 0",
+        "49 more warning(s) like: queued warning 49",
+    ]
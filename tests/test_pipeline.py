@@ -0,0 +1,137 @@
+import pandas as pd
+
+import src.pipeline as pipeline
+from src.keys import new_key_state
+from src.pipeline import run_sources
+
+
+def _write_source(tmp_path, name, names, admitted="2024-01-01"):
+    n = len(names)
+    df = pd.DataFrame(
+        {
+            "Name": names,
+            "Age": ["30"] * n,
+            "Gender": ["m"] * n,
+            "Blood Type": ["o+"] * n,
+            "Medical Condition": ["flu"] * n,
+            "Date of Admission": [admitted] * n,
+            "Doctor": ["dr house"] * n,
+            "Hospital": ["general"] * n,
+            "Insurance Provider": ["acme"] * n,
+            "Billing Amount": ["100"] * n,
+            "Room Number": ["101"] * n,
+            "Admission Type": ["Emergency"] * n,
+            "Discharge Date": ["2024-01-05"] * n,
+            "Medication": ["Med A"] * n,
+            "Test Results": ["Normal"] * n,
+        }
+    )
+    path = tmp_path / f"{name}.csv"
+    df.to_csv(path, index=False)
+    return {"name": name, "type": "csv", "path": str(path)}
+
+
+def _record_loads(monkeypatch):
+    calls = []
+
+    def fake_load(loaded_data, db_url, **options):
+        calls.append((loaded_data, options))
+        return {"rows": {"admission_data": len(loaded_data["admissions"])}}
+
+    monkeypatch.setattr(pipeline, "load", fake_load)
+    return calls
+
+
+def test_run_sources_reports_failures_without_aborting(tmp_path, monkeypatch):
+    calls = _record_loads(monkeypatch)
+    sources = [
+        _write_source(tmp_path, "first", ["john doe", "jane smith"]),
+        {"name": "broken", "type": "csv", "path": str(tmp_path / "missing.csv")},
+        _write_source(tmp_path, "second", ["mary major", "john doe"], admitted="2024-02-01"),
+    ]
+
+    reports = run_sources(sources, "postgresql://test", new_key_state(), processes=2)
+
+    assert [r["status"] for r in reports] == ["ok", "failed", "ok"]
+    assert reports[1]["stage"] == "read_clean"
+    assert reports[2]["rows"] == {"admission_data": 2}
+    assert set(reports[0]["seconds"]) == {"read_clean", "transform", "load"}
+
+    # Both loaded sources drew ids from the same key state: John Doe keeps
+    # his id, new keys continue the sequence, and each source carries every
+    # person it references so its load stands on its own.
+    first, second = calls[0][0], calls[1][0]
+    first_people = dict(zip(first["people"]["name"], first["people"]["person_id"]))
+    assert second["people"][["name", "person_id"]].values.tolist() == [
+        ["Mary Major", 3],
+        ["John Doe", first_people["John Doe"]],
+    ]
+    assert second["admissions"]["person_id"].tolist() == [3, first_people["John Doe"]]
+    assert second["admissions"]["admission_id"].nunique() == 2
+    assert not set(second["admissions"]["admission_id"]) & set(first["admissions"]["admission_id"])
+
+
+def test_run_sources_cache_hit_keeps_admission_ids(tmp_path, monkeypatch):
+    """
+    A source restored from the transform cache and a changed source after
+    it get the same admission ids as in a cold run.
+    """
+    from src.cache import StageCache
+
+    calls = _record_loads(monkeypatch)
+    cache = StageCache(tmp_path / "cache")
+    sources = [
+        _write_source(tmp_path, "first", ["john doe", "jane smith"]),
+        _write_source(tmp_path, "second", ["mary major", "max mustermann"], admitted="2024-02-01"),
+    ]
+
+    run_sources(sources, "postgresql://test", new_key_state(), cache=cache)
+    _write_source(
+        tmp_path, "second", ["mary major", "max mustermann", "erika gabler"], admitted="2024-02-01"
+    )
+    run_sources(sources, "postgresql://test", new_key_state(), cache=cache)
+
+    ids = [loaded_data["admissions"]["admission_id"].tolist() for loaded_data, _ in calls]
+    assert ids[2] == ids[0]
+    assert ids[3][:2] == ids[1]
+    assert len(set(ids[0] + ids[3])) == 5
+
+
+def test_run_sources_replaces_only_with_first_source(tmp_path, monkeypatch):
+    calls = _record_loads(monkeypatch)
+    sources = [
+        _write_source(tmp_path, "first", ["john doe"]),
+        _write_source(tmp_path, "second", ["jane smith"]),
+    ]
+
+    run_sources(
+        sources,
+        "postgresql://test",
+        new_key_state(),
+        load_connections=2,
+        on_conflict="replace",
+    )
+
+    assert [options["on_conflict"] for _, options in calls] == ["replace", "upsert"]
+
+
+def test_run_sources_reports_rolled_back_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "load", lambda loaded_data, db_url, **options: None)
+    sources = [_write_source(tmp_path, "first", ["john doe"])]
+
+    reports = run_sources(sources, "postgresql://test", new_key_state())
+
+    assert reports[0]["status"] == "failed"
+    assert reports[0]["stage"] == "load"
+
+
+def test_clean_source_persists_detected_datetime_formats(tmp_path):
+    from src.pipeline import clean_source
+
+    source_cfg = _write_source(tmp_path, "first", ["john doe"])
+    formats_dir = tmp_path / "formats"
+
+    clean_source(source_cfg, formats_dir=formats_dir)
+
+    saved = (formats_dir / "first.json").read_text(encoding="utf-8")
+    assert '"date_of_admission": [\n    "%Y-%m-%d"\n  ]' in saved
@@ -0,0 +1,108 @@
+import json
+import threading
+
+from src.keys import new_key_state
+from src.pipeline import run_sources
+from src.profiling import Profiler, activate, stage
+from tests.test_pipeline import _record_loads, _write_source
+
+
+def _names(stages):
+    return [s["name"] for s in stages]
+
+
+def test_stage_is_noop_without_active_profiler():
+    with stage("anything", rows_in=10) as rec:
+        rec["rows_out"] = 5
+
+
+def test_nested_stages_record_time_rows_and_peak_memory():
+    profiler = Profiler()
+    with activate(profiler):
+        with stage("outer", rows_in=1000) as outer:
+            with stage("inner", rows_in=1000) as inner:
+                buf = bytearray(4 * 2**20)
+                inner["rows_out"] = 10
+            del buf
+            outer["rows_out"] = 1000
+
+    [outer] = profiler.report()["stages"]
+    assert outer["name"] == "outer"
+    assert _names(outer["children"]) == ["inner"]
+    inner = outer["children"][0]
+    assert inner["rows_out"] == 10
+    assert inner["rows_per_sec"] > 0
+    assert inner["wall_s"] <= outer["wall_s"]
+    # The inner allocation counts towards both the stage and its parent.
+    assert inner["peak_mib"] >= 4
+    assert outer["peak_mib"] >= inner["peak_mib"]
+
+
+def test_worker_thread_stage_hangs_under_main_stage():
+    profiler = Profiler(memory=False)
+    with activate(profiler):
+        with stage("run"):
+            worker = threading.Thread(target=_in_stage, args=("load",))
+            worker.start()
+            worker.join()
+
+    [run] = profiler.report()["stages"]
+    assert _names(run["children"]) == ["load"]
+    assert "peak_mib" not in run
+
+
+def _in_stage(name):
+    with stage(name):
+        pass
+
+
+def test_write_report_and_cprofile_dump(tmp_path):
+    profiler = Profiler(memory=False, cprofile_dir=tmp_path / "pstats")
+    with activate(profiler):
+        with stage("run"):
+            with stage("step"):
+                sum(range(1000))
+
+    path = profiler.write_report(tmp_path / "report.json", sources=[{"source": "a"}])
+
+    report = json.loads(path.read_text())
+    assert _names(report["stages"]) == ["run"]
+    assert report["sources"] == [{"source": "a"}]
+    # Only top-level stages are profiled.
+    assert [p.name for p in (tmp_path / "pstats").iterdir()] == ["run.pstats"]
+
+
+def test_run_sources_profiles_every_stage(tmp_path, monkeypatch):
+    _record_loads(monkeypatch)
+    sources = [_write_source(tmp_path, "first", ["john doe", "jane smith"])]
+
+    profiler = Profiler(memory=False)
+    with activate(profiler):
+        reports = run_sources(sources, "postgresql://test", new_key_state())
+
+    assert reports[0]["status"] == "ok"
+    [source, load] = profiler.report()["stages"]
+    assert source["name"] == "source:first"
+    assert load["name"] == "load:first"
+    assert _names(source["children"]) == ["read", "clean", "transform"]
+    read, clean, transform = source["children"]
+    assert read["rows_out"] == 2
+    assert "clean.age" in _names(clean["children"])
+    assert "transform.people" in _names(transform["children"])
+    assert transform["children"][0]["rows_out"] == 2
+
+
+def test_run_sources_records_worker_read_clean(tmp_path, monkeypatch):
+    _record_loads(monkeypatch)
+    sources = [
+        _write_source(tmp_path, "first", ["john doe"]),
+        _write_source(tmp_path, "second", ["jane smith"]),
+    ]
+
+    profiler = Profiler(memory=False)
+    with activate(profiler):
+        run_sources(sources, "postgresql://test", new_key_state(), processes=2)
+
+    source = profiler.report()["stages"][0]
+    assert _names(source["children"]) == ["read_clean", "transform"]
+    assert source["children"][0]["process"] == "worker"
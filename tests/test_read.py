@@ -1,7 +1,10 @@
+import gzip
+
 import pandas as pd
+import pyarrow as pa
 import pytest
 
-from src.read import read_csv, read_json, read
+from src.read import detect_compression, read_csv, read_json, read, read_chunks
 
 
 def test_read_csv_success(tmp_path):
@@ -98,3 +101,207 @@ def test_read_unsupported_source_type_raises():
 
     with pytest.raises(ValueError, match="Unsupported source type"):
         read(cfg)
+
+
+def test_read_chunks_csv_yields_bounded_frames(tmp_path):
+    """read_chunks should stream a CSV in chunks that reassemble to the file."""
+    original_df = pd.DataFrame(
+        {
+            "name": ["Alice", "Bob", "Carol", "Dan", "Eve"],
+            "age": [30, 25, 41, 52, 19],
+        }
+    )
+
+    csv_path = tmp_path / "test.csv"
+    original_df.to_csv(csv_path, index=False)
+
+    chunks = list(read_chunks({"type": "csv", "path": str(csv_path)}, chunksize=2))
+
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), original_df
+    )
+
+
+def test_read_chunks_json_lines(tmp_path):
+    original_df = pd.DataFrame(
+        {
+            "name": ["Alice", "Bob", "Carol"],
+            "age": [30, 25, 41],
+        }
+    )
+
+    json_path = tmp_path / "test.jsonl"
+    original_df.to_json(json_path, orient="records", lines=True)
+
+    cfg = {"type": "json", "path": str(json_path), "lines": True}
+    chunks = list(read_chunks(cfg, chunksize=2))
+
+    assert [len(c) for c in chunks] == [2, 1]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), original_df
+    )
+
+
+def test_read_chunks_json_array_yields_fixed_size_batches(tmp_path, monkeypatch):
+    """A top-level JSON array is parsed incrementally into record batches."""
+    import src.read as read_module
+
+    # Tiny read blocks force records to straddle block boundaries.
+    monkeypatch.setattr(read_module, "JSON_READ_BLOCK_SIZE", 7)
+    json_path = tmp_path / "test.json"
+    json_path.write_text(
+        '[ {"name": "Alice", "age": 30},\n {"name": "Bob"},\n'
+        ' {"name": "Carol", "age": 41, "extra": [1, 2]}, {"name": "Dan \\u00e9", "age": 52} ]',
+        encoding="utf-8",
+    )
+    cfg = {"type": "json", "path": str(json_path), "dtypes": {"name": "string", "age": "Int64"}}
+
+    chunks = list(read_chunks(cfg, chunksize=3))
+
+    assert [len(c) for c in chunks] == [3, 1]
+    assert chunks[1].index.tolist() == [3]
+    for chunk in chunks:
+        assert list(chunk.columns) == ["name", "age"]
+        assert chunk.dtypes.astype(str).tolist() == ["string", "Int64"]
+    assert chunks[0]["age"].isna().tolist() == [False, True, False]
+    assert chunks[1].loc[3, "name"] == "Dan \u00e9"
+
+
+def test_read_chunks_json_rejects_non_array_document(tmp_path):
+    json_path = tmp_path / "test.json"
+    json_path.write_text('{"name": {"0": "Alice"}}', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="top-level JSON array"):
+        list(read_chunks({"type": "json", "path": str(json_path)}, chunksize=2))
+
+
+def test_read_jsonl_source_type_applies_declared_dtypes(tmp_path):
+    json_path = tmp_path / "test.jsonl"
+    json_path.write_text(
+        '{"name": "Alice", "age": 30}\n{"name": "Bob", "age": null}\n{"name": "Carol", "age": 41}\n',
+        encoding="utf-8",
+    )
+    cfg = {"type": "jsonl", "path": str(json_path), "dtypes": {"age": "Int64", "name": "string"}}
+
+    whole = read(cfg)
+    chunks = list(read_chunks(cfg, chunksize=2))
+
+    assert list(whole.columns) == ["age", "name"]
+    assert [str(c["age"].dtype) for c in chunks] == ["Int64", "Int64"]
+    pd.testing.assert_frame_equal(pd.concat(chunks), whole)
+
+
+def test_read_csv_with_schema_projects_and_types_columns(tmp_path):
+    csv_path = tmp_path / "test.csv"
+    csv_path.write_text(
+        "name,age,unused,admitted\n"
+        "Alice,30,x,2024-01-02\n"
+        "N/A,,y,2024-01-05\n",
+        encoding="utf-8",
+    )
+    schema = {
+        "null_values": ["", "N/A"],
+        "columns": {
+            "admitted": {"type": "timestamp", "format": "%Y-%m-%d"},
+            "name": "string",
+            "age": "float64",
+        },
+    }
+
+    result = read({"type": "csv", "path": str(csv_path), "schema": schema})
+
+    assert list(result.columns) == ["admitted", "name", "age"]
+    assert result["admitted"].tolist() == [pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-05")]
+    assert result["name"].isna().tolist() == [False, True]
+    assert result["age"].dtype == "float64"
+
+
+def test_read_csv_schema_rejects_values_that_break_the_contract(tmp_path):
+    csv_path = tmp_path / "test.csv"
+    csv_path.write_text("age\n30\nthirty\n", encoding="utf-8")
+
+    # pyarrow's ArrowInvalid is a ValueError.
+    with pytest.raises(ValueError):
+        read_csv(str(csv_path), schema={"columns": {"age": "int64"}})
+
+
+def test_read_chunks_with_schema_matches_whole_file(tmp_path):
+    original_df = pd.DataFrame(
+        {
+            "name": [f"p{i}" for i in range(7)],
+            "age": [str(i) for i in range(7)],
+        }
+    )
+    csv_path = tmp_path / "test.csv"
+    original_df.to_csv(csv_path, index=False)
+    cfg = {
+        "type": "csv",
+        "path": str(csv_path),
+        "schema": {"block_size": 16, "columns": {"name": "string", "age": "string"}},
+    }
+
+    chunks = list(read_chunks(cfg, chunksize=3))
+
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert chunks[1].index.tolist() == [3, 4, 5]
+    pd.testing.assert_frame_equal(pd.concat(chunks), read(cfg))
+
+
+def _people_df(n=5):
+    return pd.DataFrame(
+        {
+            "name": [f"p{i}" for i in range(n)],
+            "age": list(range(20, 20 + n)),
+        }
+    )
+
+
+def _write_zstd(path, data: bytes):
+    with pa.output_stream(path, compression="zstd") as out:
+        out.write(data)
+
+
+def test_read_decompresses_by_extension_and_magic_bytes(tmp_path):
+    original_df = _people_df()
+    csv_bytes = original_df.to_csv(index=False).encode("utf-8")
+
+    gz_path = tmp_path / "people.csv.gz"
+    gz_path.write_bytes(gzip.compress(csv_bytes))
+    zst_path = tmp_path / "people.csv.zst"
+    _write_zstd(zst_path, csv_bytes)
+    # No telling extension: recognized by its gzip magic bytes.
+    disguised_path = tmp_path / "people.dat"
+    disguised_path.write_bytes(gzip.compress(csv_bytes))
+
+    assert detect_compression(str(gz_path)) == "gzip"
+    assert detect_compression(str(zst_path)) == "zstd"
+    assert detect_compression(str(disguised_path)) == "gzip"
+
+    for path in (gz_path, zst_path, disguised_path):
+        result = read({"type": "csv", "path": str(path)})
+        pd.testing.assert_frame_equal(result, original_df)
+
+    schema = {"columns": {"name": "string", "age": "int64"}}
+    result = read({"type": "csv", "path": str(zst_path), "schema": schema})
+    pd.testing.assert_frame_equal(result, original_df)
+
+
+def test_read_chunks_decompresses_csv_and_json_lines(tmp_path):
+    original_df = _people_df()
+
+    csv_path = tmp_path / "people.csv.zst"
+    _write_zstd(csv_path, original_df.to_csv(index=False).encode("utf-8"))
+    json_path = tmp_path / "people.jsonl.gz"
+    json_path.write_bytes(
+        gzip.compress(original_df.to_json(orient="records", lines=True).encode("utf-8"))
+    )
+
+    csv_chunks = list(read_chunks({"type": "csv", "path": str(csv_path)}, chunksize=2))
+    json_chunks = list(
+        read_chunks({"type": "json", "path": str(json_path), "lines": True}, chunksize=2)
+    )
+
+    for chunks in (csv_chunks, json_chunks):
+        assert [len(c) for c in chunks] == [2, 2, 1]
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), original_df)
@@ -0,0 +1,130 @@
+import pandas as pd
+import pytest
+
+from src.clean import clean
+from src.rules import compile_rules
+
+
+def test_clean_applies_source_rules():
+    rules = {
+        "columns": {
+            "ward": {"type": "text", "case": "upper", "allowed": ["A", "B"]},
+            "weight": {"type": "numeric", "min": 1, "round": 1},
+            "seen_at": {"type": "datetime", "format": "%d/%m/%Y"},
+        }
+    }
+    raw = pd.DataFrame({
+        "Ward": [" a", "b ", "c", ""],
+        "Weight": ["1,000.44", "0", "x", "70.06"],
+        "Seen At": ["02/01/2024", "31/12/2023", "2024-01-01", None],
+        "Name": [" john doe ", "jane", "x", "y"],
+    })
+
+    result = clean(raw, rules=rules)
+
+    assert result["ward"].tolist()[:2] == ["A", "B"]
+    assert result["ward"].isna().tolist() == [False, False, True, True]
+    assert result["weight"].tolist()[0] == 1000.4
+    assert result["weight"].isna().tolist() == [False, True, True, False]
+    # Values the declared format misses are retried with fallback formats.
+    assert result["seen_at"].tolist()[:3] == [
+        pd.Timestamp("2024-01-02"),
+        pd.Timestamp("2023-12-31"),
+        pd.Timestamp("2024-01-01"),
+    ]
+    assert pd.isna(result.loc[3, "seen_at"])
+    # Columns without a rule are only stripped.
+    assert result.loc[0, "name"] == "john doe"
+
+
+def test_compiled_plan_is_reused_across_chunks():
+    plan = compile_rules({"columns": {"gender": {"type": "text", "case": "upper"}}})
+
+    first = clean(pd.DataFrame({"Gender": ["m"]}), rules=plan)
+    second = clean(pd.DataFrame({"Gender": [" f"]}), rules=plan)
+
+    assert first["gender"].tolist() == ["M"]
+    assert second["gender"].tolist() == ["F"]
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"type": "currency"},
+        {"type": "numeric", "case": "upper"},
+        {"type": "text", "case": "snake"},
+    ],
+)
+def test_compile_rules_rejects_unsupported_rules(spec):
+    with pytest.raises(ValueError):
+        compile_rules({"columns": {"col": spec}})
+
+
+def test_datetime_formats_are_detected_once_and_reused(tmp_path):
+    from src.rules import load_datetime_formats, save_datetime_formats
+
+    rules = {"columns": {"admitted": {"type": "datetime"}}}
+    plan = compile_rules(rules)
+    first = pd.DataFrame({"admitted": ["03/01/2024", "04/01/2024", "2024-01-05", "25/01/2024", "junk"]})
+
+    result = clean(first, rules=plan)
+
+    # Day-first dominates because 25/01 cannot be month-first.
+    assert plan.datetime_formats == {"admitted": ["%d/%m/%Y", "%Y-%m-%d"]}
+    assert result["admitted"].tolist()[:4] == [
+        pd.Timestamp("2024-01-03"),
+        pd.Timestamp("2024-01-04"),
+        pd.Timestamp("2024-01-05"),
+        pd.Timestamp("2024-01-25"),
+    ]
+    assert pd.isna(result.loc[4, "admitted"])
+
+    path = tmp_path / "formats.json"
+    save_datetime_formats(plan.datetime_formats, path)
+    cached_plan = compile_rules(rules, datetime_formats=load_datetime_formats(path))
+    second = clean(pd.DataFrame({"admitted": ["05/02/2024"]}), rules=cached_plan)
+
+    assert second["admitted"].tolist() == [pd.Timestamp("2024-02-05")]
+
+
+def test_datetime_without_fallback_formats_is_strict():
+    rules = {"columns": {"admitted": {"type": "datetime", "format": "%Y-%m-%d", "fallback_formats": []}}}
+
+    result = clean(pd.DataFrame({"admitted": ["2024-01-02", "02/01/2024"]}), rules=rules)
+
+    assert result["admitted"].tolist()[0] == pd.Timestamp("2024-01-02")
+    assert pd.isna(result.loc[1, "admitted"])
+
+
+def test_numeric_kernel_parses_text_downcasts_and_reports():
+    plan = compile_rules(
+        {
+            "columns": {
+                "age": {"type": "numeric", "min": 0, "max": 120, "dtype": "int"},
+                "billing_amount": {"type": "numeric", "round": 2},
+                "room_number": {"type": "numeric", "dtype": "int"},
+            }
+        }
+    )
+    raw = pd.DataFrame({
+        "age": [" 30 ", "1,0", "abc", "130", None],
+        "billing_amount": ["$1,000.456", " € 20 ", "20", "n/a", "£3"],
+        # Already numeric: parsed without a string round trip.
+        "room_number": [101.0, 202.0, 70000.0, None, 5.0],
+    })
+
+    result = clean(raw, rules=plan)
+
+    assert str(result["age"].dtype) == "Int8"
+    assert result["age"].tolist()[:2] == [30, 10]
+    assert result["age"].isna().tolist() == [False, False, True, True, True]
+    assert result["billing_amount"].tolist()[:3] == [1000.46, 20.0, 20.0]
+    assert result["billing_amount"].isna().tolist() == [False, False, False, True, False]
+    assert str(result["room_number"].dtype) == "Int32"
+    assert {k: v for k, v in plan.numeric_report["age"].items() if k != "input_dtype"} == {
+        "rows": 5,
+        "unparsable": 1,
+        "out_of_range": 1,
+        "dtype": "Int8",
+    }
+    assert plan.numeric_report["room_number"]["unparsable"] == 0
@@ -0,0 +1,180 @@
+import pandas as pd
+import psycopg2.errors
+import pytest
+
+from src.schema import (
+    FOREIGN_KEYS,
+    LATEST_VERSION,
+    MIGRATIONS,
+    PARTITIONED_ADMISSIONS_DDL,
+    ensure_partitioned,
+    ensure_schema,
+    partition_bounds,
+    partition_starts,
+)
+from tests.test_load import FakeConn, FakeCursor
+
+
+class VersionCursor(FakeCursor):
+    """FakeCursor over a schema_version table at `version` (None: no table yet)."""
+
+    def __init__(self, version):
+        super().__init__()
+        self.version = version
+        self.table_exists = version is not None
+
+    def execute(self, sql, params=None):
+        if "CREATE TABLE IF NOT EXISTS schema_version" in sql:
+            self.table_exists = True
+        elif "FROM schema_version" in sql and not self.table_exists:
+            raise psycopg2.errors.UndefinedTable()
+        super().execute(sql, params)
+
+    def fetchone(self):
+        return (self.version,)
+
+
+def _recorded_versions(cursor):
+    return [
+        params[0] for sql, params in cursor.executed
+        if sql.startswith("INSERT INTO schema_version")
+    ]
+
+
+def test_current_schema_costs_one_query_and_no_commit():
+    cursor = VersionCursor(LATEST_VERSION)
+    conn = FakeConn(cursor)
+
+    assert ensure_schema(conn, cursor) == LATEST_VERSION
+
+    assert [sql for sql, _ in cursor.executed] == ["SELECT max(version) FROM schema_version"]
+    assert conn.commits == 0
+
+
+def test_missing_schema_version_table_runs_every_migration():
+    cursor = VersionCursor(None)
+    conn = FakeConn(cursor)
+
+    assert ensure_schema(conn, cursor) == LATEST_VERSION
+
+    sqls = [sql for sql, _ in cursor.executed]
+    assert conn.rollbacks == 1
+    assert conn.commits == 1
+    assert any("CREATE TABLE IF NOT EXISTS people" in sql for sql in sqls)
+    assert any(sql.startswith("SELECT pg_advisory_xact_lock") for sql in sqls)
+    assert _recorded_versions(cursor) == [version for version, _, _ in MIGRATIONS]
+
+
+def test_only_pending_migrations_run():
+    cursor = VersionCursor(LATEST_VERSION - 1)
+    conn = FakeConn(cursor)
+
+    ensure_schema(conn, cursor)
+
+    assert _recorded_versions(cursor) == [LATEST_VERSION]
+    assert not any("CREATE TABLE IF NOT EXISTS people" in sql for sql, _ in cursor.executed)
+
+
+@pytest.mark.parametrize("index", range(1, len(MIGRATIONS)))
+def test_migration_versions_increase(index):
+    assert MIGRATIONS[index][0] > MIGRATIONS[index - 1][0]
+
+
+def test_rejects_missing_bitmask_is_added_only_by_its_migration():
+    versions = [
+        version
+        for version, _, statements in MIGRATIONS
+        if any("missing_bitmask" in sql for sql in statements)
+    ]
+
+    assert versions == [2]
+
+
+def test_every_foreign_key_is_made_deferrable_by_a_migration():
+    deferrable = [
+        sql for _, _, statements in MIGRATIONS
+        for sql in statements
+        if "DEFERRABLE INITIALLY IMMEDIATE" in sql
+    ]
+
+    assert len(deferrable) == sum(len(fks) for fks in FOREIGN_KEYS.values())
+    assert PARTITIONED_ADMISSIONS_DDL.count("DEFERRABLE INITIALLY IMMEDIATE") == len(
+        FOREIGN_KEYS["admission_data"]
+    )
+
+
+class RelkindCursor(FakeCursor):
+    """FakeCursor over an admission_data of the given relkind."""
+
+    def __init__(self, relkind, dates=(), undated=0):
+        super().__init__()
+        self.relkind = relkind
+        self.dates = dates
+        self.undated = undated
+
+    def fetchone(self):
+        if "count(*)" in self.executed[-1][0]:
+            return (self.undated,)
+        return (self.relkind,)
+
+    def fetchall(self):
+        return [(date,) for date in self.dates]
+
+
+def test_partitioned_admissions_cost_one_query():
+    cursor = RelkindCursor("p")
+    conn = FakeConn(cursor)
+
+    assert not ensure_partitioned(conn, cursor, "month")
+
+    assert len(cursor.executed) == 1
+    assert conn.commits == 0
+
+
+def test_plain_admissions_are_converted_with_partitions_for_existing_rows():
+    dates = [pd.Timestamp("2023-12-31 10:00"), pd.Timestamp("2024-01-05"), pd.Timestamp("2024-01-20")]
+    cursor = RelkindCursor("r", dates)
+    conn = FakeConn(cursor)
+
+    assert ensure_partitioned(conn, cursor, "month")
+
+    sqls = [sql.strip() for sql, _ in cursor.executed]
+    partitions = [sql for sql in sqls if "PARTITION OF admission_data" in sql]
+    assert partitions == [
+        "CREATE TABLE IF NOT EXISTS admission_data_p2023_12 PARTITION OF admission_data "
+        "FOR VALUES FROM ('2023-12-01') TO ('2024-01-01')",
+        "CREATE TABLE IF NOT EXISTS admission_data_p2024_01 PARTITION OF admission_data "
+        "FOR VALUES FROM ('2024-01-01') TO ('2024-02-01')",
+    ]
+    create = next(i for i, sql in enumerate(sqls) if sql.startswith("CREATE TABLE admission_data"))
+    assert "PARTITION BY RANGE (date_of_admission)" in sqls[create]
+    assert sqls.index("ALTER TABLE admission_data RENAME TO admission_data_unpartitioned") < create
+    assert sqls[-1] == "DROP TABLE admission_data_unpartitioned"
+    assert conn.commits == 1
+
+    # The new table's foreign keys keep the <table>_<column>_fkey names.
+    dropped_fk = sqls.index(
+        "ALTER TABLE admission_data_unpartitioned DROP CONSTRAINT IF EXISTS admission_data_person_id_fkey"
+    )
+    assert dropped_fk < create
+    assert "CONSTRAINT admission_data_person_id_fkey" in sqls[create]
+
+
+def test_conversion_refuses_rows_without_date_of_admission():
+    cursor = RelkindCursor("r", [pd.Timestamp("2024-01-05")], undated=2)
+    conn = FakeConn(cursor)
+
+    with pytest.raises(ValueError, match="2 row"):
+        ensure_partitioned(conn, cursor, "month")
+
+    sqls = [sql.strip() for sql, _ in cursor.executed]
+    assert not any(sql.startswith("ALTER TABLE") for sql in sqls)
+    assert conn.commits == 0
+
+
+def test_partition_bounds_per_interval():
+    start = partition_starts(pd.Series([pd.Timestamp("2024-07-14")]), "year")[0]
+
+    assert partition_bounds(start, "year") == ("admission_data_p2024", pd.Timestamp("2025-01-01"))
+    with pytest.raises(ValueError, match="interval"):
+        ensure_partitioned(FakeConn(FakeCursor()), FakeCursor(), "week")
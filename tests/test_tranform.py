@@ -1,7 +1,14 @@
+import numpy as np
 import pandas as pd
 import pytest
 
-from src.transform import transform
+from src.transform import (
+    REQUIRED_COLUMNS,
+    admission_ids,
+    decode_missing_bitmask,
+    encode_keys,
+    transform,
+)
 
 
 def _make_base_df():
@@ -128,6 +135,7 @@ def test_transform_routes_invalid_rows_to_rejects_and_sets_missing_columns():
 
     assert reject_row["name"] == "John Doe"
     assert reject_row["test_results"] == "unknown"
+    assert reject_row["reason"] == "missing_columns"
 
     missing_cols = set(reject_row["missing_columns"].split(","))
     assert "test_result_id" in missing_cols
@@ -163,3 +171,100 @@ def test_transform_raises_when_required_columns_missing():
 
     with pytest.raises(KeyError):
         transform(bad_df)
+
+
+def test_transform_key_state_keeps_ids_consistent_across_chunks():
+    """
+    Transforming chunk by chunk with a shared key_state should give every
+    row the same ids as a single pass, and emit each dimension row once.
+    """
+    df = _make_base_df()
+    df.loc[2, ["billing_amount", "room_number", "discharge_date", "medication", "test_results"]] = [
+        3000.0,
+        303,
+        "2024-01-09",
+        "Med C",
+        "normal",
+    ]
+
+    whole = transform(df.copy())
+
+    key_state = {}
+    chunks = [
+        transform(df.iloc[[0]].reset_index(drop=True), key_state=key_state),
+        transform(df.iloc[1:].reset_index(drop=True), key_state=key_state),
+    ]
+
+    for name in ["people", "doctors", "hospitals", "conditions", "insurance"]:
+        combined = pd.concat([c[name] for c in chunks], ignore_index=True)
+        pd.testing.assert_frame_equal(combined, whole[name], check_dtype=False)
+
+    assert len(chunks[1]["people"]) == 1
+    assert chunks[1]["people"]["person_id"].tolist() == [2]
+
+    admissions = pd.concat([c["admissions"] for c in chunks], ignore_index=True)
+    # With a key_state, admission ids come from the admission key rather
+    # than the row position.
+    assert admissions["admission_id"].tolist() == admission_ids(whole["admissions"]).tolist()
+    pd.testing.assert_frame_equal(
+        admissions.drop(columns="admission_id"),
+        whole["admissions"].drop(columns="admission_id"),
+        check_dtype=False,
+    )
+
+
+def test_transform_missing_bitmask_matches_missing_columns():
+    """
+    Each reject carries an integer bitmask over REQUIRED_COLUMNS that
+    decodes to the same names as its missing_columns label.
+    """
+    df = _make_base_df()
+
+    rejects_df = transform(df)["rejects"]
+
+    bitmask = int(rejects_df.iloc[0]["missing_bitmask"])
+    expected = {
+        REQUIRED_COLUMNS.index(col)
+        for col in rejects_df.iloc[0]["missing_columns"].split(",")
+    }
+    assert {bit for bit in range(len(REQUIRED_COLUMNS)) if bitmask >> bit & 1} == expected
+    assert rejects_df.iloc[0]["missing_columns"] == (
+        "test_result_id,discharge_date,billing_amount,room_number,medication"
+    )
+
+
+def test_decode_missing_bitmask_maps_unique_values_back():
+    bitmasks = np.array([1, 0b110, 1, 0])
+
+    labels = decode_missing_bitmask(bitmasks)
+
+    assert labels.tolist() == ["person_id", "doctor_id,condition_id", "person_id", ""]
+
+
+def test_encode_keys_codes_in_first_appearance_order():
+    df = pd.DataFrame(
+        {
+            "doctor": ["B", "A", "B", None, "A", "B"],
+            "hospital": ["X", "Y", "X", "X", "Z", "Y"],
+        }
+    )
+
+    codes, first = encode_keys(df, ["doctor", "hospital"])
+
+    assert codes.tolist() == [0, 1, 0, -1, 2, 3]
+    assert first.tolist() == [0, 1, 4, 5]
+
+
+def test_transform_builds_plain_dimensions_from_categorical_columns():
+    df = _make_base_df()
+    categorical = df.copy()
+    for col in ["gender", "blood_type", "medical_condition", "insurance_provider",
+                "admission_type", "test_results"]:
+        categorical[col] = categorical[col].astype("category")
+
+    expected = transform(df)
+    result = transform(categorical)
+
+    for name in ["people", "conditions", "insurance", "admission_types", "test_results"]:
+        pd.testing.assert_frame_equal(result[name], expected[name])
+    pd.testing.assert_frame_equal(result["admissions"], expected["admissions"])